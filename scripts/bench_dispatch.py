@@ -0,0 +1,169 @@
+"""量測 _call_ptt_service 本身的負擔：成功、附上成功訊息、PyPtt 例外與未知例外四種路徑。
+
+用一個立刻回傳 (或拋出預先建立的例外) 的假連線取代 PyPtt.Service，所以量到的只有伺服器的分派、
+錯誤對應與回應組裝，不包含 PTT 的來回時間。
+
+每種路徑也會量測直接呼叫假連線 (只包一層 try/except) 的時間當作基準，以兩者的倍數和
+scripts/bench_dispatch_budgets.json 比較；倍數和機器快慢無關，超出預算時以非零值結束。
+
+用法:
+    python scripts/bench_dispatch.py                  # 每種路徑呼叫 100000 次
+    python scripts/bench_dispatch.py --calls 1000000
+    python scripts/bench_dispatch.py --update-budgets # 以這次的結果重新產生預算
+"""
+
+import argparse
+import functools
+import json
+import math
+import os
+import sys
+import time
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(SCRIPTS_DIR), "src"))
+
+DEFAULT_BUDGETS_PATH = os.path.join(SCRIPTS_DIR, "bench_dispatch_budgets.json")
+
+# 產生預算時保留的空間：倍數超過這次結果的 1.5 倍才算退步。
+BUDGET_HEADROOM = 1.5
+
+
+class _InstantService:
+    """依照操作名稱立刻回傳固定結果，或拋出預先建立的例外。"""
+
+    def __init__(self, errors: Dict[str, Exception]):
+        self.errors = errors
+
+    def call(self, api: str, args: Optional[Dict[str, Any]] = None) -> Any:
+        error = self.errors.get(api)
+        if error is not None:
+            raise error.with_traceback(None)
+        return "12:00"
+
+
+# (路徑名稱, 操作名稱, 參數)
+PATHS: List[Tuple[str, str, Dict[str, Any]]] = [
+    ("success", "get_time", {}),
+    (
+        "success_message",
+        "comment",
+        {
+            "success_message": "推文成功",
+            "board": "Test",
+            "content": "bench",
+            "index": 1,
+        },
+    ),
+    (
+        "ptt_error",
+        "get_post",
+        {"board": "Test", "aid": None, "index": 10**9, "query": False},
+    ),
+    ("unknown_error", "get_user", {"user_id": "bench"}),
+]
+
+
+def _direct_call(
+    service: _InstantService, method_name: str, kwargs: Dict[str, Any]
+) -> Any:
+    """基準：直接呼叫假連線，只處理例外，不做任何分派與回應組裝。"""
+    try:
+        return service.call(method_name, kwargs)
+    except Exception as e:
+        return e
+
+
+def _best_seconds(func: Callable[[], Any], calls: int, repeat: int) -> float:
+    """重複量測 repeat 次，取最快的一次，減少其他程式與 GC 造成的誤差。"""
+    best = math.inf
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for _ in range(calls):
+            func()
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--calls", type=int, default=100_000, help="calls per path")
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="measure each path this many times and keep the best",
+    )
+    parser.add_argument("--budgets", default=DEFAULT_BUDGETS_PATH)
+    parser.add_argument(
+        "--update-budgets",
+        action="store_true",
+        help="write the measured ratios as the new budgets",
+    )
+    args = parser.parse_args()
+
+    import PyPtt
+    from fake_ptt import _ptt_error
+    from utils import _call_ptt_service
+
+    service = _InstantService(
+        {
+            "get_post": _ptt_error(PyPtt.NoSuchPost, "no such post"),
+            "get_user": ValueError("unexpected"),
+        }
+    )
+    storage = {"ptt_bot": service}
+
+    ratios: Dict[str, float] = {}
+    print(f"{'path':<16} {'calls':>9} {'direct ns':>10} {'ns/call':>9} {'ratio':>7}")
+    for name, method_name, kwargs in PATHS:
+        # 先呼叫一次，讓 PyPtt 載入與錯誤對應表的建立不計入結果。
+        _call_ptt_service(storage, method_name, **kwargs)
+        direct_seconds = _best_seconds(
+            functools.partial(_direct_call, service, method_name, kwargs),
+            args.calls,
+            args.repeat,
+        )
+        dispatch_seconds = _best_seconds(
+            functools.partial(_call_ptt_service, storage, method_name, **kwargs),
+            args.calls,
+            args.repeat,
+        )
+        ratios[name] = dispatch_seconds / direct_seconds
+        print(
+            f"{name:<16} {args.calls:>9} {direct_seconds / args.calls * 1e9:>10.0f} "
+            f"{dispatch_seconds / args.calls * 1e9:>9.0f} {ratios[name]:>7.2f}"
+        )
+
+    if args.update_budgets:
+        budgets = {
+            name: {"max_ratio": round(ratio * BUDGET_HEADROOM, 1)}
+            for name, ratio in ratios.items()
+        }
+        with open(args.budgets, "w", encoding="utf-8") as f:
+            json.dump(budgets, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"budgets written to {args.budgets}")
+        return
+
+    with open(args.budgets, encoding="utf-8") as f:
+        budgets = json.load(f)
+    failures = []
+    for name, ratio in ratios.items():
+        budget = budgets.get(name)
+        if budget is None:
+            failures.append(f"{name}: no budget, run with --update-budgets")
+        elif ratio > budget["max_ratio"]:
+            failures.append(
+                f"{name}: {ratio:.2f}x direct call > budget {budget['max_ratio']}x"
+            )
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""量測 MCP 伺服器的冷啟動時間：從啟動行程到回應 initialize 請求為止。
+
+用法:
+    python scripts/bench_startup.py                      # 直接執行 src/mcp_server.py
+    python scripts/bench_startup.py --runs 20
+    python scripts/bench_startup.py -- docker run -i --rm -e PTT_ID=x -e PTT_PW=x -e PTT_LOGIN_MODE=manual \\
+        ghcr.io/pyptt/ptt_mcp_server:latest
+
+預設以 PTT_LOGIN_MODE=manual 與假帳號啟動，只量測啟動本身，不會連線到 PTT。
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+INITIALIZE_REQUEST = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": "2025-06-18",
+        "capabilities": {},
+        "clientInfo": {"name": "bench_startup", "version": "0"},
+    },
+}
+
+
+def _measure_once(command: List[str], env: dict, timeout: float) -> float:
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        env=env,
+        cwd=ROOT_DIR,
+    )
+    try:
+        assert process.stdin is not None and process.stdout is not None
+        process.stdin.write((json.dumps(INITIALIZE_REQUEST) + "\n").encode())
+        process.stdin.flush()
+        while True:
+            line = process.stdout.readline()
+            if not line:
+                raise RuntimeError(
+                    f"Server exited before answering initialize (exit code {process.poll()})."
+                )
+            if time.perf_counter() - start > timeout:
+                raise TimeoutError("Server did not answer initialize in time.")
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if message.get("id") == INITIALIZE_REQUEST["id"]:
+                return time.perf_counter() - start
+    finally:
+        process.kill()
+        process.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--runs", type=int, default=10, help="number of cold starts to measure"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=60.0, help="seconds to wait for each start"
+    )
+    parser.add_argument(
+        "command",
+        nargs=argparse.REMAINDER,
+        help="server command (default: the local server)",
+    )
+    args = parser.parse_args()
+
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if not command:
+        command = [sys.executable, os.path.join(ROOT_DIR, "src", "mcp_server.py")]
+
+    env = dict(os.environ)
+    env.setdefault("PTT_ID", "bench")
+    env.setdefault("PTT_PW", "bench")
+    env.setdefault("PTT_LOGIN_MODE", "manual")
+    env.setdefault("PTT_KEEPALIVE_INTERVAL", "0")
+
+    samples = []
+    for run in range(args.runs):
+        elapsed = _measure_once(command, env, args.timeout)
+        samples.append(elapsed)
+        print(f"run {run + 1}/{args.runs}: {elapsed * 1000:.1f} ms")
+
+    samples.sort()
+    p95 = samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))]
+    print(
+        f"cold start: min {samples[0] * 1000:.1f} ms, "
+        f"median {statistics.median(samples) * 1000:.1f} ms, "
+        f"p95 {p95 * 1000:.1f} ms, "
+        f"max {samples[-1] * 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,652 @@
+"""不需要 PTT 帳號的工具 benchmark。
+
+用 scripts/fake_ptt.py 取代 PyPtt.Service，在同一個行程內啟動 MCP 伺服器，依序呼叫每一個工具，
+記錄每個情境對 PTT 的來回次數 (round trips) 與實際耗時，並和 scripts/bench_budgets.json 比較。
+任何情境超出預算、回傳結果不如預期，或是有工具沒有對應的情境時，以非 0 結束。
+
+用法:
+    python scripts/bench_tools.py                     # 與預算比較
+    python scripts/bench_tools.py --latency 0.02      # 模擬每次 PTT 呼叫 20ms 的延遲
+    python scripts/bench_tools.py --update-budgets    # 以這次的結果重新產生預算
+
+情境依照固定順序在同一個伺服器上執行，後面的情境會用到前面留下的快取，名稱中的 warm 代表這種情況。
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, Any, List
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(SCRIPTS_DIR), "src")
+DEFAULT_BUDGETS_PATH = os.path.join(SCRIPTS_DIR, "bench_budgets.json")
+
+BOARD = "Gossiping"
+
+# 每個情境: name 情境名稱、tool 工具名稱、args 參數、success 預期的 success (預設 True)、
+# concurrency 同時送出幾個相同的呼叫 (預設 1)、latency 這個情境中每次 PTT 呼叫的延遲秒數 (預設使用 --latency)。
+SCENARIOS: List[Dict[str, Any]] = [
+    {"name": "get_version", "tool": "get_version", "args": {}},
+    {"name": "login", "tool": "login", "args": {}},
+    {"name": "get_time", "tool": "get_time", "args": {}},
+    {
+        "name": "get_newest_index",
+        "tool": "get_newest_index",
+        "args": {"index_type": "BOARD", "board": BOARD},
+    },
+    {
+        "name": "get_newest_index search",
+        "tool": "get_newest_index",
+        "args": {
+            "index_type": "BOARD",
+            "board": BOARD,
+            "search_list": [["KEYWORD", "問卦"]],
+        },
+    },
+    {
+        "name": "get_post by index",
+        "tool": "get_post",
+        "args": {"board": BOARD, "index": 800_001},
+    },
+    {
+        "name": "get_post by index warm",
+        "tool": "get_post",
+        "args": {"board": BOARD, "index": 800_001},
+    },
+    {
+        "name": "get_post fields warm",
+        "tool": "get_post",
+        "args": {
+            "board": BOARD,
+            "index": 800_001,
+            "fields": ["aid", "title", "author", "push_number"],
+        },
+    },
+    {
+        "name": "get_post compact warm",
+        "tool": "get_post",
+        "args": {"board": BOARD, "index": 800_001, "compact": True},
+    },
+    {
+        "name": "get_post query",
+        "tool": "get_post",
+        "args": {"board": BOARD, "index": 800_002, "query": True},
+    },
+    {
+        "name": "get_post refresh_comments",
+        "tool": "get_post",
+        "args": {"board": BOARD, "index": 800_001, "refresh_comments": True},
+    },
+    {
+        "name": "get_new_comments",
+        "tool": "get_new_comments",
+        "args": {"board": BOARD, "aid": "1erAW5e0", "known_comment_count": 150},
+    },
+    {
+        "name": "get_post concurrent x8",
+        "tool": "get_post",
+        "args": {"board": BOARD, "index": 800_100},
+        "concurrency": 8,
+        "latency": 0.05,
+    },
+    {
+        "name": "get_post no such post",
+        "tool": "get_post",
+        "args": {"board": BOARD, "index": 10**9},
+        "success": False,
+    },
+    {
+        "name": "get_post_index_range",
+        "tool": "get_post_index_range",
+        "args": {"board": BOARD, "target_date_str": "2026/08/15"},
+    },
+    {
+        "name": "get_post_index_range warm",
+        "tool": "get_post_index_range",
+        "args": {"board": BOARD, "target_date_str": "2026/08/16"},
+    },
+    {
+        "name": "get_post_index_range other board",
+        "tool": "get_post_index_range",
+        "args": {"board": "Stock", "target_date_str": "2026/09/01"},
+    },
+    {
+        "name": "get_post_index_ranges week",
+        "tool": "get_post_index_ranges",
+        "args": {
+            "board": BOARD,
+            "start_date_str": "2026/07/01",
+            "end_date_str": "2026/07/07",
+        },
+    },
+    {
+        "name": "get_post_index_ranges across new year",
+        "tool": "get_post_index_ranges",
+        "args": {
+            "board": BOARD,
+            "start_date_str": "2025/12/28",
+            "end_date_str": "2026/01/03",
+        },
+    },
+    # 以下兩個看板橫跨將近兩年：Board00000 最新的文章、Board00006 編號 1 的文章已被刪除，沒有發文時間，
+    # 年份必須從附近還在的文章推算，不能跨過整個看板外插。
+    {
+        "name": "get_post_index_range newest deleted",
+        "tool": "get_post_index_range",
+        "args": {"board": "Board00000", "target_date_str": "2026/03/10"},
+    },
+    {
+        "name": "get_post_index_ranges newest deleted",
+        "tool": "get_post_index_ranges",
+        "args": {
+            "board": "Board00000",
+            "start_date_str": "2026/03/10",
+            "end_date_str": "2026/03/12",
+        },
+    },
+    {
+        "name": "get_post_index_range oldest deleted",
+        "tool": "get_post_index_range",
+        "args": {"board": "Board00006", "target_date_str": "2025/06/01"},
+    },
+    {
+        "name": "get_posts query 100",
+        "tool": "get_posts",
+        "args": {
+            "board": BOARD,
+            "start_index": 600_000,
+            "end_index": 600_099,
+            "query": True,
+            "limit": 100,
+        },
+    },
+    {
+        "name": "get_posts full 50",
+        "tool": "get_posts",
+        "args": {
+            "board": BOARD,
+            "start_index": 612_000,
+            "end_index": 612_049,
+            "fields": ["aid", "title", "comments"],
+        },
+    },
+    {
+        "name": "get_posts full 50 warm",
+        "tool": "get_posts",
+        "args": {
+            "board": BOARD,
+            "start_index": 612_000,
+            "end_index": 612_049,
+            "fields": ["aid", "title", "comments"],
+        },
+    },
+    {
+        "name": "crawl_posts 40",
+        "tool": "crawl_posts",
+        "args": {
+            "board": BOARD,
+            "start_index": 700_000,
+            "end_index": 700_039,
+            "page_size": 40,
+        },
+    },
+    {"name": "watch_board", "tool": "watch_board", "args": {"board": BOARD}},
+    {
+        "name": "get_new_posts",
+        "tool": "get_new_posts",
+        "args": {"board": BOARD, "since_cursor": 2_000_000},
+    },
+    {
+        "name": "get_new_posts unwatched board",
+        "tool": "get_new_posts",
+        "args": {"board": "Stock"},
+    },
+    {"name": "unwatch_board", "tool": "unwatch_board", "args": {"board": "Stock"}},
+    {
+        "name": "search_local_posts keyword",
+        "tool": "search_local_posts",
+        "args": {"keywords": ["第 612010 篇"]},
+    },
+    {
+        "name": "search_local_posts any keyword by author",
+        "tool": "search_local_posts",
+        "args": {
+            "keywords": ["612010", "700001"],
+            "any_keyword": True,
+            "author": "user849",
+            "board": BOARD,
+        },
+    },
+    {
+        "name": "get_newest_index concurrent x8",
+        "tool": "get_newest_index",
+        "args": {"index_type": "BOARD", "board": "Stock"},
+        "concurrency": 8,
+        "latency": 0.05,
+    },
+    {
+        "name": "get_board_info",
+        "tool": "get_board_info",
+        "args": {"board": BOARD, "get_post_types": True},
+    },
+    {
+        "name": "get_board_info warm",
+        "tool": "get_board_info",
+        "args": {"board": BOARD, "get_post_types": True},
+    },
+    {
+        "name": "get_board_info fields warm",
+        "tool": "get_board_info",
+        "args": {
+            "board": BOARD,
+            "get_post_types": True,
+            "fields": ["board", "online_user"],
+        },
+    },
+    {
+        "name": "get_board_info no such board",
+        "tool": "get_board_info",
+        "args": {"board": "NoSuchBoard"},
+        "success": False,
+    },
+    {
+        "name": "get_bottom_post_list",
+        "tool": "get_bottom_post_list",
+        "args": {"board": BOARD},
+    },
+    {
+        "name": "get_board_rules",
+        "tool": "get_board_rules",
+        "args": {},
+        "success": False,
+    },
+    {"name": "get_all_boards", "tool": "get_all_boards", "args": {}},
+    {"name": "get_all_boards warm", "tool": "get_all_boards", "args": {}},
+    {"name": "find_boards typo", "tool": "find_boards", "args": {"name": "gosisping"}},
+    {
+        "name": "get_board_info typo",
+        "tool": "get_board_info",
+        "args": {"board": "Gossipin"},
+        "success": False,
+    },
+    {"name": "get_favourite_boards", "tool": "get_favourite_boards", "args": {}},
+    {"name": "get_user", "tool": "get_user", "args": {"user_id": "CodingMan"}},
+    {"name": "get_user warm", "tool": "get_user", "args": {"user_id": "codingman"}},
+    {
+        "name": "get_user fields warm",
+        "tool": "get_user",
+        "args": {"user_id": "codingman", "fields": ["ptt_id", "money"]},
+    },
+    {
+        "name": "get_users",
+        "tool": "get_users",
+        "args": {"user_ids": ["CodingMan", "codingman", "alice", "bob", "NoSuchUser"]},
+    },
+    {
+        "name": "get_users fields warm",
+        "tool": "get_users",
+        "args": {
+            "user_ids": ["alice", "Bob", "CodingMan"],
+            "fields": ["ptt_id", "legal_post", "illegal_post"],
+        },
+    },
+    {"name": "search_user", "tool": "search_user", "args": {"ptt_id": "Coding"}},
+    {
+        "name": "get_newest_index mail",
+        "tool": "get_newest_index",
+        "args": {"index_type": "MAIL"},
+    },
+    {"name": "get_mail", "tool": "get_mail", "args": {"index": 100}},
+    {
+        "name": "get_mail compact",
+        "tool": "get_mail",
+        "args": {"index": 100, "compact": True},
+    },
+    {"name": "sync_mailbox", "tool": "sync_mailbox", "args": {}},
+    {"name": "sync_mailbox warm", "tool": "sync_mailbox", "args": {}},
+    {
+        "name": "search_mails keyword",
+        "tool": "search_mails",
+        "args": {"keyword": "信件 150"},
+    },
+    {
+        "name": "search_mails offline by author",
+        "tool": "search_mails",
+        "args": {
+            "author": "sender7",
+            "limit": 50,
+            "include_content": True,
+            "sync": False,
+        },
+    },
+    {
+        "name": "get_aid_from_url",
+        "tool": "get_aid_from_url",
+        "args": {"url": "https://www.ptt.cc/bbs/Python/M.1565335521.A.880.html"},
+    },
+    {
+        "name": "get_url_from_aid",
+        "tool": "get_url_from_aid",
+        "args": {"board": "Python", "aid": "#1TJH_XY0"},
+    },
+    {
+        "name": "parse_post_refs 1000",
+        "tool": "parse_post_refs",
+        "args": {
+            "refs": [
+                f"https://www.ptt.cc/bbs/{BOARD}/M.{1_700_000_000 + i * 97}.A.{i % 4096:03X}.html"
+                for i in range(999)
+            ]
+            + ["1TJH_XY0"],
+            "board": "Python",
+        },
+    },
+    {
+        "name": "post",
+        "tool": "post",
+        "args": {
+            "board": "Test",
+            "title_index": 1,
+            "title": "bench",
+            "content": "bench",
+        },
+    },
+    {
+        "name": "reply_post",
+        "tool": "reply_post",
+        "args": {"board": "Test", "reply_to": "BOARD", "content": "bench", "index": 1},
+    },
+    {
+        "name": "comment",
+        "tool": "comment",
+        "args": {
+            "board": "Test",
+            "comment_type": "PUSH",
+            "content": "bench",
+            "index": 1,
+        },
+    },
+    {
+        "name": "comment queued",
+        "tool": "comment",
+        "args": {
+            "board": "Test",
+            "comment_type": "PUSH",
+            "content": "queued",
+            "index": 1,
+            "wait": False,
+        },
+    },
+    {
+        "name": "comment merged",
+        "tool": "comment",
+        "args": {
+            "board": "Test",
+            "comment_type": "PUSH",
+            "content": "merged",
+            "index": 1,
+        },
+    },
+    {"name": "get_write_jobs", "tool": "get_write_jobs", "args": {}},
+    {"name": "del_post", "tool": "del_post", "args": {"board": "Test", "index": 1}},
+    {
+        "name": "mail",
+        "tool": "mail",
+        "args": {"ptt_id": "CodingMan", "title": "bench", "content": "bench"},
+    },
+    {"name": "del_mail", "tool": "del_mail", "args": {"index": 1}},
+    {"name": "sync_mailbox after del_mail", "tool": "sync_mailbox", "args": {}},
+    {
+        "name": "give_money",
+        "tool": "give_money",
+        "args": {"ptt_id": "CodingMan", "money": 10},
+    },
+    {
+        "name": "set_board_title",
+        "tool": "set_board_title",
+        "args": {"board": "Test", "new_title": "bench"},
+    },
+    {
+        "name": "bucket",
+        "tool": "bucket",
+        "args": {
+            "board": "Test",
+            "ptt_id": "CodingMan",
+            "bucket_days": 1,
+            "reason": "bench",
+        },
+    },
+    {"name": "change_pw", "tool": "change_pw", "args": {"new_password": "bench"}},
+    {
+        "name": "get_session_pool_status",
+        "tool": "get_session_pool_status",
+        "args": {},
+        "success": False,
+    },
+    {"name": "get_cache_stats", "tool": "get_cache_stats", "args": {}},
+    {"name": "compact_cache", "tool": "compact_cache", "args": {}},
+    {"name": "get_metrics", "tool": "get_metrics", "args": {}},
+    {"name": "get_metrics_prometheus", "tool": "get_metrics_prometheus", "args": {}},
+    {"name": "logout", "tool": "logout", "args": {}},
+]
+
+# 直接呼叫 _call_ptt_service 的次數，用來量測伺服器本身的額外負擔。
+OVERHEAD_CALLS = 2000
+
+
+def _start_server(args: argparse.Namespace, data_dir: str):
+    os.environ.update(
+        {
+            "PTT_ID": "bench",
+            "PTT_PW": "bench",
+            "PTT_DATA_DIR": data_dir,
+            "PTT_KEEPALIVE_INTERVAL": "0",
+            "PTT_LOGIN_MODE": "manual",
+            # 縮短推文間隔，讓排隊中的推文合併在 comment merged 情境中執行。
+            "PTT_WRITE_INTERVAL": "comment=0.5",
+            # 快取存放在 SQLite，快取命中的情境量到的是實際從磁碟讀取的時間。
+            "PTT_STORAGE": "sqlite",
+        }
+    )
+    sys.path.insert(0, SRC_DIR)
+
+    import PyPtt
+    from fake_ptt import FakeService
+
+    services: List[FakeService] = []
+
+    def create_service(_config) -> FakeService:
+        service = FakeService(
+            board_size=args.board_size,
+            posts_per_day=args.posts_per_day,
+            deleted_ratio=args.deleted_ratio,
+            hole_ratio=args.hole_ratio,
+            latency=args.latency,
+            seed=args.seed,
+        )
+        services.append(service)
+        return service
+
+    PyPtt.Service = create_service
+
+    import mcp_server
+
+    mcp_server.mcp.run = lambda *args, **kwargs: None  # type: ignore[method-assign]
+    mcp_server.main()
+    return mcp_server, services
+
+
+async def _run_scenarios(mcp_server, services) -> Dict[str, Dict[str, Any]]:
+    from fastmcp import Client
+
+    def round_trips() -> int:
+        return sum(service.round_trips for service in services)
+
+    results = {}
+    async with Client(mcp_server.mcp) as client:
+        tool_names = {tool.name for tool in await client.list_tools()}
+        uncovered = tool_names - {scenario["tool"] for scenario in SCENARIOS}
+        if uncovered:
+            raise SystemExit(
+                f"no benchmark scenario for tools: {', '.join(sorted(uncovered))}"
+            )
+
+        for scenario in SCENARIOS:
+            latency = services[0].latency if services else 0.0
+            for service in services:
+                service.latency = scenario.get("latency", latency)
+            before = round_trips()
+            start_time = time.perf_counter()
+            calls = [
+                client.call_tool(
+                    scenario["tool"], scenario["args"], raise_on_error=False
+                )
+                for _ in range(scenario.get("concurrency", 1))
+            ]
+            result = (await asyncio.gather(*calls))[0]
+            wall_seconds = time.perf_counter() - start_time
+            for service in services:
+                service.latency = latency
+
+            data = result.structured_content or {}
+            data = data.get("result", data) if "success" not in data else data
+            results[scenario["name"]] = {
+                "round_trips": round_trips() - before,
+                "wall_seconds": wall_seconds,
+                "ok": not result.is_error
+                and data.get("success", True) == scenario.get("success", True),
+                "code": data.get("code"),
+                # 回傳給客戶端的 JSON 大小，用來比較 fields、compact 等精簡選項的效果。
+                "response_bytes": sum(
+                    len(getattr(item, "text", "").encode()) for item in result.content
+                ),
+            }
+    return results
+
+
+def _measure_overhead() -> Dict[str, Any]:
+    """在沒有延遲的假連線上重複呼叫 _call_ptt_service，量測快取、統計等伺服器本身的負擔。"""
+    from cache import ResponseCache, _parse_ttl_config
+    from fake_ptt import FakeService
+    from metrics import Metrics
+    from utils import _call_ptt_service
+
+    ptt_service = FakeService()
+    ptt_service.logged_in = True
+    storage = {
+        "ptt_bot": ptt_service,
+        "metrics": Metrics(),
+        "response_cache": ResponseCache(1024, _parse_ttl_config(None)),
+    }
+    start_time = time.perf_counter()
+    for _ in range(OVERHEAD_CALLS):
+        response = _call_ptt_service(storage, "get_time")
+    wall_seconds = time.perf_counter() - start_time
+    return {
+        "round_trips": ptt_service.round_trips,
+        "wall_seconds": wall_seconds,
+        "ok": response["success"],
+        "code": None,
+        "response_bytes": 0,
+    }
+
+
+def _check_budgets(
+    results: Dict[str, Dict[str, Any]], budgets: Dict[str, Dict[str, float]]
+) -> List[str]:
+    failures = []
+    for name, result in results.items():
+        if not result["ok"]:
+            failures.append(f"{name}: unexpected result (code={result['code']})")
+        budget = budgets.get(name)
+        if budget is None:
+            failures.append(f"{name}: no budget, run with --update-budgets")
+            continue
+        if result["round_trips"] > budget["round_trips"]:
+            failures.append(
+                f"{name}: {result['round_trips']} round trips > budget {budget['round_trips']}"
+            )
+        if result["wall_seconds"] > budget["wall_seconds"]:
+            failures.append(
+                f"{name}: {result['wall_seconds']:.4f}s > budget {budget['wall_seconds']}s"
+            )
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="simulated seconds per PTT call"
+    )
+    parser.add_argument(
+        "--board-size",
+        type=int,
+        default=2_000_000,
+        help="number of posts per synthetic board",
+    )
+    parser.add_argument("--posts-per-day", type=float, default=3000)
+    parser.add_argument("--deleted-ratio", type=float, default=0.05)
+    parser.add_argument("--hole-ratio", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--budgets", default=DEFAULT_BUDGETS_PATH)
+    parser.add_argument(
+        "--update-budgets",
+        action="store_true",
+        help="write the measured values as the new budgets",
+    )
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        mcp_server, services = _start_server(args, data_dir)
+        results = asyncio.run(_run_scenarios(mcp_server, services))
+        results["_call_ptt_service overhead"] = _measure_overhead()
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        print(f"{'scenario':<40} {'round trips':>11} {'wall ms':>10} {'bytes':>9}")
+        for name, result in results.items():
+            print(
+                f"{name:<40} {result['round_trips']:>11} {result['wall_seconds'] * 1000:>10.2f} "
+                f"{result['response_bytes']:>9}"
+            )
+
+    if args.update_budgets:
+        # 來回次數不能變多；耗時跟機器有關，保留三倍的空間。
+        budgets = {
+            name: {
+                "round_trips": result["round_trips"],
+                "wall_seconds": round(
+                    max(result["wall_seconds"] * 3, 0.05)
+                    + args.latency * result["round_trips"],
+                    3,
+                ),
+            }
+            for name, result in results.items()
+        }
+        with open(args.budgets, "w", encoding="utf-8") as f:
+            json.dump(budgets, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"budgets written to {args.budgets}")
+        return
+
+    with open(args.budgets, encoding="utf-8") as f:
+        budgets = json.load(f)
+    failures = _check_budgets(results, budgets)
+    if args.latency:
+        # 預算是在沒有延遲的情況下產生的，有延遲時只比較來回次數。
+        failures = [failure for failure in failures if "s > budget" not in failure]
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,498 @@
+"""不需要 PTT 帳號的 PyPtt.Service 替身，給 benchmark 使用。
+
+看板的內容完全由 (看板名稱, seed, 參數) 決定，而且是即時計算的，所以可以模擬數百萬篇文章的看板，
+不需要先產生所有資料：
+
+* 每天的文章數在 posts_per_day 上下浮動，週末較多；一天之中深夜到清晨較少、晚上最多。
+* 一部分文章是已刪除的 (deleted_ratio)，另外還有整段連續被刪除的「洞」(hole_ratio)。
+* AID 與網址跟 PTT 一樣由發文時間戳記產生，可以從 AID 反查文章。
+
+搜尋 (search_list) 不會真的過濾文章，搜尋結果與整個看板相同。
+"""
+
+import bisect
+import calendar
+import datetime
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple, Type
+
+import PyPtt
+
+TAIPEI = datetime.timezone(datetime.timedelta(hours=8))
+
+AID_TABLE = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz-_"
+
+# 台灣時間每個小時的相對發文量。
+HOURLY_WEIGHTS = [
+    6,
+    4,
+    3,
+    2,
+    1,
+    1,
+    1,
+    2,
+    4,
+    6,
+    7,
+    8,
+    9,
+    8,
+    8,
+    8,
+    8,
+    8,
+    9,
+    10,
+    11,
+    12,
+    12,
+    10,
+]
+
+# 整段被刪除的「洞」以這個長度為單位。
+HOLE_SIZE = 64
+
+
+def _hash64(*values: int) -> int:
+    """splitmix64，讓每一篇文章的屬性都能不依賴其他文章、直接計算出來。"""
+    h = 0x9E3779B97F4A7C15
+    for value in values:
+        h = (h ^ (value & 0xFFFFFFFFFFFFFFFF)) * 0xBF58476D1CE4E5B9 & 0xFFFFFFFFFFFFFFFF
+        h = (h ^ (h >> 27)) * 0x94D049BB133111EB & 0xFFFFFFFFFFFFFFFF
+        h ^= h >> 31
+    return h
+
+
+def _hash01(*values: int) -> float:
+    return _hash64(*values) / 2.0**64
+
+
+def _text_seed(text: str) -> int:
+    return _hash64(*text.lower().encode())
+
+
+def aid_from_timestamp(timestamp: int, random_part: int) -> str:
+    value = (timestamp << 12) | random_part
+    chars = []
+    for _ in range(8):
+        chars.append(AID_TABLE[value % 64])
+        value //= 64
+    return "".join(reversed(chars))
+
+
+def timestamp_from_aid(aid: str) -> Tuple[int, int]:
+    value = 0
+    for char in aid:
+        value = value * 64 + AID_TABLE.index(char)
+    return value >> 12, value & 0xFFF
+
+
+def _ptt_error(exc_type: Type[Exception], message: str) -> Exception:
+    # PyPtt 的例外在建構時需要先初始化 i18n，這裡直接略過建構子。
+    exc = exc_type.__new__(exc_type)
+    setattr(exc, "message", message)
+    exc.args = (message,)
+    return exc
+
+
+class FakeBoard:
+    """一個即時計算內容的看板，編號 1 是最舊的文章，newest_index 是最新的文章。"""
+
+    def __init__(
+        self,
+        name: str,
+        size: int,
+        posts_per_day: float,
+        deleted_ratio: float,
+        hole_ratio: float,
+        seed: int,
+        end_time: datetime.datetime,
+    ):
+        self.name = name
+        self.size = size
+        self._initial_size = size
+        self.deleted_ratio = deleted_ratio
+        self.hole_ratio = hole_ratio
+        self.seed = seed ^ _text_seed(name)
+
+        hour_total = sum(HOURLY_WEIGHTS)
+        self._hour_cdf = [sum(HOURLY_WEIGHTS[:hour]) / hour_total for hour in range(25)]
+
+        # 從 end_time 那天往回產生每天的文章數，直到湊滿 size 篇。
+        end_day = end_time.astimezone(TAIPEI).date()
+        days: List[Tuple[datetime.date, int]] = []
+        total = 0
+        offset = 0
+        while total < size:
+            day = end_day - datetime.timedelta(days=offset)
+            weekend = 1.25 if day.weekday() >= 5 else 1.0
+            count = max(
+                1,
+                int(
+                    posts_per_day
+                    * weekend
+                    * (0.6 + 0.8 * _hash01(self.seed, day.toordinal()))
+                ),
+            )
+            days.append((day, count))
+            total += count
+            offset += 1
+        days.reverse()
+
+        # 最舊的那一天只保留最後幾篇，讓總數剛好等於 size。
+        self._first_day_skip = total - size
+        self._days = [day for day, _ in days]
+        self._day_counts = [count for _, count in days]
+        self._day_starts = []
+        start = 1 - self._first_day_skip
+        for count in self._day_counts:
+            self._day_starts.append(start)
+            start += count
+
+    def add_posts(self, count: int) -> None:
+        """模擬有人發了 count 篇新文章，每篇間隔 30 秒。"""
+        self.size += count
+
+    def timestamp(self, index: int) -> int:
+        if index > self._initial_size:
+            return (
+                self.timestamp(self._initial_size) + (index - self._initial_size) * 30
+            )
+
+        day_number = bisect.bisect_right(self._day_starts, index) - 1
+        day = self._days[day_number]
+        count = self._day_counts[day_number]
+        position = index - self._day_starts[day_number]
+
+        # 同一天之內依照每小時的發文量分配時間，編號越大時間越晚。
+        fraction = (position + _hash01(self.seed, index, 1)) / count
+        hour = bisect.bisect_right(self._hour_cdf, fraction) - 1
+        hour_fraction = (fraction - self._hour_cdf[hour]) / (
+            self._hour_cdf[hour + 1] - self._hour_cdf[hour]
+        )
+        seconds = int((hour + hour_fraction) * 3600)
+        day_start = calendar.timegm(day.timetuple()) - 8 * 3600
+        return day_start + min(seconds, 86399)
+
+    def random_part(self, index: int) -> int:
+        return _hash64(self.seed, index, 2) & 0xFFF
+
+    def post_status(self, index: int) -> str:
+        if _hash01(self.seed, index // HOLE_SIZE, 3) < self.hole_ratio:
+            return "DELETED_BY_MODERATOR"
+        if _hash01(self.seed, index, 4) < self.deleted_ratio:
+            return "DELETED_BY_AUTHOR"
+        return "EXISTS"
+
+    def comment_count(self, index: int) -> int:
+        return int(_hash01(self.seed, index, 5) ** 3 * 200)
+
+    def find_by_aid(self, aid: str) -> Optional[int]:
+        timestamp, random_part = timestamp_from_aid(aid)
+        low, high = 1, self.size + 1
+        while low < high:
+            middle = (low + high) // 2
+            if self.timestamp(middle) < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        index = low
+        while index <= self.size and self.timestamp(index) == timestamp:
+            if (
+                self.random_part(index) == random_part
+                and self.post_status(index) == "EXISTS"
+            ):
+                return index
+            index += 1
+        return None
+
+    def post(self, index: int, query: bool) -> Dict[str, Any]:
+        post_time = datetime.datetime.fromtimestamp(self.timestamp(index), TAIPEI)
+        list_date = f"{post_time.month}/{post_time.day:02d}".rjust(5)
+        status = self.post_status(index)
+        if status != "EXISTS":
+            author = (
+                "moderator"
+                if status == "DELETED_BY_MODERATOR"
+                else f"user{index % 997}"
+            )
+            return {
+                "board": self.name,
+                "aid": None,
+                "index": None,
+                "author": author,
+                "title": None,
+                "list_date": list_date,
+                "post_status": status,
+                "url": None,
+            }
+
+        timestamp = self.timestamp(index)
+        random_part = self.random_part(index)
+        comment_count = self.comment_count(index)
+        post: Dict[str, Any] = {
+            "board": self.name,
+            "aid": aid_from_timestamp(timestamp, random_part),
+            "index": index,
+            "author": f"user{index % 997} (nick)",
+            "title": f"[問卦] {self.name} 第 {index} 篇",
+            "list_date": list_date,
+            "url": f"https://www.ptt.cc/bbs/{self.name}/M.{timestamp}.A.{random_part:03X}.html",
+            "money": index % 10,
+            "post_status": status,
+            "push_number": str(min(comment_count, 99)) if comment_count else "",
+            "is_lock": False,
+            "is_unconfirmed": False,
+        }
+        if query:
+            return post
+
+        comment_time = post_time + datetime.timedelta(minutes=5)
+        post.update(
+            {
+                "date": post_time.strftime("%a %b %d %H:%M:%S %Y"),
+                "content": f"第 {index} 篇文章的內容\n" * 20,
+                "ip": f"1.2.{index % 256}.{(index // 256) % 256}",
+                "location": "Taiwan",
+                "has_control_code": False,
+                "pass_format_check": True,
+                "comments": [
+                    {
+                        "type": ("PUSH", "BOO", "ARROW")[k % 3],
+                        "author": f"commenter{(index + k) % 503}",
+                        "content": f"第 {k + 1} 則推文",
+                        "ip": None,
+                        "time": (comment_time + datetime.timedelta(minutes=k)).strftime(
+                            "%m/%d %H:%M"
+                        ),
+                    }
+                    for k in range(comment_count)
+                ],
+            }
+        )
+        return post
+
+
+class FakeService:
+    """模擬 PyPtt.Service.call，所有看板共用同一組參數，第一次使用時才建立。"""
+
+    def __init__(
+        self,
+        board_size: int = 2_000_000,
+        posts_per_day: float = 3000,
+        deleted_ratio: float = 0.05,
+        hole_ratio: float = 0.01,
+        latency: float = 0.0,
+        seed: int = 1,
+        end_time: Optional[datetime.datetime] = None,
+        board_sizes: Optional[Dict[str, int]] = None,
+        mailbox_size: int = 200,
+        board_list_size: int = 20_000,
+        fast_comment_seconds: float = 0.0,
+    ):
+        self.board_size = board_size
+        self.posts_per_day = posts_per_day
+        self.deleted_ratio = deleted_ratio
+        self.hole_ratio = hole_ratio
+        self.latency = latency
+        self.seed = seed
+        self.end_time = end_time or datetime.datetime(2026, 9, 30, 23, 0, tzinfo=TAIPEI)
+        self.board_sizes = {
+            name.lower(): size for name, size in (board_sizes or {}).items()
+        }
+        # 信箱中每封信的編號 (寄達順序)；刪信後後面的信件編號會往前移，和 PTT 一樣。
+        self.mail_ids = list(range(1, mailbox_size + 1))
+        self.board_list_size = board_list_size
+        # 兩次推文至少間隔的秒數，太快時和 PTT 一樣拋出 NoFastComment。
+        self.fast_comment_seconds = fast_comment_seconds
+        self.comments: List[Dict[str, Any]] = []
+        self._last_comment_time = 0.0
+        self.calls: Dict[str, int] = {}
+        self.logged_in = False
+        self._boards: Dict[str, FakeBoard] = {}
+        # 不在全站看板清單上的看板一律不存在，和 PTT 一樣。
+        self._board_names = {
+            board.lower() for board in self._call_get_all_boards()
+        } | set(self.board_sizes)
+        self._lock = threading.Lock()
+
+    def board(self, name: str) -> FakeBoard:
+        key = name.lower()
+        with self._lock:
+            if key not in self._boards:
+                if key not in self._board_names:
+                    raise _ptt_error(PyPtt.NoSuchBoard, f"no such board {name}")
+                self._boards[key] = FakeBoard(
+                    name,
+                    self.board_sizes.get(key, self.board_size),
+                    self.posts_per_day,
+                    self.deleted_ratio,
+                    self.hole_ratio,
+                    self.seed,
+                    self.end_time,
+                )
+            return self._boards[key]
+
+    @property
+    def round_trips(self) -> int:
+        return sum(self.calls.values())
+
+    def close(self) -> None:
+        self.logged_in = False
+
+    def call(self, api: str, args: Optional[Dict[str, Any]] = None) -> Any:
+        args = args or {}
+        with self._lock:
+            self.calls[api] = self.calls.get(api, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        if api == "login":
+            if args.get("ptt_pw") == "wrong":
+                raise _ptt_error(PyPtt.WrongIDorPassword, "wrong id or password")
+            self.logged_in = True
+            return None
+        if not self.logged_in:
+            raise _ptt_error(PyPtt.RequireLogin, "require login")
+        if api == "logout":
+            self.logged_in = False
+            return None
+
+        handler = getattr(self, f"_call_{api}", None)
+        if handler is None:
+            # 發文、推文、寄信等寫入操作只記錄次數。
+            return None
+        return handler(**args)
+
+    def _call_get_newest_index(
+        self, index_type: Any = None, board: Optional[str] = None, **_
+    ) -> int:
+        if board is None or "MAIL" in str(index_type):
+            return len(self.mail_ids)
+        return self.board(board or "").size
+
+    def _call_get_post(
+        self,
+        board: str,
+        aid: Optional[str] = None,
+        index: Optional[int] = None,
+        query: bool = False,
+        **_,
+    ) -> Dict[str, Any]:
+        fake_board = self.board(board)
+        if aid:
+            found = fake_board.find_by_aid(aid)
+            if found is None:
+                raise _ptt_error(PyPtt.NoSuchPost, f"no such post {board} {aid}")
+            index = found
+        if not index or not 1 <= index <= fake_board.size:
+            raise _ptt_error(PyPtt.NoSuchPost, f"no such post {board} {index}")
+        return fake_board.post(index, query)
+
+    def receive_mail(self, count: int) -> None:
+        """模擬收到 count 封新信。"""
+        next_id = max(self.mail_ids, default=0) + 1
+        self.mail_ids.extend(range(next_id, next_id + count))
+
+    def _call_get_mail(self, index: int, **_) -> Dict[str, Any]:
+        if not 1 <= index <= len(self.mail_ids):
+            raise _ptt_error(PyPtt.NoSuchMail, f"no such mail {index}")
+        mail_id = self.mail_ids[index - 1]
+        mail_time = self.end_time - datetime.timedelta(hours=(1000 - mail_id) * 7)
+        return {
+            "origin_mail": f"mail {mail_id}",
+            "author": f"sender{mail_id % 31} (nick)",
+            "title": f"信件 {mail_id}",
+            "date": mail_time.strftime("%a %b %d %H:%M:%S %Y"),
+            "content": f"第 {mail_id} 封信的內容\n" * 5,
+            "ip": "1.2.3.4",
+            "location": "Taiwan",
+            "is_red_envelope": mail_id % 50 == 0,
+        }
+
+    def _call_del_mail(self, index: int, **_) -> None:
+        if not 1 <= index <= len(self.mail_ids):
+            raise _ptt_error(PyPtt.NoSuchMail, f"no such mail {index}")
+        del self.mail_ids[index - 1]
+
+    def _call_comment(self, **args) -> None:
+        now = time.monotonic()
+        if now - self._last_comment_time < self.fast_comment_seconds:
+            raise _ptt_error(PyPtt.NoFastComment, "no fast comment")
+        self._last_comment_time = now
+        self.comments.append(args)
+
+    def _call_get_time(self, **_) -> str:
+        return datetime.datetime.now(TAIPEI).strftime("%H:%M")
+
+    def _call_get_user(self, user_id: str, **_) -> Dict[str, Any]:
+        if user_id.lower().startswith("nosuch"):
+            raise _ptt_error(PyPtt.NoSuchUser, f"no such user {user_id}")
+        seed = _text_seed(user_id)
+        return {
+            "ptt_id": f"{user_id} (nick)",
+            "money": f"{seed % 100000}",
+            "login_count": seed % 5000,
+            "account_verified": True,
+            "legal_post": seed % 3000,
+            "illegal_post": 0,
+            "activity": "看板列表",
+            "mail": "沒有新信件",
+            "last_login_date": "09/30/2026 22:00:00 Wed",
+            "last_login_ip": "1.2.3.4",
+            "five_chess": "0 勝 0 敗 0 和",
+            "chess": "0 勝 0 敗 0 和",
+            "signature_file": "",
+        }
+
+    def _call_search_user(self, ptt_id: str, **_) -> List[str]:
+        return [f"{ptt_id}{k}" for k in range(20)]
+
+    def _call_get_all_boards(self, **_) -> List[str]:
+        # 真實的全站看板約有兩萬個，其餘以編號產生。
+        boards = [
+            "Gossiping",
+            "C_Chat",
+            "Stock",
+            "Baseball",
+            "NBA",
+            "Lifeismoney",
+            "Tech_Job",
+            "Python",
+            "Test",
+        ]
+        return boards + [
+            f"Board{number:05d}"
+            for number in range(max(0, self.board_list_size - len(boards)))
+        ]
+
+    def _call_get_favourite_boards(self, **_) -> List[Dict[str, Any]]:
+        return [
+            {"board": board, "type": "看板", "title": f"{board} 板"}
+            for board in ("Python", "Test")
+        ]
+
+    def _call_get_board_info(
+        self, board: str, get_post_types: bool = False, **_
+    ) -> Dict[str, Any]:
+        fake_board = self.board(board)
+        info: Dict[str, Any] = {
+            "board": fake_board.name,
+            "online_user": _hash64(fake_board.seed) % 10000,
+            "mandarin_des": f"{fake_board.name} 板",
+            "moderators": ["moderator"],
+            "open_status": True,
+            "can_comment_post": True,
+            "can_boo_post": True,
+            "can_fast_push": False,
+            "min_interval_between_comments": 0,
+        }
+        if get_post_types:
+            info["post_kind_list"] = ["問卦", "新聞", "爆卦", "公告"]
+        return info
+
+    def _call_get_bottom_post_list(self, board: str, **_) -> List[Dict[str, Any]]:
+        fake_board = self.board(board)
+        return [fake_board.post(index, True) for index in range(1, 4)]
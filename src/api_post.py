@@ -1,10 +1,17 @@
-from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
-import PyPtt
-from fastmcp import FastMCP
+from fastmcp import FastMCP, Context
 
-from utils import _call_ptt_service
+from post_index import (
+    MAX_RANGE_DAYS,
+    _day_start_timestamp,
+    _find_post_index_range,
+    _find_post_index_ranges,
+    _parse_date_str,
+)
+from post_list import MAX_POSTS_PER_CALL, _get_posts, _crawl_posts
+from post_store import DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT
+from utils import _run_in_ptt_executor, _run_in_ptt_executor_shared
 
 
 def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
@@ -30,14 +37,14 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
         """
 
         return {
-            'success': False,
-            'message': '請遵循提示。',
-            'code': 'FOLLOW_PROMPT',
-            'prompt': prompt
+            "success": False,
+            "message": "請遵循提示。",
+            "code": "FOLLOW_PROMPT",
+            "prompt": prompt,
         }
 
     @mcp.tool()
-    def get_post_index_range(board: str, target_date_str: str) -> Dict[str, Any]:
+    async def get_post_index_range(board: str, target_date_str: str) -> Dict[str, Any]:
         """
         取得 PTT 文章在指定看板和日期下的索引範圍。
 
@@ -53,137 +60,313 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
                             失敗時: {'success': False, 'message': str}
         """
 
-        # Helper to parse and compare dates
-        def parse_date_str(date_str: str) -> datetime:
-            # Add a dummy year to make it a full date for comparison.
-            # Assuming all dates are within the current year for simplicity.
-            # For cross-year comparisons, more complex logic would be needed.
+        try:
+            target_date = _parse_date_str(target_date_str)
+        except ValueError:
+            return {
+                "success": False,
+                "message": f"Invalid target_date_str format: {target_date_str}. Expected 'YYYY/MM/DD'.",
+            }
+
+        return await _run_in_ptt_executor_shared(
+            memory_storage,
+            ("get_post_index_range", board.lower(), target_date),
+            _find_post_index_range,
+            memory_storage,
+            board,
+            target_date,
+        )
 
-            if date_str.count('/') == 2:
-                return datetime.strptime(date_str, "%Y/%m/%d")
+    @mcp.tool()
+    async def get_post_index_ranges(
+        board: str, start_date_str: str, end_date_str: str
+    ) -> Dict[str, Any]:
+        """
+        取得 PTT 文章在指定看板中，一段日期內每一天的索引範圍。
+
+        所有日期共用同一次搜尋，查詢一週比呼叫七次 get_post_index_range 快得多，也能正確處理跨年的日期。
+        最多一次查詢 366 天。
 
-            current_year = datetime.now().year
-            return datetime.strptime(f"{current_year}/{date_str}", "%Y/%m/%d")
+        註記：此函式必須先登入 PTT。
+
+        Args:
+            board (str): 看板名稱，例如 "Gossiping"。
+            start_date_str (str): 起始日期字串，格式為 "YYYY/MM/DD"，例如 "2024/12/28"。
+            end_date_str (str): 結束日期字串 (包含當天)，格式為 "YYYY/MM/DD"，例如 "2025/01/03"。
+
+        Returns:
+            Dict[str, Any]: 包含操作結果的字典。
+                            成功時: {'success': True, 'data': [
+                                {'date': '2024/12/28', 'start_index': int, 'end_index': int},
+                                {'date': '2024/12/29', 'start_index': None, 'end_index': None},  # 當天沒有文章
+                                ...
+                            ]}
+                            失敗時: {'success': False, 'message': str}
+        """
 
         try:
-            target_date = parse_date_str(target_date_str)
+            start_date = _parse_date_str(start_date_str)
+            end_date = _parse_date_str(end_date_str)
         except ValueError:
-            return {"success": False,
-                    "message": f"Invalid target_date_str format: {target_date_str}. Expected 'YYYY/MM/DD'."}
+            return {
+                "success": False,
+                "message": f"Invalid date format: {start_date_str} ~ {end_date_str}. Expected 'YYYY/MM/DD'.",
+            }
 
-        # 1. Get the newest index for the board
-        newest_index_response = _call_ptt_service(
+        if end_date < start_date or (end_date - start_date).days >= MAX_RANGE_DAYS:
+            return {
+                "success": False,
+                "message": f"Invalid date range: {start_date_str} ~ {end_date_str}. "
+                f"The range must cover 1 ~ {MAX_RANGE_DAYS} days.",
+            }
+
+        return await _run_in_ptt_executor(
             memory_storage,
-            "get_newest_index",
-            index_type=PyPtt.NewIndex.BOARD,
-            board=board,
+            _find_post_index_ranges,
+            memory_storage,
+            board,
+            start_date,
+            end_date,
         )
-        if not newest_index_response.get('success'):
-            return {"success": False,
-                    "message": f"Failed to get newest index for board {board}: {newest_index_response.get('message')}"}
-        max_index = newest_index_response.get('data')
-
-        if max_index is None or max_index < 1:
-            return {"success": False, "message": f"No posts found for board {board}."}
-
-        # Binary search for start_index
-        start_index = -1
-        low, high = 1, max_index
-        while low <= high:
-            mid = (low + high) // 2
-            post_response = _call_ptt_service(
-                memory_storage,
-                "get_post",
-                board=board,
-                index=mid,
-                query=True,
-            )
 
-            if not post_response.get('success') or not post_response.get('data') or not post_response['data'].get(
-                    'list_date'):
-                # If post not found or date missing, try to narrow down the search
-                # This might happen for deleted posts or invalid indices.
-                # For simplicity, we'll assume it's an invalid index and try higher.
-                low = mid + 1
-                continue
-
-            post_date_str = post_response['data']['list_date']
-            try:
-                post_date = parse_date_str(post_date_str)
-            except ValueError:
-                # If post date is malformed, skip and try higher
-                low = mid + 1
-                continue
-
-            if post_date < target_date:
-                low = mid + 1
-            elif post_date == target_date:
-                start_index = mid
-                high = mid - 1  # Try to find an earlier one
-            else:  # post_date > target_date
-                high = mid - 1
-
-        # Binary search for end_index
-        end_index = -1
-        low, high = 1, max_index  # Reset search range
-        while low <= high:
-            mid = (low + high) // 2
-            post_response = _call_ptt_service(
-                memory_storage,
-                "get_post",
-                board=board,
-                index=mid,
-                query=True,
-            )
+    @mcp.tool()
+    async def get_posts(
+        board: str,
+        start_index: int,
+        end_index: int,
+        query: bool = False,
+        fields: Optional[List[str]] = None,
+        limit: int = 100,
+        cursor: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """一次取得看板中一段編號範圍內的多篇文章，已刪除的文章會自動略過。
+
+        適合搭配 get_post_index_range 使用：先取得某天的編號範圍，再用此函式一次取回整段文章，
+        不需要逐篇呼叫 get_post。
+
+        註記：此函式必須先登入 PTT。
+
+        Args:
+            board (str): 看板名稱。
+            start_index (int): 起始文章編號 (包含)，從 1 開始。
+            end_index (int): 結束文章編號 (包含)。
+            query (bool): 是否為查詢模式。查詢模式不包含文章內容與推文，但速度快很多。預設為 False。
+            fields (List[str], optional): 只回傳指定的欄位，例如 ["aid", "title", "author", "push_number"]。
+                                          預設回傳全部欄位。
+            limit (int): 這次最多回傳幾篇文章，上限為 500。預設為 100。
+            cursor (int, optional): 上一次呼叫回傳的 next_cursor，用來接續取得下一批文章。
+
+        Returns:
+            Dict[str, Any]: 一個包含文章列表的字典。
+                            成功時: {'success': True, 'data': [文章, ...], 'skipped': 略過的已刪除文章數,
+                                     'next_cursor': 下一批的起始編號，已經取完時為 None}
+                            失敗時: {'success': False, 'message': '...', 'code': '...',
+                                     'data': 失敗前已取得的文章, 'next_cursor': 可以重試的編號}
+        """
+        return await _run_in_ptt_executor(
+            memory_storage,
+            _get_posts,
+            memory_storage,
+            board,
+            start_index,
+            end_index,
+            query,
+            fields,
+            limit,
+            cursor,
+        )
+
+    @mcp.tool()
+    async def crawl_posts(
+        board: str,
+        start_index: int,
+        end_index: int,
+        ctx: Context,
+        query: bool = False,
+        fields: Optional[List[str]] = None,
+        page_size: int = 20,
+        cursor: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """逐篇爬取看板中一段編號範圍內的文章，並透過 MCP 進度通知即時回報每一篇的結果。
+
+        與 get_posts 不同，此函式每次只回傳一頁 (page_size 篇) 文章，並附上 next_cursor；
+        大範圍爬取時請重複以 next_cursor 呼叫，直到 next_cursor 為 None。
+        每取得一篇文章都會送出一次進度通知，客戶端可以在第一頁完成前就看到進度與標題。
+
+        註記：此函式必須先登入 PTT。
+
+        Args:
+            board (str): 看板名稱。
+            start_index (int): 起始文章編號 (包含)，從 1 開始。
+            end_index (int): 結束文章編號 (包含)。
+            query (bool): 是否為查詢模式。查詢模式不包含文章內容與推文，但速度快很多。預設為 False。
+            fields (List[str], optional): 只回傳指定的欄位，例如 ["aid", "title", "content"]。預設回傳全部欄位。
+            page_size (int): 每一頁最多回傳幾篇文章，上限為 500。預設為 20。
+            cursor (int, optional): 上一頁回傳的 next_cursor，用來接續爬取。
+
+        Returns:
+            Dict[str, Any]: 一個包含這一頁文章的字典。
+                            成功時: {'success': True, 'data': [文章, ...], 'skipped': 略過的已刪除文章數,
+                                     'next_cursor': 下一頁的起始編號，已經爬完時為 None}
+                            失敗時: {'success': False, 'message': '...', 'code': '...',
+                                     'data': 失敗前已取得的文章, 'next_cursor': 可以重試的編號}
+        """
+        return await _crawl_posts(
+            memory_storage,
+            ctx,
+            board,
+            start_index,
+            end_index,
+            query,
+            fields,
+            page_size,
+            cursor,
+        )
+
+    @mcp.tool()
+    async def watch_board(board: str, query: bool = True) -> Dict[str, Any]:
+        """開始追蹤看板的新文章，之後用 get_new_posts 取得。
+
+        伺服器會在背景以 get_newest_index 定期檢查看板 (有新文章時檢查得比較頻繁)，
+        只取得上次檢查之後的新文章並暫存起來，取代反覆呼叫 get_newest_index 與 get_post 的輪詢。
+        超過一小時沒有呼叫 get_new_posts 的看板會自動停止追蹤。
+
+        註記：此函式必須先登入 PTT。
+
+        Args:
+            board (str): 看板名稱。
+            query (bool): 是否只取得文章資訊 (標題、作者、AID 等)，不含內文與推文。預設為 True。
 
-            if not post_response.get('success') or not post_response.get('data') or not post_response['data'].get(
-                    'list_date'):
-                low = mid + 1
-                continue
-
-            post_date_str = post_response['data']['list_date']
-            try:
-                post_date = parse_date_str(post_date_str)
-            except ValueError:
-                low = mid + 1
-                continue
-
-            if post_date > target_date:
-                high = mid - 1
-            elif post_date == target_date:
-                end_index = mid
-                low = mid + 1  # Try to find a later one
-            else:  # post_date < target_date
-                low = mid + 1
-
-        if start_index == -1 or end_index == -1 or start_index > end_index:
-            return {"success": False, "message": f"在 {board} 板找不到日期 {target_date} 的任何文章。"}
-        else:
-            # Final verification (as suggested in the prompt)
-            # Verify start_index
-            start_post_response = _call_ptt_service(
-                memory_storage,
-                "get_post",
-                board=board,
-                index=start_index,
-                query=True,
+        Returns:
+            Dict[str, Any]: 包含操作結果的字典。
+                            成功時: {'success': True, 'cursor': 目前最新的文章編號，作為第一次 get_new_posts 的 since_cursor}
+                            失敗時: {'success': False, 'message': str, 'code': str}
+        """
+        board_watcher = memory_storage["board_watcher"]
+        return await _run_in_ptt_executor(
+            memory_storage, board_watcher.watch, board, query
+        )
+
+    @mcp.tool()
+    def unwatch_board(board: str) -> Dict[str, Any]:
+        """停止追蹤看板的新文章，並丟掉尚未取得的暫存文章。
+
+        Args:
+            board (str): 看板名稱。
+
+        Returns:
+            Dict[str, Any]: 包含操作結果的字典。
+                            成功時: {'success': True, 'message': str}
+                            失敗時: {'success': False, 'message': str, 'code': 'BOARD_NOT_WATCHED'}
+        """
+        if not memory_storage["board_watcher"].unwatch(board):
+            return {
+                "success": False,
+                "message": f"沒有在追蹤 {board} 板。",
+                "code": "BOARD_NOT_WATCHED",
+            }
+        return {"success": True, "message": f"已停止追蹤 {board} 板。"}
+
+    @mcp.tool()
+    async def get_new_posts(
+        board: str, since_cursor: Optional[int] = None, limit: int = 100
+    ) -> Dict[str, Any]:
+        """取得追蹤中的看板在 since_cursor 之後的新文章，直接從暫存回傳，不需要等待 PTT。
+
+        看板還沒有追蹤時會先開始追蹤 (同 watch_board)，這次回傳空的列表與目前的游標。
+        請保存每次回傳的 next_cursor，下一次呼叫時作為 since_cursor 傳入。
+
+        Args:
+            board (str): 看板名稱。
+            since_cursor (int, optional): 上一次回傳的 next_cursor。未提供時回傳所有暫存的文章。
+            limit (int): 這次最多回傳幾篇文章，上限為 500。預設為 100。
+
+        Returns:
+            Dict[str, Any]: 包含操作結果的字典。
+                            成功時: {'success': True, 'data': [文章, ...], 'next_cursor': int,
+                                     'has_more': 是否還有暫存的文章沒有回傳,
+                                     'missed': since_cursor 之後是否有文章因為暫存已滿被丟掉 (可用 get_posts 補回),
+                                     'poll_interval_seconds': 目前的輪詢間隔, 'last_error': 最近一次輪詢的錯誤或 None}
+                            失敗時: {'success': False, 'message': str, 'code': str}
+        """
+        board_watcher = memory_storage["board_watcher"]
+        limit = max(1, min(limit, MAX_POSTS_PER_CALL))
+        response = board_watcher.get_new_posts(board, since_cursor, limit)
+        if response is not None:
+            return response
+
+        watch_response = await _run_in_ptt_executor(
+            memory_storage, board_watcher.watch, board
+        )
+        if not watch_response.get("success"):
+            return watch_response
+        return board_watcher.get_new_posts(board, since_cursor, limit)
+
+    @mcp.tool()
+    def search_local_posts(
+        keywords: Optional[List[str]] = None,
+        any_keyword: bool = False,
+        author: Optional[str] = None,
+        board: Optional[str] = None,
+        start_date_str: Optional[str] = None,
+        end_date_str: Optional[str] = None,
+        limit: int = DEFAULT_SEARCH_LIMIT,
+    ) -> Dict[str, Any]:
+        """在本地文章庫中搜尋文章，毫秒內完成，不需要連線到 PTT。
+
+        本地文章庫只包含伺服器曾經完整取得過的文章 (get_post、get_posts、crawl_posts 在非查詢模式下取得的文章)，
+        所以只適合搜尋已經爬取過的範圍；要搜尋整個看板請改用 get_newest_index 與 get_post 的 search_list。
+        與 PTT 的搜尋不同，關鍵字會同時比對標題、內文與推文，也可以用 any_keyword 做「或」的查詢。
+
+        Args:
+            keywords (List[str], optional): 關鍵字，例如 ["颱風", "停班"]。預設需要全部符合。
+            any_keyword (bool): 為 True 時只要符合任一個關鍵字即可。預設為 False。
+            author (str, optional): 作者帳號，不分大小寫，例如 "CodingMan"。
+            board (str, optional): 只搜尋這個看板。
+            start_date_str (str, optional): 發文日期的起始日期，格式為 "YYYY/MM/DD"。
+            end_date_str (str, optional): 發文日期的結束日期 (包含當天)，格式為 "YYYY/MM/DD"。
+            limit (int): 最多回傳幾篇文章，上限為 200。預設為 20。
+
+        Returns:
+            Dict[str, Any]: 包含操作結果的字典，文章依發文時間由新到舊排列。
+                            成功時: {'success': True, 'data': [{'board', 'aid', 'index', 'title', 'author',
+                                                               'date', 'url', 'push_number'}, ...]}
+                            失敗時: {'success': False, 'message': str, 'code': str}
+                            完整的文章內容請再以 aid 呼叫 get_post，會直接從本地文章庫回傳。
+        """
+        post_store = memory_storage.get("post_store")
+        if post_store is None or not post_store.search_enabled:
+            return {
+                "success": False,
+                "message": "本地文章庫的全文檢索未啟用 (SQLite 不支援 FTS5)。",
+                "code": "SEARCH_DISABLED",
+            }
+
+        try:
+            start_time = (
+                _day_start_timestamp(_parse_date_str(start_date_str))
+                if start_date_str
+                else None
             )
-            if not start_post_response.get('success') or not start_post_response.get('data') or parse_date_str(
-                    start_post_response['data'].get('list_date', '')) != target_date:
-                return {"success": False,
-                        "message": f"在 {board} 板找不到日期 {target_date} 的任何文章 (start_index verification failed)."}
-
-            # Verify end_index
-            end_post_response = _call_ptt_service(
-                memory_storage,
-                "get_post",
-                board=board,
-                index=end_index,
-                query=True,
+            end_time = (
+                _day_start_timestamp(_parse_date_str(end_date_str)) + 86399
+                if end_date_str
+                else None
             )
-            if not end_post_response.get('success') or not end_post_response.get('data') or parse_date_str(
-                    end_post_response['data'].get('list_date', '')) != target_date:
-                return {"success": False,
-                        "message": f"在 {board} 板找不到日期 {target_date} 的任何文章 (end_index verification failed)."}
+        except ValueError:
+            return {
+                "success": False,
+                "message": f"Invalid date format: {start_date_str} ~ {end_date_str}. Expected 'YYYY/MM/DD'.",
+                "code": "INVALID_DATE",
+            }
 
-            return {"success": True, "start_index": start_index, "end_index": end_index}
+        data = post_store.search(
+            keywords=keywords,
+            any_keyword=any_keyword,
+            author=author,
+            board=board,
+            start_time=start_time,
+            end_time=end_time,
+            limit=max(1, min(limit, MAX_SEARCH_LIMIT)),
+        )
+        return {"success": True, "data": data}
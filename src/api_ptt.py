@@ -1,9 +1,20 @@
 from typing import Dict, Any, Optional, List, Tuple
 
-import PyPtt
 from fastmcp import FastMCP
 
-from utils import _call_ptt_service, _handle_ptt_exception
+from cache import _make_key
+from mail_store import DEFAULT_MAIL_SEARCH_LIMIT, DEFAULT_SYNC_MAX_FETCH, _sync_mailbox
+from post_store import _get_new_comments, _get_post
+from post_url import MAX_REFS_PER_CALL, _aid_from_url, _parse_post_ref, _url_from_aid
+from projection import _project, _shape_response
+from user_lookup import _get_users
+from utils import (
+    _call_ptt_service_async,
+    _login_all,
+    _run_in_ptt_executor,
+    _run_in_ptt_executor_shared,
+)
+from write_queue import _queue_write
 
 
 def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
@@ -19,7 +30,7 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
         return {"success": True, "version": version}
 
     @mcp.tool()
-    def logout() -> Dict[str, Any]:
+    async def logout() -> Dict[str, Any]:
         """Logs out from the PTT service.
 
         This function terminates the current PTT session if one is active.
@@ -34,20 +45,32 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
         if ptt_service is None:
             return {"success": False, "message": "尚未登入，無需登出"}
 
-        result = _call_ptt_service(memory_storage, "logout", success_message="登出成功")
+        result = await _call_ptt_service_async(
+            memory_storage, "logout", success_message="登出成功"
+        )
         memory_storage["ptt_bot"] = None
+        # 使用者主動登出後，不再自動登入，直到再次呼叫 login。
+        memory_storage["logged_out"] = True
+
+        session_pool = memory_storage.get("session_pool")
+        if session_pool is not None:
+            await _run_in_ptt_executor(memory_storage, session_pool.logout_secondary)
         return result
 
     @mcp.tool()
-    def login() -> Dict[str, Any]:
+    async def login() -> Dict[str, Any]:
         """Logs into the PTT service using credentials from environment variables.
 
         This function initializes a connection to PTT and attempts to log in.
         The login status is maintained on the server for subsequent calls.
+        If the session drops later, read-only calls re-login automatically, so calling login again is rarely needed.
+        Login attempts are rate limited to avoid tripping PTT's anti-abuse checks.
+        If PTT_ACCOUNTS is configured, the additional accounts in the session pool are logged in as well.
 
         Returns:
             Dict[str, Any]: A dictionary containing the result of the login attempt.
                             On success: {'success': True, 'message': '登入成功'}
+                                        (with session pool: 'sessions': [{'ptt_id': str, 'success': bool}, ...])
                             On failure: {'success': False, 'message': '...', 'code': '...'}
                             Possible error codes for 'code' field:
                             - 'NOT_LOGGED_IN': 尚未登入，請先執行 login。
@@ -66,44 +89,30 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
                             - 'SET_CONTACT_MAIL_FIRST': 需要先設定聯絡信箱。
                             - 'WRONG_PASSWORD': 密碼錯誤。
                             - 'NEED_MODERATOR_PERMISSION': 需要看板管理員權限。
+                            - 'CONNECTION_CLOSED': 與 PTT 的連線已中斷。
+                            - 'CONNECT_ERROR': 無法連線到 PTT。
+                            - 'LOGIN_TOO_OFTEN': 登入太頻繁 (PTT 端)。
+                            - 'LOGIN_RATE_LIMITED': 登入太頻繁，請稍後再試 (伺服器端限制)。
                             - 'UNKNOWN_ERROR': 操作時發生未知錯誤。
         """
-        # 如果已經有一個 bot 實例，先登出舊的
-        if memory_storage["ptt_bot"] is not None:
-            try:
-                memory_storage["ptt_bot"].call("logout")
-                memory_storage["ptt_bot"] = None  # 清除 session
-            except Exception:
-                pass
-
-        ptt_service = PyPtt.Service({})
-        try:
-            ptt_service.call(
-                "login",
-                {
-                    "ptt_id": memory_storage["ptt_id"],
-                    "ptt_pw": memory_storage["ptt_pw"],
-                    "kick_other_session": True,
-                },
-            )
-            # 登入成功後，將 bot 實例存起來
-            memory_storage["ptt_bot"] = ptt_service
-
-            return {"success": True, "message": "登入成功"}
-        except Exception as e:
-            memory_storage["ptt_bot"] = None
-            return _handle_ptt_exception(e, {})
+        # 連線與登入很慢，放到 PTT 專用執行緒執行，避免卡住其他工具。
+        return await _run_in_ptt_executor(memory_storage, _login_all, memory_storage)
 
     @mcp.tool()
-    def get_post(
+    async def get_post(
         board: str,
         aid: Optional[str] = None,
         index: Optional[int] = None,
         query: bool = False,
         search_list: Optional[List[Tuple[str, str]]] = None,
+        refresh_comments: bool = False,
+        fields: Optional[List[str]] = None,
+        compact: bool = False,
     ) -> Dict[str, Any]:
         """從 PTT 取得指定文章。
 
+        已經超過編輯期限的文章會存放在本地文章庫，之後再次讀取時會直接回傳本地資料 (回應中 'cached' 為 True)。
+
         註記：此函式必須先登入 PTT。
 
         Args:
@@ -118,6 +127,10 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
                                                             [("COMMENT", "100")], [("COMMENT", "M")], [("MONEY", "5")]。
             query (bool): 是否為查詢模式。如果是需要文章代碼(AID)、文章網址、文章值多少 Ptt 幣、文章編號(index)，就可以使用查詢模式，速度會快很多。
                           此模式不會包含文章內容。
+            refresh_comments (bool): 文章已在本地文章庫時，是否重新向 PTT 取得最新的推文。預設為 False。
+            fields (List[str], optional): 只回傳指定的欄位，例如 ["title", "author", "push_number"]。預設回傳全部欄位。
+            compact (bool): 精簡模式：內文只保留前 300 字 (附上 content_length)，推文只保留最後 5 則並附上
+                            comment_summary (各類推文的數量)，並移除 full_content、ip 等欄位。預設為 False。
 
         Returns:
             Dict[str, Any]: 一個包含文章資料的字典，或是在失敗時回傳錯誤訊息。
@@ -134,18 +147,66 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
                             }}
                             失敗時: {'success': False, 'message': '...', 'code': '...'}
         """
-        return _call_ptt_service(
-            memory_storage,
+        # 同時有多個相同的請求 (例如多個客戶端讀同一篇熱門文章) 時只讀取一次。
+        request_key = _make_key(
             "get_post",
-            board=board,
-            aid=aid,
-            index=index,
-            query=query,
-            search_list=search_list,
+            {
+                "board": board,
+                "aid": aid,
+                "index": index,
+                "query": query,
+                "search_list": search_list,
+                "refresh_comments": refresh_comments,
+            },
+        )
+        response = await _run_in_ptt_executor_shared(
+            memory_storage,
+            request_key,
+            _get_post,
+            memory_storage,
+            board,
+            aid,
+            index,
+            query,
+            search_list,
+            refresh_comments,
+        )
+        return _shape_response(response, fields, compact)
+
+    @mcp.tool()
+    async def get_new_comments(
+        board: str, aid: str, known_comment_count: int = 0
+    ) -> Dict[str, Any]:
+        """只取得文章在 known_comment_count 則之後新增的推文，適合持續追蹤熱門文章的推文。
+
+        每次呼叫時把上一次回傳的 comment_count 傳入 known_comment_count，就只會收到新的推文，
+        不需要像 get_post 一樣每次都取得整篇文章與所有推文。
+
+        註記：此函式必須先登入 PTT。
+
+        Args:
+            board (str): 文章所在的看板名稱。
+            aid (str): 文章的 ID (AID)。
+            known_comment_count (int): 已經取得的推文數。預設為 0，也就是回傳全部推文。
+
+        Returns:
+            Dict[str, Any]: 包含操作結果的字典。
+                            成功時: {'success': True, 'data': [新的推文, ...], 'comment_count': 目前的推文總數,
+                                     'reset': 推文數比 known_comment_count 少時為 True，此時 data 是全部推文}
+                            失敗時: {'success': False, 'message': str, 'code': str}
+                            文章已被刪除時 code 為 'POST_DELETED'。
+        """
+        return await _run_in_ptt_executor(
+            memory_storage,
+            _get_new_comments,
+            memory_storage,
+            board,
+            aid,
+            known_comment_count,
         )
 
     @mcp.tool()
-    def get_newest_index(
+    async def get_newest_index(
         index_type: str,
         board: Optional[str] = None,
         search_list: Optional[List[Tuple[str, str]]] = None,
@@ -179,7 +240,7 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
                             成功: {'success': True, 'newest_index': 最新編號}
                             失敗: {'success': False, 'message': '...', 'code': '...'}
         """
-        return _call_ptt_service(
+        return await _call_ptt_service_async(
             memory_storage,
             "get_newest_index",
             index_type=index_type,
@@ -188,8 +249,13 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
         )
 
     @mcp.tool()
-    def post(
-        board: str, title_index: int, title: str, content: str, sign_file: str = "0"
+    async def post(
+        board: str,
+        title_index: int,
+        title: str,
+        content: str,
+        sign_file: str = "0",
+        wait: bool = True,
     ) -> Dict[str, Any]:
         """到看板發佈文章。
 
@@ -205,15 +271,19 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
             content (str): 文章內容。
             sign_file (str | int, optional): 簽名檔編號或隨機簽名檔 (x)。預設為 "0" (不選用簽名檔)。
                                             可用的值為 "0" 到 "9" 的數字字串，或 "x"。
+            wait (bool): 是否等待寫入完成。預設為 True；設為 False 時排入寫入佇列後立刻回傳 job_id，
+                         之後用 get_write_jobs 查詢結果。
 
         Returns:
             Dict[str, Any]: 一個包含操作結果的字典。
-                            成功: {'success': True, 'message': '發文成功'}
+                            成功: {'success': True, 'message': '發文成功', 'job_id': '工作ID', 'merged_with': []}
+                            wait 為 False 時: {'success': True, 'message': '已排入寫入佇列', 'job_id': '工作ID', 'status': 'queued'}
                             失敗: {'success': False, 'message': '...', 'code': '...'}
         """
-        return _call_ptt_service(
+        return await _queue_write(
             memory_storage,
             "post",
+            wait,
             board=board,
             title_index=title_index,
             title=title,
@@ -223,13 +293,14 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
         )
 
     @mcp.tool()
-    def reply_post(
+    async def reply_post(
         board: str,
         reply_to: str,
         content: str,
         aid: Optional[str] = None,
         index: int = 0,
         sign_file: str = "0",
+        wait: bool = True,
     ) -> Dict[str, Any]:
         """到看板回覆文章。
 
@@ -246,15 +317,19 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
                                             可用的值為 "0" 到 "9" 的數字字串，或 "x"。
             aid (str, optional): 文章的 ID (AID)。與 `index` 擇一使用。
             index (int, optional): 文章的索引，從 1 開始。與 `aid` 擇一使用。
+            wait (bool): 是否等待寫入完成。預設為 True；設為 False 時排入寫入佇列後立刻回傳 job_id，
+                         之後用 get_write_jobs 查詢結果。
 
         Returns:
             Dict[str, Any]: 一個包含操作結果的字典。
-                            成功: {'success': True, 'message': '回覆成功'}
+                            成功: {'success': True, 'message': '回覆成功', 'job_id': '工作ID', 'merged_with': []}
+                            wait 為 False 時: {'success': True, 'message': '已排入寫入佇列', 'job_id': '工作ID', 'status': 'queued'}
                             失敗: {'success': False, 'message': '...', 'code': '...'}
         """
-        return _call_ptt_service(
+        return await _queue_write(
             memory_storage,
             "reply_post",
+            wait,
             board=board,
             reply_to=reply_to,
             content=content,
@@ -265,7 +340,7 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
         )
 
     @mcp.tool()
-    def del_post(
+    async def del_post(
         board: str, aid: Optional[str] = None, index: int = 0
     ) -> Dict[str, Any]:
         """刪除文章。
@@ -285,7 +360,7 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
                             成功: {'success': True, 'message': '刪除成功'}
                             失敗: {'success': False, 'message': '...', 'code': '...'}
         """
-        return _call_ptt_service(
+        return await _call_ptt_service_async(
             memory_storage,
             "del_post",
             board=board,
@@ -295,12 +370,13 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
         )
 
     @mcp.tool()
-    def comment(
+    async def comment(
         board: str,
         comment_type: str,
         content: str,
         aid: Optional[str] = None,
         index: int = 0,
+        wait: bool = True,
     ) -> Dict[str, Any]:
         """對文章進行推文、噓文或箭頭。
 
@@ -312,18 +388,23 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
         Args:
             board (str): 文章所在的看板名稱。
             comment_type (str): 推文類型，可為 "PUSH" (推)、"BOO" (噓) 或 "ARROW" (箭頭)。
-            content (str): 推文內容。
+            content (str): 推文內容。推文太快時會自動等待後重試；排隊中對同一篇文章、同一種類的推文，
+                           合併後仍在一行以內時會合併成一則送出。
             aid (str, optional): 文章的 ID (AID)。與 `index` 擇一使用。
             index (int, optional): 文章的索引，從 1 開始。與 `aid` 擇一使用。
+            wait (bool): 是否等待寫入完成。預設為 True；設為 False 時排入寫入佇列後立刻回傳 job_id，
+                         之後用 get_write_jobs 查詢結果。
 
         Returns:
             Dict[str, Any]: 一個包含操作結果的字典。
-                            成功: {'success': True, 'message': '推文成功'}
+                            成功: {'success': True, 'message': '推文成功', 'job_id': '工作ID', 'merged_with': []}
+                            wait 為 False 時: {'success': True, 'message': '已排入寫入佇列', 'job_id': '工作ID', 'status': 'queued'}
                             失敗: {'success': False, 'message': '...', 'code': '...'}
         """
-        return _call_ptt_service(
+        return await _queue_write(
             memory_storage,
             "comment",
+            wait,
             board=board,
             comment_type=comment_type,
             content=content,
@@ -333,8 +414,13 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
         )
 
     @mcp.tool()
-    def mail(
-        ptt_id: str, title: str, content: str, sign_file: str = "0", backup: bool = True
+    async def mail(
+        ptt_id: str,
+        title: str,
+        content: str,
+        sign_file: str = "0",
+        backup: bool = True,
+        wait: bool = True,
     ) -> Dict[str, Any]:
         """寄送站內信。
 
@@ -350,15 +436,19 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
             sign_file (str | int, optional): 簽名檔編號或隨機簽名檔 (x)。預設為 "0" (不選用簽名檔)。
                                             可用的值為 "0" 到 "9" 的數字字串，或 "x"。
             backup (bool, optional): 是否備份信件。預設為 True。
+            wait (bool): 是否等待寫入完成。預設為 True；設為 False 時排入寫入佇列後立刻回傳 job_id，
+                         之後用 get_write_jobs 查詢結果。
 
         Returns:
             Dict[str, Any]: 一個包含操作結果的字典。
-                            成功: {'success': True, 'message': '寄信成功'}
+                            成功: {'success': True, 'message': '寄信成功', 'job_id': '工作ID', 'merged_with': []}
+                            wait 為 False 時: {'success': True, 'message': '已排入寫入佇列', 'job_id': '工作ID', 'status': 'queued'}
                             失敗: {'success': False, 'message': '...', 'code': '...'}
         """
-        return _call_ptt_service(
+        return await _queue_write(
             memory_storage,
             "mail",
+            wait,
             ptt_id=ptt_id,
             title=title,
             content=content,
@@ -368,11 +458,13 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
         )
 
     @mcp.tool()
-    def get_mail(
+    async def get_mail(
         index: int,
         search_type: Optional[str] = None,
         search_condition: Optional[str] = None,
         search_list: Optional[List[List[str]]] = None,
+        fields: Optional[List[str]] = None,
+        compact: bool = False,
     ) -> Dict[str, Any]:
         """取得信件。
 
@@ -386,6 +478,9 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
             search_list (List[Tuple[str, str]], optional): 搜尋清單。每個元組包含搜尋類型和搜尋條件。
                                                             搜尋類型可為 "KEYWORD" (關鍵字) 或 "AUTHOR" (作者)。
                                                             範例: [("KEYWORD", "PyPtt")], [("AUTHOR", "CodingMan")]。
+            fields (List[str], optional): 只回傳指定的欄位，例如 ["author", "title", "date"]。預設回傳全部欄位。
+            compact (bool): 精簡模式：內文只保留前 300 字 (附上 content_length)，並移除 origin_mail、ip 等欄位。
+                            預設為 False。
 
         Returns:
             Dict[str, Any]: 一個包含信件資料的字典，或是在失敗時回傳錯誤訊息。
@@ -402,7 +497,7 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
                             }}
                             失敗: {'success': False, 'message': '...', 'code': '...'}
         """
-        return _call_ptt_service(
+        response = await _call_ptt_service_async(
             memory_storage,
             "get_mail",
             index=index,
@@ -410,9 +505,10 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
             search_condition=search_condition,
             search_list=search_list,
         )
+        return _shape_response(response, fields, compact)
 
     @mcp.tool()
-    def del_mail(index: int) -> Dict[str, Any]:
+    async def del_mail(index: int) -> Dict[str, Any]:
         """刪除信件。
 
         重要！務必遵守！執行前務必顯示內容並與使用者確認後才可以執行。
@@ -428,12 +524,91 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
                             成功: {'success': True, 'message': '刪除成功'}
                             失敗: {'success': False, 'message': '...', 'code': '...'}
         """
-        return _call_ptt_service(
+        response = await _call_ptt_service_async(
             memory_storage, "del_mail", index=index, success_message="刪除成功"
         )
+        if response.get("success"):
+            # 刪信後後面的信件編號都會往前移，同步更新本地的信件庫。
+            memory_storage["mail_store"].remove_index(
+                memory_storage.get("ptt_id") or "", index
+            )
+        return response
 
     @mcp.tool()
-    def give_money(
+    async def sync_mailbox(max_fetch: int = DEFAULT_SYNC_MAX_FETCH) -> Dict[str, Any]:
+        """把信箱同步到本地的信件庫，之後可以用 search_mails 離線查詢。
+
+        只下載上次同步之後的新信；在其他地方刪信造成的編號位移，只需要讀取少數幾封信就能修正，
+        不會重新下載整個信箱。
+
+        註記：此函式必須先登入 PTT。
+
+        Args:
+            max_fetch (int): 這次最多下載幾封信。信箱很大時可以分次同步。預設為 1000。
+
+        Returns:
+            Dict[str, Any]: 包含同步結果的字典。
+                            成功時: {'success': True, 'new': 新下載的信件數, 'deleted': 已從信箱刪除的信件數,
+                                     'total': 本地已同步的信件數, 'fetched': 這次讀取的信件數,
+                                     'complete': 是否已同步到最新的信件 (False 時請再呼叫一次),
+                                     'partial': 是否有無法確認是否被刪除的信件 (這些信件會先保留，下次同步時重新下載),
+                                     'unresolved': 保留下來、尚未確認的信件數}
+                            失敗: {'success': False, 'message': '...', 'code': '...'}
+        """
+        return await _run_in_ptt_executor(
+            memory_storage, _sync_mailbox, memory_storage, max(1, max_fetch)
+        )
+
+    @mcp.tool()
+    async def search_mails(
+        keyword: Optional[str] = None,
+        author: Optional[str] = None,
+        limit: int = DEFAULT_MAIL_SEARCH_LIMIT,
+        offset: int = 0,
+        include_content: bool = False,
+        sync: bool = True,
+    ) -> Dict[str, Any]:
+        """從本地的信件庫列出或搜尋信件，由新到舊排序。適合一次瀏覽、匯出大量信件，不必逐封呼叫 get_mail。
+
+        註記：sync 為 True 時會先同步信箱，此時必須先登入 PTT。
+
+        Args:
+            keyword (str, optional): 比對標題與內文的關鍵字 (不分大小寫)。
+            author (str, optional): 寄件人帳號 (不分大小寫，比對開頭)。
+            limit (int): 最多回傳幾封信。預設為 20。
+            offset (int): 略過前幾封符合條件的信，用於分頁。預設為 0。
+            include_content (bool): 是否包含完整的信件內容。預設為 False，只回傳標題、寄件人與日期。
+            sync (bool): 查詢前是否先同步信箱。預設為 True；設為 False 時只使用本地已有的信件，不需要連線。
+
+        Returns:
+            Dict[str, Any]: 包含信件列表的字典。
+                            成功時: {'success': True, 'data': [
+                                {'index': 信件編號, 'key': 信件識別, 'author': '寄件人', 'title': '信件標題',
+                                 'date': '寄件日期', 'is_red_envelope': 是否為紅包信},
+                                ...
+                            ], 'sync': sync_mailbox 的結果 (sync 為 False 時為 None)}
+                            失敗: {'success': False, 'message': '...', 'code': '...'}
+        """
+        sync_response = None
+        if sync:
+            sync_response = await _run_in_ptt_executor(
+                memory_storage, _sync_mailbox, memory_storage
+            )
+            if not sync_response.get("success"):
+                return sync_response
+
+        data = memory_storage["mail_store"].search(
+            memory_storage.get("ptt_id") or "",
+            keyword=keyword,
+            author=author,
+            limit=max(1, limit),
+            offset=max(0, offset),
+            include_content=include_content,
+        )
+        return {"success": True, "data": data, "sync": sync_response}
+
+    @mcp.tool()
+    async def give_money(
         ptt_id: str,
         money: int,
         red_bag_title: Optional[str] = None,
@@ -457,7 +632,7 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
                             成功: {'success': True, 'message': '轉帳成功'}
                             失敗: {'success': False, 'message': '...', 'code': '...'}
         """
-        return _call_ptt_service(
+        return await _call_ptt_service_async(
             memory_storage,
             "give_money",
             ptt_id=ptt_id,
@@ -468,13 +643,17 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
         )
 
     @mcp.tool()
-    def get_user(user_id: str) -> Dict[str, Any]:
+    async def get_user(
+        user_id: str, fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
         """取得使用者資訊。
 
         註記：此函式必須先登入 PTT。
 
         Args:
             user_id (str): 目標使用者的 PTT ID。
+            fields (List[str], optional): 只回傳指定的欄位，例如 ["ptt_id", "legal_post", "last_login_date"]。
+                                          預設回傳全部欄位。
 
         Returns:
             Dict[str, Any]: 一個包含使用者資料的字典，或是在失敗時回傳錯誤訊息。
@@ -496,10 +675,45 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
                             }}
                             失敗: {'success': False, 'message': '...', 'code': '...'}
         """
-        return _call_ptt_service(memory_storage, "get_user", user_id=user_id)
+        response = await _call_ptt_service_async(
+            memory_storage, "get_user", user_id=user_id
+        )
+        return _shape_response(response, fields)
 
     @mcp.tool()
-    def search_user(
+    async def get_users(
+        user_ids: List[str], fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """一次取得多個使用者的資訊，例如檢查看板上一頁文章的所有作者。
+
+        帳號不分大小寫，重複的帳號只查詢一次；最近查詢過的帳號直接使用快取，不必連線到 PTT。
+        其餘帳號依序向 PTT 查詢，個別帳號查詢失敗不影響其他帳號。
+
+        註記：此函式必須先登入 PTT。
+
+        Args:
+            user_ids (List[str]): 目標使用者的 PTT ID 列表，一次最多 100 個 (去除重複後)。
+            fields (List[str], optional): 每個使用者只回傳指定的欄位，例如 ["ptt_id", "legal_post", "illegal_post"]。
+                                          預設回傳全部欄位。
+
+        Returns:
+            Dict[str, Any]: 包含查詢結果的字典。
+                            成功時: {'success': True,
+                                     'data': {'使用者ID': {與 get_user 的 data 相同}, ...},
+                                     'errors': {'使用者ID': {'message': '...', 'code': 'NO_SUCH_USER'}, ...},
+                                     'cached': 使用快取的帳號數}
+                            失敗: {'success': False, 'message': '...', 'code': '...'}
+        """
+        response = await _get_users(memory_storage, user_ids)
+        if fields and response.get("success"):
+            response["data"] = {
+                user_id: _project(user, fields)
+                for user_id, user in response["data"].items()
+            }
+        return response
+
+    @mcp.tool()
+    async def search_user(
         ptt_id: str, min_page: Optional[int] = None, max_page: Optional[int] = None
     ) -> Dict[str, Any]:
         """搜尋使用者。
@@ -517,7 +731,7 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
                             {'success': True, 'data': ['user1', 'user2', ...]}
                             失敗: {'success': False, 'message': '...', 'code': '...'}
         """
-        return _call_ptt_service(
+        return await _call_ptt_service_async(
             memory_storage,
             "search_user",
             ptt_id=ptt_id,
@@ -526,7 +740,7 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
         )
 
     @mcp.tool()
-    def change_pw(new_password: str) -> Dict[str, Any]:
+    async def change_pw(new_password: str) -> Dict[str, Any]:
         """更改 PTT 登入密碼。
 
         重要！務必遵守！執行前務必顯示內容並與使用者確認後才可以執行。
@@ -542,7 +756,7 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
                             成功: {'success': True, 'message': '密碼更改成功'}
                             失敗: {'success': False, 'message': '...', 'code': '...'}
         """
-        return _call_ptt_service(
+        return await _call_ptt_service_async(
             memory_storage,
             "change_pw",
             new_password=new_password,
@@ -550,7 +764,7 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
         )
 
     @mcp.tool()
-    def get_time() -> Dict[str, Any]:
+    async def get_time() -> Dict[str, Any]:
         """取得 PTT 系統時間。
 
         註記：此函式必須先登入 PTT。
@@ -560,24 +774,72 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
                             成功: {'success': True, 'data': 'HH:MM'} (例如: {'success': True, 'data': '14:30'})
                             失敗: {'success': False, 'message': '...', 'code': '...'}
         """
-        return _call_ptt_service(memory_storage, "get_time")
+        return await _call_ptt_service_async(memory_storage, "get_time")
 
     @mcp.tool()
-    def get_all_boards() -> Dict[str, Any]:
+    async def get_all_boards(refresh: bool = False) -> Dict[str, Any]:
         """取得 PTT 全站看板清單。
 
+        清單會存放在本地並每天於背景更新，之後的呼叫直接從本地回傳 (回應中 'cached' 為 True)。
+        只是要確認看板名稱是否正確時，請改用 find_boards。
+
         註記：此函式必須先登入 PTT。
 
+        Args:
+            refresh (bool): 是否忽略本地的清單，重新向 PTT 取得。預設為 False。
+
         Returns:
             Dict[str, Any]: 一個包含看板清單的字典，或是在失敗時回傳錯誤訊息。
                             成功時，'data' 鍵包含看板名稱列表，例如：
-                            {'success': True, 'data': ['Board1', 'Board2', ...]}
+                            {'success': True, 'data': ['Board1', 'Board2', ...], 'fetched_at': 取得時間 (Unix 秒)}
+                            失敗: {'success': False, 'message': '...', 'code': '...'}
+        """
+        board_catalog = memory_storage["board_catalog"]
+        boards = None if refresh else board_catalog.boards()
+        if boards is not None:
+            return {
+                "success": True,
+                "data": boards,
+                "fetched_at": board_catalog.fetched_at,
+                "cached": True,
+            }
+
+        response = await _run_in_ptt_executor(memory_storage, board_catalog.refresh)
+        if not response.get("success"):
+            return response
+        return {**response, "fetched_at": board_catalog.fetched_at}
+
+    @mcp.tool()
+    async def find_boards(name: str, limit: int = 5) -> Dict[str, Any]:
+        """確認看板名稱是否存在，並回傳名稱相近的看板，例如 "gossip" -> ["Gossiping", ...]。
+
+        使用本地的全站看板清單比對 (不分大小寫，容許打錯一個字或只輸入開頭)，不需要連線到 PTT。
+        本地還沒有清單時會先向 PTT 取得一次，此時必須先登入 PTT。
+
+        Args:
+            name (str): 要確認的看板名稱，可以是部分名稱。
+            limit (int): 最多回傳幾個相近的看板。預設為 5。
+
+        Returns:
+            Dict[str, Any]: 包含操作結果的字典。
+                            成功時: {'success': True, 'board': 大小寫正確的看板名稱 (不存在時為 None),
+                                     'suggestions': ['Gossiping', ...]}
                             失敗: {'success': False, 'message': '...', 'code': '...'}
         """
-        return _call_ptt_service(memory_storage, "get_all_boards")
+        board_catalog = memory_storage["board_catalog"]
+        if board_catalog.boards() is None:
+            response = await _run_in_ptt_executor(memory_storage, board_catalog.refresh)
+            if not response.get("success"):
+                return response
+
+        return {
+            "success": True,
+            "board": board_catalog.resolve(name),
+            "suggestions": board_catalog.suggest(name, max(1, limit)),
+        }
 
     @mcp.tool()
-    def get_favourite_boards() -> Dict[str, Any]:
+    async def get_favourite_boards() -> Dict[str, Any]:
         """取得我的最愛看板清單。
 
         註記：此函式必須先登入 PTT。
@@ -591,10 +853,12 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
                             ]}
                             失敗: {'success': False, 'message': '...', 'code': '...'}
         """
-        return _call_ptt_service(memory_storage, "get_favourite_boards")
+        return await _call_ptt_service_async(memory_storage, "get_favourite_boards")
 
     @mcp.tool()
-    def get_board_info(board: str, get_post_types: bool = False) -> Dict[str, Any]:
+    async def get_board_info(
+        board: str, get_post_types: bool = False, fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
         """取得看板資訊。
 
         註記：此函式必須先登入 PTT。
@@ -604,6 +868,8 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
             get_post_types (bool, optional): 是否取得文章類型，例如：八卦板的「問卦」。預設為 False。
                                              回傳的結果，你可以在結果中的 post_kind_list 找到，並可以在 post 功能中用 title_index 指定用哪一個類型。
                                              編號由 1 開始。
+            fields (List[str], optional): 只回傳指定的欄位，例如 ["board", "online_user", "moderators"]。
+                                          預設回傳全部欄位。
 
         Returns:
             Dict[str, Any]: 一個包含看板資訊的字典，或是在失敗時回傳錯誤訊息。
@@ -634,9 +900,10 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
                             }}
                             失敗: {'success': False, 'message': '...', 'code': '...'}
         """
-        return _call_ptt_service(
+        response = await _call_ptt_service_async(
             memory_storage, "get_board_info", board=board, get_post_types=get_post_types
         )
+        return _shape_response(response, fields)
 
     @mcp.tool()
     def get_aid_from_url(url: str) -> Dict[str, Any]:
@@ -653,14 +920,70 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
                             {'success': True, 'data': ['BoardName', 'M.1234567890.A.BCD']}
                             失敗: {'success': False, 'message': '...', 'code': '...'}
         """
-        try:
-            board_name, aid = PyPtt.API().get_aid_from_url(url)
-            return {"success": True, "data": [board_name, aid]}
-        except Exception as e:
-            return {"success": False, "message": f"解析網址失敗: {e}"}
+        parsed = _aid_from_url(url)
+        if parsed is None:
+            return {
+                "success": False,
+                "message": f"解析網址失敗: {url}",
+                "code": "INVALID_POST_REF",
+            }
+        return {"success": True, "data": list(parsed)}
 
     @mcp.tool()
-    def get_bottom_post_list(board: str) -> Dict[str, Any]:
+    def get_url_from_aid(board: str, aid: str) -> Dict[str, Any]:
+        """由看板名稱與文章 AID 組出文章網址，是 get_aid_from_url 的反向操作。
+
+        不需要登入 PTT。
+
+        Args:
+            board (str): 文章所在的看板名稱。
+            aid (str): 文章的 ID (AID)，例如 "1TJH_XY0" 或 "#1TJH_XY0"。
+
+        Returns:
+            Dict[str, Any]: 一個包含文章網址的字典，或是在失敗時回傳錯誤訊息。
+                            成功: {'success': True, 'data': 'https://www.ptt.cc/bbs/Python/M.1565335521.A.880.html'}
+                            失敗: {'success': False, 'message': '...', 'code': 'INVALID_POST_REF'}
+        """
+        url = _url_from_aid(board, aid)
+        if url is None:
+            return {
+                "success": False,
+                "message": f"不是 PTT 文章 AID: {aid}",
+                "code": "INVALID_POST_REF",
+            }
+        return {"success": True, "data": url}
+
+    @mcp.tool()
+    def parse_post_refs(refs: List[str], board: Optional[str] = None) -> Dict[str, Any]:
+        """一次解析多個文章網址或 AID，回傳看板、AID、網址與發文時間，適合整理大量連結。
+
+        發文時間直接由 AID (或網址中的時間戳記) 解碼，不需要登入 PTT，也不需要連線。
+
+        Args:
+            refs (List[str]): 文章網址或 AID 的列表，可以混合使用，一次最多 1000 個。
+            board (str, optional): 只有 AID 時使用的看板名稱，用來組出網址。網址中的看板名稱優先。
+
+        Returns:
+            Dict[str, Any]: 一個包含解析結果的字典，順序與 refs 相同，個別無法解析的項目不影響其他項目。
+                            成功時: {'success': True, 'data': [
+                                {'success': True, 'board': 'Python', 'aid': '1TJH_XY0',
+                                 'url': 'https://www.ptt.cc/bbs/Python/M.1565335521.A.880.html' (沒有看板時為 None),
+                                 'timestamp': 1565335521, 'time': '2019/08/09 15:25:21' (台灣時間)},
+                                {'success': False, 'message': '...', 'code': 'INVALID_POST_REF'},
+                                ...
+                            ]}
+                            失敗: {'success': False, 'message': '...', 'code': '...'}
+        """
+        if len(refs) > MAX_REFS_PER_CALL:
+            return {
+                "success": False,
+                "message": f"一次最多解析 {MAX_REFS_PER_CALL} 個網址或 AID",
+                "code": "TOO_MANY_REFS",
+            }
+        return {"success": True, "data": [_parse_post_ref(ref, board) for ref in refs]}
+
+    @mcp.tool()
+    async def get_bottom_post_list(board: str) -> Dict[str, Any]:
         """取得看板置底文章清單。
 
         註記：此函式必須先登入 PTT。
@@ -677,10 +1000,12 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
                             ]}
                             失敗: {'success': False, 'message': '...', 'code': '...'}
         """
-        return _call_ptt_service(memory_storage, "get_bottom_post_list", board=board)
+        return await _call_ptt_service_async(
+            memory_storage, "get_bottom_post_list", board=board
+        )
 
     @mcp.tool()
-    def set_board_title(board: str, new_title: str) -> Dict[str, Any]:
+    async def set_board_title(board: str, new_title: str) -> Dict[str, Any]:
         """設定看板標題。
 
         重要！務必遵守！執行前務必顯示內容並與使用者確認後才可以執行。
@@ -697,7 +1022,7 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
                             成功: {'success': True, 'message': '看板標題設定成功'}
                             失敗: {'success': False, 'message': '...', 'code': '...'}
         """
-        return _call_ptt_service(
+        return await _call_ptt_service_async(
             memory_storage,
             "set_board_title",
             board=board,
@@ -706,7 +1031,7 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
         )
 
     @mcp.tool()
-    def bucket(
+    async def bucket(
         board: str, ptt_id: str, bucket_days: int, reason: str
     ) -> Dict[str, Any]:
         """將指定使用者水桶。
@@ -727,7 +1052,7 @@ def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
                             成功: {'success': True, 'message': '水桶成功'}
                             失敗: {'success': False, 'message': '...', 'code': '...'}
         """
-        return _call_ptt_service(
+        return await _call_ptt_service_async(
             memory_storage,
             "bucket",
             board=board,
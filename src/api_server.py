@@ -0,0 +1,176 @@
+from typing import Dict, Any, List, Optional
+
+from fastmcp import FastMCP
+
+
+def register_tools(mcp: FastMCP, memory_storage: Dict[str, Any], version: str):
+    @mcp.tool()
+    def get_session_pool_status() -> Dict[str, Any]:
+        """取得多帳號連線池中每個 session 的狀態與使用率。
+
+        不需要登入 PTT。連線池需透過環境變數 PTT_ACCOUNTS ("id1:pw1,id2:pw2") 啟用。
+
+        Returns:
+            Dict[str, Any]: 一個包含連線池狀態的字典。
+                            成功時，'data' 鍵包含每個 session 的狀態，例如：
+                            {'success': True, 'data': [
+                                {'ptt_id': '帳號', 'primary': 是否為主帳號, 'logged_in': 是否已登入,
+                                 'in_flight': 執行中的呼叫數, 'calls': 累計呼叫數, 'errors': 累計失敗數,
+                                 'busy_seconds': 累計忙碌秒數, 'utilization': 使用率 (0~1)},
+                                ...
+                            ]}
+                            未啟用連線池: {'success': False, 'message': '...', 'code': 'SESSION_POOL_DISABLED'}
+        """
+        session_pool = memory_storage.get("session_pool")
+        if session_pool is None:
+            return {
+                "success": False,
+                "message": "未啟用多帳號連線池，請設定 PTT_ACCOUNTS",
+                "code": "SESSION_POOL_DISABLED",
+            }
+        return {"success": True, "data": session_pool.status()}
+
+    @mcp.tool()
+    def get_cache_stats() -> Dict[str, Any]:
+        """取得 PTT 回應快取的命中率與使用狀況。
+
+        get_board_info、get_favourite_boards、get_bottom_post_list、get_user 的成功結果
+        會依照設定的秒數快取；同一個 session 執行發文、推文、刪文等寫入操作後，快取會自動清空。
+        快取大小與秒數可以透過環境變數 PTT_CACHE_SIZE 與 PTT_CACHE_TTL 設定；
+        PTT_STORAGE=sqlite 時快取存放在 PTT_DATA_DIR，重啟後仍然保留，也由同一台主機上的多個伺服器行程共用。
+
+        不需要登入 PTT。
+
+        Returns:
+            Dict[str, Any]: 一個包含快取統計的字典。
+                            成功時: {'success': True, 'data': {
+                                'backend': 'memory' | 'sqlite', 'size': 目前筆數, 'max_size': 最大筆數, 'hits': 命中次數, 'misses': 未命中次數,
+                                'hit_rate': 命中率, 'evictions': LRU 淘汰次數, 'invalidations': 因寫入而清空的次數,
+                                'ttl_seconds': {'get_user': 120, ...}
+                            }}
+                            未啟用快取: {'success': False, 'message': '...', 'code': 'CACHE_DISABLED'}
+        """
+        response_cache = memory_storage.get("response_cache")
+        if response_cache is None:
+            return {
+                "success": False,
+                "message": "未啟用回應快取，請確認 PTT_CACHE_SIZE 大於 0",
+                "code": "CACHE_DISABLED",
+            }
+        return {"success": True, "data": response_cache.stats()}
+
+    @mcp.tool()
+    def compact_cache() -> Dict[str, Any]:
+        """清除回應快取中已過期與超出 PTT_CACHE_SIZE 的項目，以及文章庫與信件庫中超出上限的資料。
+
+        PTT_STORAGE=sqlite 時也會把 WAL 寫回資料庫檔並執行 VACUUM，縮小 PTT_DATA_DIR 中 cache.db 的大小；
+        posts.db 與 mails.db 一律會執行。
+        不需要登入 PTT。
+
+        Returns:
+            Dict[str, Any]: 一個包含整理結果的字典。
+                            成功時: {'success': True, 'data': {
+                                'backend': 'memory' | 'sqlite', 'expired': 刪除的過期筆數, 'evicted': 刪除的超量筆數,
+                                'size': 剩餘筆數, 'file_bytes': 資料庫檔大小 (只有 sqlite)，
+                                'post_store': {'evicted': 刪除的文章數, 'size': 剩餘文章數, 'file_bytes': 資料庫檔大小},
+                                'mail_store': {'evicted': 刪除的信件數, 'size': 剩餘信件數, 'file_bytes': 資料庫檔大小}
+                            }}
+                            未啟用回應快取時只有 post_store 與 mail_store。
+                            沒有可以整理的資料: {'success': False, 'message': '...', 'code': 'CACHE_DISABLED'}
+        """
+        data: Dict[str, Any] = {}
+        response_cache = memory_storage.get("response_cache")
+        if response_cache is not None:
+            data.update(response_cache.storage.compact())
+        for name in ("post_store", "mail_store"):
+            store = memory_storage.get(name)
+            if store is not None:
+                data[name] = store.compact()
+        if not data:
+            return {
+                "success": False,
+                "message": "未啟用回應快取，請確認 PTT_CACHE_SIZE 大於 0",
+                "code": "CACHE_DISABLED",
+            }
+        return {"success": True, "data": data}
+
+    @mcp.tool()
+    def get_write_jobs(job_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """查詢寫入佇列中的工作 (post、reply_post、comment、mail) 的狀態與結果。
+
+        寫入操作會依照 PTT_WRITE_INTERVAL 設定的間隔依序執行；以 wait=False 呼叫時會立刻回傳 job_id，
+        之後用這個工具查詢結果。同一篇文章的連續推文在排隊期間可能被合併成一則，此時 merged_with 會列出一起送出的工作。
+
+        不需要登入 PTT。
+
+        Args:
+            job_ids (List[str], optional): 要查詢的工作 ID。預設回傳所有排隊中與最近完成的工作。
+
+        Returns:
+            Dict[str, Any]: 一個包含工作狀態的字典。
+                            成功時: {'success': True, 'data': [
+                                {'job_id': '1', 'method': 'comment', 'status': 'queued' | 'running' | 'done' | 'failed',
+                                 'attempts': 已嘗試次數, 'merged_with': ['2', ...],
+                                 'result': 執行結果 (尚未完成時為 None)},
+                                ...
+                            ]}
+                            未啟用寫入佇列: {'success': False, 'message': '...', 'code': 'WRITE_QUEUE_DISABLED'}
+        """
+        write_queue = memory_storage.get("write_queue")
+        if write_queue is None:
+            return {
+                "success": False,
+                "message": "未啟用寫入佇列",
+                "code": "WRITE_QUEUE_DISABLED",
+            }
+        return {"success": True, "data": write_queue.jobs(job_ids)}
+
+    @mcp.tool()
+    def get_metrics() -> Dict[str, Any]:
+        """取得每個 MCP 工具與每個 PyPtt 操作的呼叫次數、錯誤碼與延遲百分位數。
+
+        tools 中的 ptt_calls_per_call 是每次工具呼叫平均發出的 PyPtt 呼叫數 (例如 get_post_index_range 的搜尋次數)，
+        total_seconds 減去 ptt_seconds 則是伺服器本身 (搜尋邏輯、序列化) 花費的時間。
+        延遲百分位數以最近的樣本計算。不需要登入 PTT。
+
+        Returns:
+            Dict[str, Any]: 一個包含統計資料的字典。
+                            成功時: {'success': True, 'data': {
+                                'uptime_seconds': 啟動秒數,
+                                'tools': {'get_post': {
+                                    'count': 呼叫次數, 'errors': 失敗次數, 'error_codes': {'NOT_LOGGED_IN': 1, ...},
+                                    'total_seconds': 累計秒數, 'p50_seconds': ..., 'p95_seconds': ..., 'p99_seconds': ...,
+                                    'ptt_calls': 累計 PyPtt 呼叫數, 'ptt_calls_per_call': 平均值, 'max_ptt_calls': 最大值,
+                                    'ptt_seconds': 累計 PyPtt 秒數}, ...},
+                                'ptt_methods': {'get_post': {'count': ..., 'errors': ..., 'error_codes': {...},
+                                    'total_seconds': ..., 'p50_seconds': ..., 'p95_seconds': ..., 'p99_seconds': ...}, ...}
+                            }}
+                            未啟用: {'success': False, 'message': '...', 'code': 'METRICS_DISABLED'}
+        """
+        metrics = memory_storage.get("metrics")
+        if metrics is None:
+            return {
+                "success": False,
+                "message": "未啟用效能統計",
+                "code": "METRICS_DISABLED",
+            }
+        return {"success": True, "data": metrics.snapshot()}
+
+    @mcp.tool()
+    def get_metrics_prometheus() -> Dict[str, Any]:
+        """以 Prometheus text exposition format 取得與 get_metrics 相同的統計資料。
+
+        使用 HTTP 傳輸時，同樣的內容也可以從 /metrics 路徑取得。不需要登入 PTT。
+
+        Returns:
+            Dict[str, Any]: 成功時: {'success': True, 'data': '# TYPE ptt_mcp_tool_seconds summary\\n...'}
+                            未啟用: {'success': False, 'message': '...', 'code': 'METRICS_DISABLED'}
+        """
+        metrics = memory_storage.get("metrics")
+        if metrics is None:
+            return {
+                "success": False,
+                "message": "未啟用效能統計",
+                "code": "METRICS_DISABLED",
+            }
+        return {"success": True, "data": metrics.prometheus_text()}
@@ -17,7 +17,7 @@ def get_version() -> tuple[Optional[str], Optional[str]]:
             response = requests.get(main_version_url)
             response.raise_for_status()  # Raise an exception for HTTP errors
 
-            versions = response.text.split('=')[1].strip().strip('"')
+            versions = response.text.split("=")[1].strip().strip('"')
 
             return versions, _version.__version__
 
@@ -45,7 +45,7 @@ def main():
         print("Failed to retrieve version information.")
         return
 
-    if int(remote_version.replace('.', '')) <= int(current_version.replace('.', '')):
+    if int(remote_version.replace(".", "")) <= int(current_version.replace(".", "")):
         print(current_version)
     else:
         print(remote_version)
@@ -0,0 +1,199 @@
+import bisect
+import difflib
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, List, Optional, Set
+
+from utils import _call_ptt_service, _get_ptt_executor
+
+# 看板清單超過這個秒數就會在背景重新取得 (只在已經登入時)。
+DEFAULT_REFRESH_INTERVAL_SECONDS = 86400.0
+
+# 背景執行緒檢查看板清單是否過期的間隔。
+_CHECK_INTERVAL_SECONDS = 60.0
+
+DEFAULT_SUGGESTION_LIMIT = 5
+
+# 沒有編輯距離 1 以內或前綴相同的看板時，才用 difflib 比對整份清單 (毫秒等級)。
+_FUZZY_CUTOFF = 0.7
+
+
+def _deletions(name: str) -> Set[str]:
+    return {name[:position] + name[position + 1 :] for position in range(len(name))}
+
+
+class BoardCatalog:
+    """存放在本地的全站看板清單，提供不需要連線的看板名稱比對與建議。
+
+    清單存成 JSON 檔，第一次使用時才讀取；已登入時由背景執行緒每天重新取得一次。
+    名稱比對不分大小寫：完全相符、編輯距離 1 以內 (以刪除一個字元建立的索引查詢)、前綴，最後才是 difflib。
+    """
+
+    def __init__(
+        self,
+        memory_storage: Dict[str, Any],
+        path: str,
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL_SECONDS,
+        validate: bool = True,
+    ):
+        self._memory_storage = memory_storage
+        self.path = path
+        self.refresh_interval = refresh_interval
+        # 為 False 時找不到看板的錯誤不附上建議的名稱。
+        self.validate = validate
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.fetched_at: Optional[float] = None
+        self._boards: List[str] = []
+        self._by_lower: Dict[str, str] = {}
+        self._sorted_lower: List[str] = []
+        self._deletion_index: Optional[Dict[str, List[str]]] = None
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="ptt_board_catalog", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        # 先在背景讀取清單並建立索引，第一次檢查看板名稱時就不必等待。
+        self._ensure_loaded()
+        with self._lock:
+            self._deletion_index = self._build_deletion_index()
+
+        while not self._stop_event.wait(_CHECK_INTERVAL_SECONDS):
+            try:
+                if self._memory_storage.get("ptt_bot") is not None and self.is_stale():
+                    _get_ptt_executor(self._memory_storage).submit(
+                        self.refresh
+                    ).result()
+            except Exception:
+                # 更新失敗時繼續使用舊的清單，下一輪再試。
+                pass
+
+    def _ensure_loaded(self) -> None:
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    snapshot = json.load(f)
+                self._set_boards(snapshot["boards"], snapshot["fetched_at"])
+            except (OSError, ValueError, KeyError, TypeError):
+                # 還沒有清單，或是檔案損毀：等下一次 refresh。
+                pass
+
+    def _set_boards(self, boards: List[str], fetched_at: float) -> None:
+        self._boards = list(boards)
+        self._by_lower = {board.lower(): board for board in boards}
+        self._sorted_lower = sorted(self._by_lower)
+        self._deletion_index = None
+        self.fetched_at = fetched_at
+
+    def is_stale(self) -> bool:
+        self._ensure_loaded()
+        return (
+            self.fetched_at is None
+            or time.time() - self.fetched_at > self.refresh_interval
+        )
+
+    def boards(self) -> Optional[List[str]]:
+        """回傳目前的看板清單；還沒有取得過時回傳 None。"""
+        self._ensure_loaded()
+        with self._lock:
+            return None if self.fetched_at is None else list(self._boards)
+
+    def refresh(self) -> Dict[str, Any]:
+        """向 PTT 重新取得看板清單並存檔。這個函式會呼叫 PyPtt，必須在 PTT 執行緒上執行。"""
+        self._ensure_loaded()
+        response = _call_ptt_service(self._memory_storage, "get_all_boards")
+        if not response.get("success") or not response.get("data"):
+            return response
+
+        fetched_at = time.time()
+        with self._lock:
+            self._set_boards(response["data"], fetched_at)
+            self._deletion_index = self._build_deletion_index()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"fetched_at": fetched_at, "boards": response["data"]},
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(temp_path, self.path)
+        return response
+
+    def resolve(self, name: str) -> Optional[str]:
+        """回傳大小寫正確的看板名稱，清單上沒有這個看板時回傳 None。"""
+        self._ensure_loaded()
+        with self._lock:
+            return self._by_lower.get(name.strip().lower())
+
+    def suggest(self, name: str, limit: int = DEFAULT_SUGGESTION_LIMIT) -> List[str]:
+        """回傳最接近 name 的看板名稱，最相近的排在前面。"""
+        self._ensure_loaded()
+        key = name.strip().lower()
+        with self._lock:
+            if not self._sorted_lower or not key:
+                return []
+            if self._deletion_index is None:
+                self._deletion_index = self._build_deletion_index()
+
+            matches: List[str] = []
+            if key in self._by_lower:
+                matches.append(key)
+
+            # 刪掉一個字元後相同的名稱，涵蓋打錯、多打、少打一個字與相鄰字元對調。
+            close = set(self._deletion_index.get(key, []))
+            for deletion in _deletions(key):
+                close.update(self._deletion_index.get(deletion, []))
+                if deletion in self._by_lower:
+                    close.add(deletion)
+            close.discard(key)
+            matches.extend(
+                sorted(close, key=lambda board: (abs(len(board) - len(key)), board))
+            )
+
+            position = bisect.bisect_left(self._sorted_lower, key)
+            while len(matches) < limit and position < len(self._sorted_lower):
+                board = self._sorted_lower[position]
+                if not board.startswith(key):
+                    break
+                if board not in matches:
+                    matches.append(board)
+                position += 1
+
+            if not matches:
+                matches = difflib.get_close_matches(
+                    key, self._sorted_lower, n=limit, cutoff=_FUZZY_CUTOFF
+                )
+            return [self._by_lower[board] for board in matches[:limit]]
+
+    def _build_deletion_index(self) -> Dict[str, List[str]]:
+        deletion_index: Dict[str, List[str]] = {}
+        for board in self._sorted_lower:
+            for deletion in _deletions(board):
+                deletion_index.setdefault(deletion, []).append(board)
+        return deletion_index
+
+    def add_suggestions(self, board: str, response: Dict[str, Any]) -> Dict[str, Any]:
+        """PTT 回傳 NO_SUCH_BOARD 時呼叫，附上清單中相近的看板名稱；停用時原樣回傳。
+
+        清單只是每天的快照，隱板與新開的看板不會在上面，所以看板是否存在一律以 PTT 的回應為準。
+        """
+        if not self.validate:
+            return response
+        return {**response, "suggestions": self.suggest(board)}
@@ -0,0 +1,253 @@
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Any, Optional, Tuple
+
+from post_index import _MISSING_POST_CODES
+from post_store import _get_post
+from utils import (
+    NEW_INDEX_BOARD,
+    POST_STATUS_EXISTS,
+    _call_ptt_service,
+    _get_ptt_executor,
+)
+
+# 有新文章時輪詢間隔減半，沒有新文章時拉長 1.5 倍，介於最短間隔與 MAX_INTERVAL_SECONDS 之間。
+DEFAULT_MIN_INTERVAL_SECONDS = 15.0
+MAX_INTERVAL_SECONDS = 300.0
+
+# 超過這個秒數沒有人呼叫 get_new_posts 的看板會自動停止追蹤，不再佔用 PTT 連線。
+IDLE_TIMEOUT_SECONDS = 3600.0
+
+# 每個看板最多保留的新文章數，超過時丟掉最舊的。
+DEFAULT_BUFFER_SIZE = 500
+
+# 每次輪詢最多取得的文章數；新文章更多時，下一輪立刻接著取。
+MAX_FETCH_PER_POLL = 50
+
+
+class _Subscription:
+    def __init__(
+        self,
+        board: str,
+        query: bool,
+        last_index: int,
+        interval: float,
+        buffer_size: int,
+    ):
+        now = time.monotonic()
+        self.board = board
+        self.query = query
+        # 開始追蹤時的最新編號，這之前的文章不會被暫存。
+        self.start_index = last_index
+        # 已經檢查過的最大編號，也就是 get_new_posts 的游標。
+        self.last_index = last_index
+        self.interval = interval
+        self.next_poll = now + interval
+        self.last_read = now
+        self.posts: Deque[Tuple[int, Dict[str, Any]]] = deque(maxlen=buffer_size)
+        # 因為緩衝區已滿而被丟掉的最大編號。
+        self.dropped_through = 0
+        self.last_error: Optional[Dict[str, Any]] = None
+
+
+class BoardWatcher:
+    """背景執行緒：定期以 get_newest_index 檢查追蹤中的看板，只取得上次之後的新文章並暫存起來。
+
+    第一次追蹤看板時才會啟動執行緒。所有 PTT 操作都送到 PTT 執行緒上執行，和工具呼叫依序交錯。
+    """
+
+    def __init__(
+        self,
+        memory_storage: Dict[str, Any],
+        min_interval: float = DEFAULT_MIN_INTERVAL_SECONDS,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+    ):
+        self._memory_storage = memory_storage
+        self.min_interval = min_interval
+        self.buffer_size = buffer_size
+        self._lock = threading.Lock()
+        self._wake_event = threading.Event()
+        self._subscriptions: Dict[str, _Subscription] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, board: str, query: bool = True) -> Dict[str, Any]:
+        """開始追蹤看板，回傳目前的游標；之後的新文章才會被暫存。已經在追蹤時直接回傳目前的游標。
+
+        這個函式會呼叫 PyPtt，必須在 PTT 執行緒上執行。
+        """
+        key = board.lower()
+        with self._lock:
+            subscription = self._subscriptions.get(key)
+            if subscription is not None:
+                subscription.last_read = time.monotonic()
+                return {"success": True, "cursor": subscription.last_index}
+
+        response = _call_ptt_service(
+            self._memory_storage,
+            "get_newest_index",
+            index_type=NEW_INDEX_BOARD,
+            board=board,
+        )
+        if not response.get("success"):
+            return response
+
+        with self._lock:
+            subscription = self._subscriptions.setdefault(
+                key,
+                _Subscription(
+                    board,
+                    query,
+                    response.get("data") or 0,
+                    self.min_interval,
+                    self.buffer_size,
+                ),
+            )
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="ptt_board_watcher", daemon=True
+                )
+                self._thread.start()
+        self._wake_event.set()
+        return {"success": True, "cursor": subscription.last_index}
+
+    def unwatch(self, board: str) -> bool:
+        with self._lock:
+            return self._subscriptions.pop(board.lower(), None) is not None
+
+    def is_watching(self, board: str) -> bool:
+        with self._lock:
+            return board.lower() in self._subscriptions
+
+    def get_new_posts(
+        self, board: str, since_cursor: Optional[int], limit: int
+    ) -> Optional[Dict[str, Any]]:
+        """回傳編號大於 since_cursor 的暫存文章；看板沒有在追蹤時回傳 None。"""
+        with self._lock:
+            subscription = self._subscriptions.get(board.lower())
+            if subscription is None:
+                return None
+
+            subscription.last_read = time.monotonic()
+            since = since_cursor or 0
+            new_posts = [
+                (index, post) for index, post in subscription.posts if index > since
+            ]
+            has_more = len(new_posts) > limit
+            new_posts = new_posts[:limit]
+            # 還有沒回傳的文章時，游標停在這次最後一篇；否則直接跳到已經檢查過的最大編號。
+            next_cursor = (
+                new_posts[-1][0] if has_more else max(since, subscription.last_index)
+            )
+            return {
+                "success": True,
+                "data": [post for _, post in new_posts],
+                "next_cursor": next_cursor,
+                "has_more": has_more,
+                # since_cursor 之後有文章沒有被暫存 (開始追蹤之前，或是緩衝區已滿被丟掉)，請用 get_posts 補回。
+                "missed": since_cursor is not None
+                and since_cursor
+                < max(subscription.start_index, subscription.dropped_through),
+                "poll_interval_seconds": round(subscription.interval, 1),
+                "last_error": subscription.last_error,
+            }
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                next_poll = min(
+                    (s.next_poll for s in self._subscriptions.values()), default=None
+                )
+            timeout = (
+                None if next_poll is None else max(0.0, next_poll - time.monotonic())
+            )
+            if self._wake_event.wait(timeout):
+                self._wake_event.clear()
+                continue
+
+            with self._lock:
+                now = time.monotonic()
+                due = [s for s in self._subscriptions.values() if s.next_poll <= now]
+            for subscription in due:
+                try:
+                    self.poll(subscription)
+                except Exception as e:
+                    # 輪詢失敗不應該影響伺服器，下一輪再試。
+                    subscription.last_error = {
+                        "success": False,
+                        "message": str(e),
+                        "code": "UNKNOWN_ERROR",
+                    }
+                    subscription.next_poll = time.monotonic() + subscription.interval
+
+    def poll(self, subscription: _Subscription) -> None:
+        """檢查一次看板，取得上次之後的新文章 (最多 MAX_FETCH_PER_POLL 篇) 並調整下一次的輪詢時間。"""
+        if time.monotonic() - subscription.last_read > IDLE_TIMEOUT_SECONDS:
+            self.unwatch(subscription.board)
+            return
+
+        executor = _get_ptt_executor(self._memory_storage)
+        response = executor.submit(
+            _call_ptt_service,
+            self._memory_storage,
+            "get_newest_index",
+            index_type=NEW_INDEX_BOARD,
+            board=subscription.board,
+        ).result()
+        if not response.get("success"):
+            subscription.last_error = response
+            subscription.interval = min(MAX_INTERVAL_SECONDS, subscription.interval * 2)
+            subscription.next_poll = time.monotonic() + subscription.interval
+            return
+
+        newest_index = response.get("data") or 0
+        with self._lock:
+            if newest_index < subscription.last_index:
+                # 文章被清除後編號會往前移。
+                subscription.last_index = newest_index
+
+        found = 0
+        subscription.last_error = None
+        end_index = min(newest_index, subscription.last_index + MAX_FETCH_PER_POLL)
+        for index in range(subscription.last_index + 1, end_index + 1):
+            # 每篇各自送出，讓等待中的工具呼叫可以穿插執行。
+            post_response = executor.submit(
+                _get_post,
+                self._memory_storage,
+                subscription.board,
+                None,
+                index,
+                subscription.query,
+                None,
+            ).result()
+            if (
+                not post_response.get("success")
+                and post_response.get("code") not in _MISSING_POST_CODES
+            ):
+                # 停在最後一篇成功取得的文章，下一輪從失敗的編號重試，不會漏掉文章。
+                subscription.last_error = post_response
+                break
+
+            post = post_response.get("data") if post_response.get("success") else None
+            with self._lock:
+                if post and post.get("post_status") == POST_STATUS_EXISTS:
+                    if len(subscription.posts) == subscription.posts.maxlen:
+                        subscription.dropped_through = subscription.posts[0][0]
+                    subscription.posts.append((index, post))
+                    found += 1
+                subscription.last_index = index
+
+        now = time.monotonic()
+        if subscription.last_error is not None:
+            subscription.interval = min(MAX_INTERVAL_SECONDS, subscription.interval * 2)
+            subscription.next_poll = now + subscription.interval
+        elif subscription.last_index < newest_index:
+            subscription.next_poll = now
+        elif found:
+            subscription.interval = max(self.min_interval, subscription.interval / 2)
+            subscription.next_poll = now + subscription.interval
+        else:
+            subscription.interval = min(
+                MAX_INTERVAL_SECONDS, subscription.interval * 1.5
+            )
+            subscription.next_poll = now + subscription.interval
@@ -0,0 +1,145 @@
+import threading
+from typing import Dict, Any, Hashable, Optional, Tuple
+
+from storage import MemoryStorage, Storage
+
+# 預設的快取秒數，沒有列在這裡的操作不會被快取。
+DEFAULT_CACHE_TTL_SECONDS: Dict[str, float] = {
+    "get_board_info": 300,
+    "get_favourite_boards": 300,
+    "get_bottom_post_list": 300,
+    "get_user": 120,
+}
+
+# 這些操作會改變 PTT 上的資料，執行後清空整個快取。
+WRITE_METHODS = frozenset(
+    {
+        "login",
+        "logout",
+        "post",
+        "reply_post",
+        "del_post",
+        "comment",
+        "mail",
+        "del_mail",
+        "give_money",
+        "change_pw",
+        "set_board_title",
+        "bucket",
+    }
+)
+
+# 回應快取在儲存後端中使用的 namespace；每個帳號各自一個，後面接上小寫的帳號。
+_NAMESPACE = "responses"
+
+# PTT 的看板名稱與帳號不分大小寫。
+_CASE_INSENSITIVE_ARGS = frozenset({"board", "user_id", "ptt_id"})
+
+
+def _parse_ttl_config(ttl_str: Optional[str]) -> Dict[str, float]:
+    """解析 PTT_CACHE_TTL，格式為 "get_user=60,get_board_info=0"，0 代表不快取該操作。"""
+    ttl_seconds = dict(DEFAULT_CACHE_TTL_SECONDS)
+    if not ttl_str:
+        return ttl_seconds
+
+    for item in ttl_str.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        method_name, sep, seconds = item.partition("=")
+        try:
+            ttl_seconds[method_name.strip()] = float(seconds)
+        except ValueError:
+            sep = ""
+        if not sep:
+            raise ValueError(
+                "PTT_CACHE_TTL must be in the format 'method=seconds,method=seconds'."
+            )
+    return ttl_seconds
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+def _make_key(method_name: str, kwargs: Dict[str, Any]) -> Tuple[Hashable, ...]:
+    normalized = []
+    for name, value in sorted(kwargs.items()):
+        if value is None:
+            continue
+        if name in _CASE_INSENSITIVE_ARGS and isinstance(value, str):
+            value = value.lower()
+        normalized.append((name, _freeze(value)))
+    return (method_name, tuple(normalized))
+
+
+class ResponseCache:
+    """_call_ptt_service 前面的 TTL + LRU 快取，以操作名稱加上正規化後的參數為鍵。
+
+    資料存放在 storage 中：預設是行程記憶體，使用 SQLiteStorage 時重啟後仍然保留，也可以由多個行程共用。
+    共用時不同帳號的結果 (例如我的最愛) 不能互相使用，所以每個 account 使用各自的 namespace，
+    清空快取時也只清空自己帳號的部分。
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: Dict[str, float],
+        storage: Optional[Storage] = None,
+        account: Optional[str] = None,
+    ):
+        self.namespace = f"{_NAMESPACE}:{account.lower()}" if account else _NAMESPACE
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.storage: Storage = MemoryStorage(max_size) if storage is None else storage
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def make_key(self, method_name: str, kwargs: Dict[str, Any]) -> Optional[Hashable]:
+        if self.max_size <= 0 or self.ttl_seconds.get(method_name, 0) <= 0:
+            return None
+        return _make_key(method_name, kwargs)
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        response = self.storage.get(self.namespace, key)
+        with self._lock:
+            if response is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return dict(response)
+
+    def contains(self, key: Hashable) -> bool:
+        """是否有尚未過期的快取，不計入命中統計，也不影響 LRU 順序。"""
+        return self.storage.get(self.namespace, key, touch=False) is not None
+
+    def put(self, key: Hashable, method_name: str, response: Dict[str, Any]) -> None:
+        self.storage.put(
+            self.namespace, key, dict(response), self.ttl_seconds[method_name]
+        )
+
+    def clear(self) -> None:
+        if self.storage.clear(self.namespace):
+            with self._lock:
+                self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": self.storage.name,
+                "size": self.storage.count(self.namespace),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.storage.evictions,
+                "invalidations": self.invalidations,
+                "ttl_seconds": dict(self.ttl_seconds),
+            }
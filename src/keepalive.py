@@ -0,0 +1,56 @@
+import threading
+import time
+from typing import Dict, Any
+
+from utils import _call_ptt_service, _get_ptt_executor
+
+# 預設每 60 秒檢查一次；閒置超過這個時間的 session 才會送出 get_time 確認連線。
+DEFAULT_KEEPALIVE_INTERVAL_SECONDS = 60.0
+
+
+class SessionKeepalive:
+    """背景執行緒：定期確認 PTT session 仍然有效，失效時自動重新登入。
+
+    檢查本身送到 PTT 執行緒上執行，和工具呼叫依序交錯，不會在其他呼叫使用 session 時替換掉它。
+    """
+
+    def __init__(
+        self,
+        memory_storage: Dict[str, Any],
+        interval: float = DEFAULT_KEEPALIVE_INTERVAL_SECONDS,
+    ):
+        self._memory_storage = memory_storage
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="ptt_keepalive", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                _get_ptt_executor(self._memory_storage).submit(self.check).result()
+            except Exception:
+                # keepalive 失敗不應該影響伺服器，下一輪再試。
+                pass
+
+    def check(self) -> None:
+        """這個函式會呼叫 PyPtt，必須在 PTT 執行緒上執行。"""
+        if self._memory_storage.get("ptt_bot") is None:
+            return
+
+        idle_seconds = time.monotonic() - self._memory_storage.get("last_activity", 0.0)
+        if idle_seconds >= self.interval:
+            # get_time 是最輕量的操作；session 失效時 _call_ptt_service 會自動重新登入。
+            _call_ptt_service(self._memory_storage, "get_time")
+
+        session_pool = self._memory_storage.get("session_pool")
+        if session_pool is not None:
+            session_pool.check_secondary()
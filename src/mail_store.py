@@ -0,0 +1,342 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from storage import _connect
+from utils import _call_ptt_service
+
+# 一次同步最多下載的信件數；超過時回傳 complete=False，下一次同步再繼續。
+DEFAULT_SYNC_MAX_FETCH = 1000
+
+# 信件庫最多保存的信件數 (所有帳號合計)。超過時從最久沒有同步的其他帳號開始整個刪除；
+# 單一帳號的信件數受 PTT 信箱上限限制，在 PTT 上刪除的信件也會在同步時刪除。
+DEFAULT_MAX_MAILS = 10000
+
+# 搜尋信件沒有指定筆數時最多回傳的信件數。
+DEFAULT_MAIL_SEARCH_LIMIT = 20
+
+# 不含內文時回傳的欄位。
+MAIL_SUMMARY_FIELDS = ("index", "key", "author", "title", "date", "is_red_envelope")
+
+
+def _mail_key(mail: Dict[str, Any]) -> str:
+    """信件沒有固定的 ID，編號也會因為刪信而位移，用寄件人、日期與標題當作識別。"""
+    identity = "\n".join(
+        str(mail.get(field) or "") for field in ("author", "date", "title")
+    )
+    return hashlib.sha1(identity.encode("utf-8")).hexdigest()[:16]
+
+
+class MailStore:
+    """以 (帳號, 信件識別) 為鍵存放信件的 SQLite 資料庫，記錄每封信目前在信箱中的編號。
+
+    同步時只下載上次同步之後的新信；在其他地方刪信造成的編號位移，
+    以二分搜尋找出被刪除的信件並重新編號，不需要重新下載整個信箱。
+    """
+
+    def __init__(self, db_path: str, max_mails: int = DEFAULT_MAX_MAILS):
+        self.db_path = db_path
+        self.max_mails = max_mails
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = _connect(db_path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS mails ("
+                " ptt_id TEXT NOT NULL,"
+                " mail_key TEXT NOT NULL,"
+                " mail_index INTEGER NOT NULL,"
+                " mail_json TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL,"
+                " PRIMARY KEY (ptt_id, mail_key))"
+            )
+            # synced_through: 編號 1 ~ synced_through 的信件都已經在資料庫中。
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS mail_sync ("
+                " ptt_id TEXT PRIMARY KEY,"
+                " synced_through INTEGER NOT NULL,"
+                " synced_at REAL NOT NULL)"
+            )
+
+    def synced_through(self, ptt_id: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT synced_through FROM mail_sync WHERE ptt_id = ?",
+                (ptt_id.lower(),),
+            ).fetchone()
+        return 0 if row is None else row[0]
+
+    def indices(self, ptt_id: str) -> Dict[str, int]:
+        """回傳 {信件識別: 編號}。"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT mail_key, mail_index FROM mails WHERE ptt_id = ?",
+                (ptt_id.lower(),),
+            ).fetchall()
+        return dict(rows)
+
+    def apply_sync(
+        self,
+        ptt_id: str,
+        new_mails: Dict[int, Dict[str, Any]],
+        new_indices: Dict[str, Optional[int]],
+        synced_through: int,
+    ) -> None:
+        """一次寫入同步結果：new_mails 是新下載的 {編號: 信件}，new_indices 中編號為 None 的信件已被刪除。"""
+        ptt_id = ptt_id.lower()
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM mails WHERE ptt_id = ? AND mail_key = ?",
+                [(ptt_id, key) for key, index in new_indices.items() if index is None],
+            )
+            self._conn.executemany(
+                "UPDATE mails SET mail_index = ? WHERE ptt_id = ? AND mail_key = ?",
+                [
+                    (index, ptt_id, key)
+                    for key, index in new_indices.items()
+                    if index is not None
+                ],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO mails (ptt_id, mail_key, mail_index, mail_json, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        ptt_id,
+                        _mail_key(mail),
+                        index,
+                        json.dumps(mail, ensure_ascii=False),
+                        now,
+                    )
+                    for index, mail in new_mails.items()
+                ],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO mail_sync (ptt_id, synced_through, synced_at) VALUES (?, ?, ?)",
+                (ptt_id, synced_through, now),
+            )
+            self._evict(keep=ptt_id)
+
+    def _evict(self, keep: Optional[str] = None) -> int:
+        """信件總數超過 max_mails 時，從最久沒有同步的帳號開始刪除整個帳號的信件 (不刪除 keep)。
+
+        只刪除整個帳號，才能維持「編號 1 ~ synced_through 都在資料庫中」，下次同步該帳號時會重新下載。
+        """
+        total = self._conn.execute("SELECT COUNT(*) FROM mails").fetchone()[0]
+        if total <= self.max_mails:
+            return 0
+        accounts = self._conn.execute(
+            "SELECT mails.ptt_id, COUNT(*) FROM mails LEFT JOIN mail_sync ON mails.ptt_id = mail_sync.ptt_id"
+            " WHERE mails.ptt_id != ? GROUP BY mails.ptt_id ORDER BY IFNULL(MAX(mail_sync.synced_at), 0)",
+            (keep or "",),
+        ).fetchall()
+        evicted = 0
+        for ptt_id, count in accounts:
+            if total - evicted <= self.max_mails:
+                break
+            self._conn.execute("DELETE FROM mails WHERE ptt_id = ?", (ptt_id,))
+            self._conn.execute("DELETE FROM mail_sync WHERE ptt_id = ?", (ptt_id,))
+            evicted += count
+        self.evictions += evicted
+        return evicted
+
+    def compact(self) -> Dict[str, Any]:
+        """刪除超出上限的信件，再把 WAL 寫回主檔並 VACUUM，釋放刪除後留下的空間。"""
+        with self._lock:
+            with self._conn:
+                evicted = self._evict()
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("VACUUM")
+            size = self._conn.execute("SELECT COUNT(*) FROM mails").fetchone()[0]
+        return {
+            "evicted": evicted,
+            "size": size,
+            "file_bytes": os.path.getsize(self.db_path),
+        }
+
+    def remove_index(self, ptt_id: str, index: int) -> None:
+        """透過這個伺服器刪信之後呼叫：移除該封信，後面的信件編號減一。"""
+        ptt_id = ptt_id.lower()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM mails WHERE ptt_id = ? AND mail_index = ?", (ptt_id, index)
+            )
+            self._conn.execute(
+                "UPDATE mails SET mail_index = mail_index - 1 WHERE ptt_id = ? AND mail_index > ?",
+                (ptt_id, index),
+            )
+            self._conn.execute(
+                "UPDATE mail_sync SET synced_through = synced_through - 1 WHERE ptt_id = ? AND synced_through >= ?",
+                (ptt_id, index),
+            )
+
+    def search(
+        self,
+        ptt_id: str,
+        keyword: Optional[str] = None,
+        author: Optional[str] = None,
+        limit: int = DEFAULT_MAIL_SEARCH_LIMIT,
+        offset: int = 0,
+        include_content: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """依編號由新到舊列出信件；keyword 比對標題與內文，author 比對寄件人帳號 (皆不分大小寫)。"""
+        conditions = ["ptt_id = ?"]
+        parameters: List[Any] = [ptt_id.lower()]
+        if keyword:
+            conditions.append(
+                "(json_extract(mail_json, '$.title') LIKE ? OR json_extract(mail_json, '$.content') LIKE ?)"
+            )
+            parameters.extend([f"%{keyword}%"] * 2)
+        if author:
+            conditions.append("json_extract(mail_json, '$.author') LIKE ?")
+            parameters.append(f"{author}%")
+        parameters.extend([limit, offset])
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT mail_key, mail_index, mail_json FROM mails WHERE {' AND '.join(conditions)}"
+                " ORDER BY mail_index DESC LIMIT ? OFFSET ?",
+                parameters,
+            ).fetchall()
+
+        results = []
+        for key, index, mail_json in rows:
+            mail = {**json.loads(mail_json), "index": index, "key": key}
+            results.append(
+                mail
+                if include_content
+                else {field: mail.get(field) for field in MAIL_SUMMARY_FIELDS}
+            )
+        return results
+
+
+def _sync_mailbox(
+    memory_storage: Dict[str, Any], max_fetch: int = DEFAULT_SYNC_MAX_FETCH
+) -> Dict[str, Any]:
+    """把信箱同步到本地的信件庫。
+
+    1. 從上次同步的最後一封信往回找，找到第一封已知的信件，作為新舊的分界。
+       這段路上遇到的未知信件都是新信。
+    2. 分界以下如果有信件被刪除 (已知信件的編號變小)，以二分搜尋找出被刪除的信件，其餘信件重新編號。
+       兩端都已經確認、中間又沒有其他信件的區間，才會把區間內沒有出現的信件當作已刪除。
+    3. 下載分界之後的新信，最多 max_fetch 封。
+
+    二分搜尋遇到未知的信件時 (資料不一致)，該區間無法確認，區間內的信件保留不刪除，
+    只同步到區間的下端並回傳 partial=True；下次同步會重新下載區間以上的信件。
+    """
+    mail_store: MailStore = memory_storage["mail_store"]
+    ptt_id = memory_storage.get("ptt_id") or ""
+
+    newest_response = _call_ptt_service(
+        memory_storage, "get_newest_index", index_type="MAIL"
+    )
+    if not newest_response.get("success"):
+        return newest_response
+    newest_index = newest_response.get("data") or 0
+
+    old_indices = mail_store.indices(ptt_id)
+    key_by_old_index = {index: key for key, index in old_indices.items()}
+    fetched: Dict[int, Dict[str, Any]] = {}
+
+    def fetch(index: int) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        response = _call_ptt_service(memory_storage, "get_mail", index=index)
+        if not response.get("success"):
+            return None, response
+        fetched[index] = response.get("data") or {}
+        return _mail_key(fetched[index]), None
+
+    # 1. 分界: (目前的編號, 同步前的編號)，(0, 0) 代表信箱的開頭。
+    boundary = (0, 0)
+    new_mails: Dict[int, Dict[str, Any]] = {}
+    for index in range(min(mail_store.synced_through(ptt_id), newest_index), 0, -1):
+        key, error = fetch(index)
+        if error is not None:
+            return error
+        if key in old_indices:
+            boundary = (index, old_indices[key])
+            break
+        new_mails[index] = fetched[index]
+
+    # 2. anchors 是已經確認的 (目前的編號, 同步前的編號)，兩個相鄰 anchor 的編號差相同時，中間沒有信件被刪除。
+    anchors = [(0, 0), boundary]
+    pending = [((0, 0), boundary)]
+    unresolved: List[Tuple[Tuple[int, int], Tuple[int, int]]] = []
+    while pending:
+        (low_index, low_old), (high_index, high_old) = pending.pop()
+        if high_old - low_old == high_index - low_index or high_index - low_index <= 1:
+            continue
+        middle = (low_index + high_index) // 2
+        key, error = fetch(middle)
+        if error is not None:
+            return error
+        if key not in old_indices:
+            # 分界以下不應該有未知的信件；資料不一致時無法判斷區間內哪些信件被刪除，留到最後處理。
+            unresolved.append(((low_index, low_old), (high_index, high_old)))
+            continue
+        anchor = (middle, old_indices[key])
+        anchors.append(anchor)
+        pending.extend(
+            [((low_index, low_old), anchor), (anchor, (high_index, high_old))]
+        )
+
+    anchors.sort()
+    new_indices: Dict[str, Optional[int]] = {key: None for key in old_indices}
+    for (low_index, low_old), (high_index, high_old) in zip(anchors, anchors[1:]):
+        shift = low_old - low_index
+        if high_old - high_index == shift:
+            for old_index in range(low_old + 1, high_old + 1):
+                if old_index in key_by_old_index:
+                    new_indices[key_by_old_index[old_index]] = old_index - shift
+        elif ((low_index, low_old), (high_index, high_old)) in unresolved:
+            # 區間內的信件無法確認是否被刪除：保留不動 (不放在 new_indices 中)，只更新確認過的上端。
+            for old_index in range(low_old + 1, high_old):
+                if old_index in key_by_old_index:
+                    del new_indices[key_by_old_index[old_index]]
+            new_indices[key_by_old_index[high_old]] = high_index
+        else:
+            # 相鄰的編號之間，同步前的編號跳過的信件都已經被刪除。
+            new_indices[key_by_old_index[high_old]] = high_index
+
+    # 3. 分界之後的新信；同步前比分界更新的已知信件都已經被刪除 (new_indices 中保持 None)。
+    #    有無法確認的區間時，只同步到最低的區間下端，保留的信件編號可能已經過時，不能算在已同步的範圍內。
+    if unresolved:
+        synced_through = min(low_index for (low_index, _), _ in unresolved)
+    else:
+        synced_through = boundary[0]
+        for index in range(boundary[0] + 1, newest_index + 1):
+            if index not in new_mails:
+                if len(fetched) >= max_fetch:
+                    break
+                _, error = fetch(index)
+                if error is not None:
+                    return error
+                new_mails[index] = fetched[index]
+            synced_through = index
+
+    # 只保留連續的部分，synced_through 之後的信件下次同步再下載。
+    new_mails = {
+        index: mail for index, mail in new_mails.items() if index <= synced_through
+    }
+    mail_store.apply_sync(ptt_id, new_mails, new_indices, synced_through)
+
+    # 重新下載的信件會在 apply_sync 中先刪除再寫入，不算在被刪除的信件中。
+    downloaded = {_mail_key(mail) for mail in new_mails.values()}
+    deleted = sum(
+        1
+        for key, index in new_indices.items()
+        if index is None and key not in downloaded
+    )
+    return {
+        "success": True,
+        "new": len(new_mails),
+        "deleted": deleted,
+        "total": synced_through,
+        "fetched": len(fetched),
+        "complete": synced_through == newest_index,
+        "partial": bool(unresolved),
+        "unresolved": len(old_indices) - len(new_indices),
+    }
@@ -2,25 +2,138 @@ import os
 from typing import Dict, Any
 
 from fastmcp import FastMCP
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
 
 import api_post
 import api_ptt
+import api_server
 from _version import __version__
+from board_catalog import BoardCatalog
+from board_watch import BoardWatcher, DEFAULT_MIN_INTERVAL_SECONDS
+from cache import ResponseCache, _parse_ttl_config
+from keepalive import SessionKeepalive, DEFAULT_KEEPALIVE_INTERVAL_SECONDS
+from mail_store import MailStore, DEFAULT_MAX_MAILS
+from metrics import Metrics, MetricsMiddleware
+from post_store import PostStore, DEFAULT_EDIT_WINDOW_SECONDS, DEFAULT_MAX_POSTS
+from session_pool import SessionPool, _parse_accounts
+from storage import _open_storage
+from utils import _get_ptt_executor, _login_all
+from write_queue import WriteQueue, _parse_interval_config
 
 PTT_ID = os.getenv("PTT_ID")
 PTT_PW = os.getenv("PTT_PW")
+# 選用：額外的帳號，格式為 "id1:pw1,id2:pw2"，用來平行處理唯讀操作。
+PTT_ACCOUNTS = os.getenv("PTT_ACCOUNTS")
+# 選用：回應快取的最大筆數 (0 代表停用) 與各操作的快取秒數，例如 "get_user=60,get_board_info=0"。
+PTT_CACHE_SIZE = int(os.getenv("PTT_CACHE_SIZE", "1024"))
+PTT_CACHE_TTL = os.getenv("PTT_CACHE_TTL")
+# 選用：背景 keepalive 的檢查間隔秒數，0 代表停用。
+PTT_KEEPALIVE_INTERVAL = float(
+    os.getenv("PTT_KEEPALIVE_INTERVAL", str(DEFAULT_KEEPALIVE_INTERVAL_SECONDS))
+)
+# 選用：本地資料 (文章庫等) 存放的目錄，在 Docker 中請掛載成 volume 才能在重啟後保留。
+PTT_DATA_DIR = os.getenv(
+    "PTT_DATA_DIR", os.path.join(os.path.expanduser("~"), ".ptt_mcp_server")
+)
+# 選用：回應快取的儲存後端。memory 只存在行程記憶體中；sqlite 存放在 PTT_DATA_DIR，重啟後仍然保留，
+# 同一台主機上的多個伺服器行程也會共用。
+PTT_STORAGE = os.getenv("PTT_STORAGE", "memory")
+PTT_POST_EDIT_WINDOW = float(
+    os.getenv("PTT_POST_EDIT_WINDOW", str(DEFAULT_EDIT_WINDOW_SECONDS))
+)
+# 選用：文章庫最多保存的文章數與信件庫最多保存的信件數，超過時刪除最舊的資料。
+PTT_POST_STORE_SIZE = int(os.getenv("PTT_POST_STORE_SIZE", str(DEFAULT_MAX_POSTS)))
+PTT_MAIL_STORE_SIZE = int(os.getenv("PTT_MAIL_STORE_SIZE", str(DEFAULT_MAX_MAILS)))
+# 選用：追蹤看板新文章時的最短輪詢間隔秒數。
+PTT_WATCH_MIN_INTERVAL = float(
+    os.getenv("PTT_WATCH_MIN_INTERVAL", str(DEFAULT_MIN_INTERVAL_SECONDS))
+)
+# 選用：設為 0 時，找不到看板的錯誤不附上本地看板清單中相近的名稱。
+PTT_BOARD_CHECK = os.getenv("PTT_BOARD_CHECK", "1") != "0"
+# 選用：各寫入操作的最短間隔秒數，例如 "comment=3,post=30"，0 代表不限制。
+PTT_WRITE_INTERVAL = os.getenv("PTT_WRITE_INTERVAL")
+# 選用：登入時機。lazy 在第一次呼叫工具時登入，prewarm 在啟動時於背景登入，manual 只在呼叫 login 時登入。
+PTT_LOGIN_MODE = os.getenv("PTT_LOGIN_MODE", "lazy").lower()
 
-if not PTT_ID or not PTT_PW:
-    raise ValueError("PTT_ID and PTT_PW environment variables must be set.")
+if PTT_LOGIN_MODE not in ("lazy", "prewarm", "manual"):
+    raise ValueError("PTT_LOGIN_MODE must be one of 'lazy', 'prewarm' or 'manual'.")
 
 mcp: FastMCP = FastMCP(f"Ptt MCP Server v{__version__}")
 
-MEMORY_STORAGE: Dict[str, Any] = {"ptt_bot": None, "ptt_id": PTT_ID, "ptt_pw": PTT_PW}
+MEMORY_STORAGE: Dict[str, Any] = {
+    "ptt_bot": None,
+    "ptt_id": PTT_ID,
+    "ptt_pw": PTT_PW,
+    "auto_login": PTT_LOGIN_MODE != "manual",
+}
+
+MEMORY_STORAGE["metrics"] = Metrics()
+mcp.add_middleware(MetricsMiddleware(MEMORY_STORAGE["metrics"]))
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def prometheus_metrics(request: Request) -> PlainTextResponse:
+    # 只有使用 HTTP 傳輸時才會提供，stdio 模式請改用 get_metrics_prometheus 工具。
+    return PlainTextResponse(
+        MEMORY_STORAGE["metrics"].prometheus_text(),
+        media_type="text/plain; version=0.0.4",
+    )
 
 
 def main():
+    if not PTT_ID or not PTT_PW:
+        raise ValueError("PTT_ID and PTT_PW environment variables must be set.")
+
+    # 本地資料庫與背景元件在啟動時才建立，只 import 這個模組不會在 PTT_DATA_DIR 中建立檔案。
+    if PTT_CACHE_SIZE > 0:
+        MEMORY_STORAGE["response_cache"] = ResponseCache(
+            PTT_CACHE_SIZE,
+            _parse_ttl_config(PTT_CACHE_TTL),
+            _open_storage(PTT_STORAGE, PTT_DATA_DIR, PTT_CACHE_SIZE),
+            account=PTT_ID,
+        )
+
+    MEMORY_STORAGE["post_store"] = PostStore(
+        os.path.join(PTT_DATA_DIR, "posts.db"),
+        PTT_POST_EDIT_WINDOW,
+        PTT_POST_STORE_SIZE,
+    )
+    MEMORY_STORAGE["mail_store"] = MailStore(
+        os.path.join(PTT_DATA_DIR, "mails.db"), PTT_MAIL_STORE_SIZE
+    )
+
+    MEMORY_STORAGE["board_catalog"] = BoardCatalog(
+        MEMORY_STORAGE,
+        os.path.join(PTT_DATA_DIR, "boards.json"),
+        validate=PTT_BOARD_CHECK,
+    )
+    MEMORY_STORAGE["board_watcher"] = BoardWatcher(
+        MEMORY_STORAGE, PTT_WATCH_MIN_INTERVAL
+    )
+    MEMORY_STORAGE["write_queue"] = WriteQueue(
+        MEMORY_STORAGE, _parse_interval_config(PTT_WRITE_INTERVAL)
+    )
+
+    if PTT_ACCOUNTS:
+        MEMORY_STORAGE["session_pool"] = SessionPool(
+            MEMORY_STORAGE, _parse_accounts(PTT_ACCOUNTS)
+        )
+
     api_ptt.register_tools(mcp, MEMORY_STORAGE, __version__)
     api_post.register_tools(mcp, MEMORY_STORAGE, __version__)
+    api_server.register_tools(mcp, MEMORY_STORAGE, __version__)
+
+    MEMORY_STORAGE["board_catalog"].start()
+
+    if PTT_KEEPALIVE_INTERVAL > 0:
+        SessionKeepalive(MEMORY_STORAGE, PTT_KEEPALIVE_INTERVAL).start()
+
+    if PTT_LOGIN_MODE == "prewarm":
+        # 在 MCP 交握的同時於背景登入，第一個工具呼叫只需要等待登入完成。
+        MEMORY_STORAGE["ptt_warmup"] = _get_ptt_executor(MEMORY_STORAGE).submit(
+            _login_all, MEMORY_STORAGE
+        )
 
     mcp.run()
 
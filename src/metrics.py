@@ -0,0 +1,229 @@
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Deque, Dict, Any, List, Optional
+
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+
+# 每個名稱只保留最近這麼多筆延遲樣本來計算百分位數，避免記憶體無限成長。
+DEFAULT_MAX_SAMPLES = 1024
+
+_PERCENTILES = (50, 95, 99)
+
+# 目前這個工具呼叫底下的 PyPtt 呼叫統計；_run_in_ptt_executor 會把 context 帶進 PTT 執行緒。
+_current_tool_call: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "ptt_current_tool_call", default=None
+)
+
+
+def _percentile(sorted_samples: List[float], percentile: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    rank = max(
+        0,
+        min(
+            len(sorted_samples) - 1,
+            int(round(percentile / 100 * len(sorted_samples))) - 1,
+        ),
+    )
+    return sorted_samples[rank]
+
+
+class _Series:
+    def __init__(self, max_samples: int):
+        self.count = 0
+        self.error_codes: Counter = Counter()
+        self.total_seconds = 0.0
+        self.samples: Deque[float] = deque(maxlen=max_samples)
+        self.ptt_calls = 0
+        self.max_ptt_calls = 0
+        self.ptt_seconds = 0.0
+
+    def record(self, elapsed: float, code: Optional[str]) -> None:
+        self.count += 1
+        self.total_seconds += elapsed
+        self.samples.append(elapsed)
+        if code is not None:
+            self.error_codes[code] += 1
+
+    def summary(self, include_ptt_calls: bool) -> Dict[str, Any]:
+        sorted_samples = sorted(self.samples)
+        summary: Dict[str, Any] = {
+            "count": self.count,
+            "errors": sum(self.error_codes.values()),
+            "error_codes": dict(self.error_codes),
+            "total_seconds": round(self.total_seconds, 6),
+        }
+        for percentile in _PERCENTILES:
+            summary[f"p{percentile}_seconds"] = round(
+                _percentile(sorted_samples, percentile), 6
+            )
+        if include_ptt_calls:
+            summary["ptt_calls"] = self.ptt_calls
+            summary["ptt_calls_per_call"] = (
+                round(self.ptt_calls / self.count, 3) if self.count else 0.0
+            )
+            summary["max_ptt_calls"] = self.max_ptt_calls
+            # 工具總耗時扣掉 PyPtt 的時間，就是伺服器自己 (搜尋邏輯、序列化) 花掉的時間。
+            summary["ptt_seconds"] = round(self.ptt_seconds, 6)
+        return summary
+
+
+class Metrics:
+    """記錄每個 MCP 工具與每個 PyPtt 操作的呼叫次數、錯誤碼與延遲百分位數。"""
+
+    def __init__(self, max_samples: int = DEFAULT_MAX_SAMPLES):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._created_at = time.monotonic()
+        self._tools: Dict[str, _Series] = {}
+        self._ptt_methods: Dict[str, _Series] = {}
+        # 和其他相同的呼叫共用結果、沒有另外送到 PTT 的次數。
+        self._coalesced_calls: Dict[str, int] = {}
+
+    def _series(self, table: Dict[str, _Series], name: str) -> _Series:
+        series = table.get(name)
+        if series is None:
+            series = table[name] = _Series(self.max_samples)
+        return series
+
+    def record_ptt_call(
+        self, method_name: str, elapsed: float, code: Optional[str], attempts: int = 1
+    ) -> None:
+        with self._lock:
+            self._series(self._ptt_methods, method_name).record(elapsed, code)
+
+        tool_call = _current_tool_call.get()
+        if tool_call is not None:
+            tool_call["ptt_calls"] += attempts
+            tool_call["ptt_seconds"] += elapsed
+
+    def record_coalesced_call(self, method_name: str) -> None:
+        with self._lock:
+            self._coalesced_calls[method_name] = (
+                self._coalesced_calls.get(method_name, 0) + 1
+            )
+
+    def record_tool_call(
+        self,
+        tool_name: str,
+        elapsed: float,
+        code: Optional[str],
+        ptt_calls: int,
+        ptt_seconds: float,
+    ) -> None:
+        with self._lock:
+            series = self._series(self._tools, tool_name)
+            series.record(elapsed, code)
+            series.ptt_calls += ptt_calls
+            series.max_ptt_calls = max(series.max_ptt_calls, ptt_calls)
+            series.ptt_seconds += ptt_seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "uptime_seconds": round(time.monotonic() - self._created_at, 3),
+                "tools": {
+                    name: series.summary(True)
+                    for name, series in sorted(self._tools.items())
+                },
+                "ptt_methods": {
+                    name: series.summary(False)
+                    for name, series in sorted(self._ptt_methods.items())
+                },
+                "coalesced_calls": dict(sorted(self._coalesced_calls.items())),
+            }
+
+    def prometheus_text(self) -> str:
+        """以 Prometheus text exposition format 輸出。"""
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP ptt_mcp_uptime_seconds Seconds since the server started.",
+            "# TYPE ptt_mcp_uptime_seconds gauge",
+            f"ptt_mcp_uptime_seconds {snapshot['uptime_seconds']}",
+        ]
+        for prefix, label, table in (
+            ("ptt_mcp_tool", "tool", snapshot["tools"]),
+            ("ptt_mcp_ptt_call", "method", snapshot["ptt_methods"]),
+        ):
+            lines.append(f"# TYPE {prefix}_seconds summary")
+            for name, summary in table.items():
+                for percentile in _PERCENTILES:
+                    lines.append(
+                        f'{prefix}_seconds{{{label}="{name}",quantile="{percentile / 100}"}} '
+                        f'{summary[f"p{percentile}_seconds"]}'
+                    )
+                lines.append(
+                    f'{prefix}_seconds_sum{{{label}="{name}"}} {summary["total_seconds"]}'
+                )
+                lines.append(
+                    f'{prefix}_seconds_count{{{label}="{name}"}} {summary["count"]}'
+                )
+
+            lines.append(f"# TYPE {prefix}_errors_total counter")
+            for name, summary in table.items():
+                for code, count in sorted(summary["error_codes"].items()):
+                    lines.append(
+                        f'{prefix}_errors_total{{{label}="{name}",code="{code}"}} {count}'
+                    )
+
+        lines.append(
+            "# HELP ptt_mcp_tool_ptt_calls_total PyPtt calls made while serving each tool."
+        )
+        lines.append("# TYPE ptt_mcp_tool_ptt_calls_total counter")
+        for name, summary in snapshot["tools"].items():
+            lines.append(
+                f'ptt_mcp_tool_ptt_calls_total{{tool="{name}"}} {summary["ptt_calls"]}'
+            )
+        lines.append("# TYPE ptt_mcp_tool_ptt_seconds_total counter")
+        for name, summary in snapshot["tools"].items():
+            lines.append(
+                f'ptt_mcp_tool_ptt_seconds_total{{tool="{name}"}} {summary["ptt_seconds"]}'
+            )
+        lines.append(
+            "# HELP ptt_mcp_coalesced_calls_total Calls that shared an identical in-flight PyPtt call."
+        )
+        lines.append("# TYPE ptt_mcp_coalesced_calls_total counter")
+        for name, count in snapshot["coalesced_calls"].items():
+            lines.append(f'ptt_mcp_coalesced_calls_total{{method="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+def _response_error_code(result: Any) -> Optional[str]:
+    structured_content = getattr(result, "structured_content", None)
+    if not isinstance(structured_content, dict):
+        return None
+    if "success" not in structured_content and isinstance(
+        structured_content.get("result"), dict
+    ):
+        structured_content = structured_content["result"]
+    if structured_content.get("success") is False:
+        return structured_content.get("code") or "ERROR"
+    return None
+
+
+class MetricsMiddleware(Middleware):
+    """量測每個工具呼叫的總耗時，以及期間內發出的 PyPtt 呼叫次數。"""
+
+    def __init__(self, metrics: Metrics):
+        self._metrics = metrics
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        tool_call = {"ptt_calls": 0, "ptt_seconds": 0.0}
+        token = _current_tool_call.set(tool_call)
+        start_time = time.perf_counter()
+        code: Optional[str] = "EXCEPTION"
+        try:
+            result = await call_next(context)
+            code = _response_error_code(result)
+            return result
+        finally:
+            _current_tool_call.reset(token)
+            self._metrics.record_tool_call(
+                context.message.name,
+                time.perf_counter() - start_time,
+                code,
+                int(tool_call["ptt_calls"]),
+                tool_call["ptt_seconds"],
+            )
@@ -0,0 +1,479 @@
+import bisect
+import math
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+from post_url import _PTT_TIMEZONE, _post_timestamp
+from utils import NEW_INDEX_BOARD, _call_ptt_service
+
+# 只有這些錯誤代表該編號確實沒有文章 (沒有日期、可以略過)；其他錯誤 (例如斷線) 都要回傳給呼叫端，
+# 不能當成已刪除的文章，也不能寫入共用的取樣表。
+_MISSING_POST_CODES = {"NO_SUCH_POST"}
+
+# _probe_near 一次最多探測的編號數；沒找到有日期的編號時交回給搜尋重新挑選位置，
+# 避免一大段被刪除的文章讓一次探測變成逐篇掃描。
+MAX_NEAR_PROBES = 16
+
+# 一次查詢最多涵蓋的天數。
+MAX_RANGE_DAYS = 366
+
+
+def _parse_date_str(date_str: str) -> datetime:
+    """解析使用者輸入的日期，"MM/DD" 視為今年。"""
+    date_str = date_str.strip()
+    if date_str.count("/") == 2:
+        return datetime.strptime(date_str, "%Y/%m/%d")
+
+    current_year = datetime.now().year
+    return datetime.strptime(f"{current_year}/{date_str}", "%Y/%m/%d")
+
+
+def _parse_list_date(list_date: str) -> Optional[Tuple[int, int]]:
+    """解析文章列表上的 " 9/06"，回傳 (月, 日)；列表日期沒有年份。"""
+    month, sep, day = list_date.strip().partition("/")
+    try:
+        month_day = int(month), int(day)
+    except ValueError:
+        return None
+    if not sep or not 1 <= month_day[0] <= 12 or not 1 <= month_day[1] <= 31:
+        return None
+    return month_day
+
+
+def _date_in_year(year: int, month_day: Tuple[int, int]) -> Optional[datetime]:
+    try:
+        return datetime(year, *month_day)
+    except ValueError:
+        # 2/29 在非閏年不存在。
+        return None
+
+
+def _closest_date(
+    month_day: Tuple[int, int], reference: datetime
+) -> Optional[datetime]:
+    candidates = [
+        _date_in_year(reference.year + offset, month_day) for offset in (-1, 0, 1)
+    ]
+    dates = [date for date in candidates if date is not None]
+    return min(dates, key=lambda date: abs(date - reference)) if dates else None
+
+
+def _latest_date_not_after(
+    month_day: Tuple[int, int], reference: datetime
+) -> Optional[datetime]:
+    for year in range(reference.year, reference.year - 5, -1):
+        date = _date_in_year(year, month_day)
+        if date is not None and date <= reference:
+            return date
+    return None
+
+
+def _earliest_date_not_before(
+    month_day: Tuple[int, int], reference: datetime
+) -> Optional[datetime]:
+    for year in range(reference.year, reference.year + 5):
+        date = _date_in_year(year, month_day)
+        if date is not None and date >= reference:
+            return date
+    return None
+
+
+def _get_board_index_map(memory_storage: Dict[str, Any], board: str) -> Dict[str, Any]:
+    """取得看板的 index -> 日期取樣表，所有日期查詢共用同一份。
+
+    結構: {'lock': threading.Lock, 'newest_index': int, 'indices': List[int] (已排序),
+           'list_dates': {index: (月, 日) | None}, 'timestamps': {index: 發文時間戳記},
+           'dates': {index: datetime | None}}
+    list_dates 為 None 代表該編號已經探測過，但沒有可用的日期。
+    dates 是補上年份之後的結果，由 _resolve_dates 從 list_dates 與 timestamps 推算。
+    同一個看板可能同時有多個查詢，讀寫取樣表時都要持有 lock；向 PTT 查詢時則不持有。
+    """
+    board_maps = memory_storage.setdefault("board_index_map", {})
+    return board_maps.setdefault(
+        board.lower(),
+        {
+            "lock": threading.Lock(),
+            "newest_index": 0,
+            "indices": [],
+            "list_dates": {},
+            "timestamps": {},
+            "dates": {},
+        },
+    )
+
+
+def _refresh_newest_index(
+    memory_storage: Dict[str, Any], board: str, board_map: Dict[str, Any]
+) -> Dict[str, Any]:
+    response = _call_ptt_service(
+        memory_storage,
+        "get_newest_index",
+        index_type=NEW_INDEX_BOARD,
+        board=board,
+    )
+    if not response.get("success"):
+        return response
+
+    newest_index = response.get("data") or 0
+    with board_map["lock"]:
+        if newest_index < board_map["newest_index"]:
+            # 文章被清除後編號會往前移，舊的取樣已經不可信。
+            board_map["indices"].clear()
+            board_map["list_dates"].clear()
+            board_map["timestamps"].clear()
+            board_map["dates"].clear()
+        # 編號只增加時舊的取樣仍然有效，之後只有新增的尾端需要探測。
+        board_map["newest_index"] = newest_index
+    return response
+
+
+def _resolve_dates(board_map: Dict[str, Any]) -> None:
+    """替每個取樣補上年份。
+
+    還在的文章可以從網址中的發文時間得到年份；已刪除的文章沒有網址，
+    利用「編號越大日期越晚」從前後最近的、有發文時間的取樣推算：
+    從前一個往後推取不早於它的最早日期，從後一個 (沒有時就用今天) 往前推取不晚於它的最晚日期。
+    兩者相同時年份才確定；不同代表中間可能跨過一年以上，只有在 MAX_NEAR_PROBES 個編號內
+    就有發文時間可以參考時才採用最近的那一個，否則保持 None，讓搜尋先去探測附近還在的文章。
+    """
+    indices = board_map["indices"]
+    list_dates = board_map["list_dates"]
+    timestamps = board_map["timestamps"]
+    dates: Dict[int, Optional[datetime]] = {}
+
+    # 有發文時間的取樣: {編號: 日期}，stamped 為其編號 (已排序)。
+    stamped_dates: Dict[int, datetime] = {}
+    for index in indices:
+        if index in timestamps and list_dates[index] is not None:
+            posted_at = datetime.fromtimestamp(
+                timestamps[index], _PTT_TIMEZONE
+            ).replace(tzinfo=None)
+            date = _closest_date(list_dates[index], posted_at)
+            dates[index] = date
+            if date is not None:
+                stamped_dates[index] = date
+    stamped = list(stamped_dates)
+
+    now = datetime.now()
+    for index in indices:
+        if index in dates:
+            continue
+        month_day = list_dates[index]
+        if month_day is None:
+            dates[index] = None
+            continue
+
+        position = bisect.bisect_left(stamped, index)
+        before = stamped[position - 1] if position else None
+        after = stamped[position] if position < len(stamped) else None
+        earliest = (
+            _earliest_date_not_before(month_day, stamped_dates[before])
+            if before is not None
+            else None
+        )
+        latest = _latest_date_not_after(
+            month_day, stamped_dates[after] if after is not None else now
+        )
+
+        date = None
+        if earliest is not None and earliest == latest:
+            date = earliest
+        elif (
+            after is not None
+            and after - index <= MAX_NEAR_PROBES
+            and (before is None or after - index <= index - before)
+        ):
+            date = latest
+        elif before is not None and index - before <= MAX_NEAR_PROBES:
+            date = (
+                earliest
+                if latest is None or earliest is None or earliest <= latest
+                else None
+            )
+        dates[index] = date
+
+    board_map["dates"] = dates
+    board_map["time_keys"] = _estimate_time_keys(board_map)
+
+
+def _estimate_time_keys(board_map: Dict[str, Any]) -> Dict[int, float]:
+    """每個有日期的取樣的發文時間 (秒)，給內插使用。
+
+    已刪除的文章沒有時間戳記，用前後最近的兩個時間戳記依編號內插，並限制在它自己的那一天之內。
+    內插只使用 _resolve_dates 確定了年份的取樣；年份無法確定 (日期為 None) 的取樣不會成為內插的端點，
+    以免從錯誤的年份內插出離分界很遠的位置。
+    """
+    timestamps = board_map["timestamps"]
+    dates = board_map["dates"]
+    stamped = [
+        index
+        for index in board_map["indices"]
+        if index in timestamps and dates[index] is not None
+    ]
+
+    time_keys: Dict[int, float] = {}
+    for index, date in dates.items():
+        if date is None:
+            continue
+        if index in timestamps:
+            time_keys[index] = timestamps[index]
+            continue
+
+        day_start = _day_start_timestamp(date)
+        position = bisect.bisect_left(stamped, index)
+        if 0 < position < len(stamped):
+            before, after = stamped[position - 1], stamped[position]
+            estimate = timestamps[before] + (timestamps[after] - timestamps[before]) * (
+                index - before
+            ) / (after - before)
+        else:
+            estimate = day_start + 43200
+        time_keys[index] = max(day_start, min(day_start + 86399, estimate))
+    return time_keys
+
+
+def _probe(
+    memory_storage: Dict[str, Any], board: str, board_map: Dict[str, Any], index: int
+) -> Tuple[bool, Optional[Dict[str, Any]]]:
+    """探測一個編號，回傳 (是否有日期, 錯誤)。"""
+    with board_map["lock"]:
+        if index in board_map["list_dates"]:
+            return board_map["list_dates"][index] is not None, None
+
+    post_response = _call_ptt_service(
+        memory_storage,
+        "get_post",
+        board=board,
+        index=index,
+        query=True,
+    )
+    if (
+        not post_response.get("success")
+        and post_response.get("code") not in _MISSING_POST_CODES
+    ):
+        return False, post_response
+
+    post = post_response.get("data") if post_response.get("success") else None
+    month_day = (
+        _parse_list_date(post["list_date"]) if post and post.get("list_date") else None
+    )
+    timestamp = _post_timestamp(post) if post else None
+    with board_map["lock"]:
+        if index not in board_map["list_dates"]:
+            if timestamp is not None:
+                board_map["timestamps"][index] = timestamp
+            board_map["list_dates"][index] = month_day
+            bisect.insort(board_map["indices"], index)
+    return month_day is not None, None
+
+
+def _probe_near(
+    memory_storage: Dict[str, Any],
+    board: str,
+    board_map: Dict[str, Any],
+    low: int,
+    high: int,
+    center: int,
+) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+    """在開區間 (low, high) 中，從 center 往外探測尚未探測過的編號，直到找到一個有日期的編號。
+
+    最多探測 MAX_NEAR_PROBES 個編號；任何一次探測失敗 (不是文章不存在) 就停止並回傳錯誤。
+    """
+    list_dates = board_map["list_dates"]
+    probes = 0
+    for offset in range(high - low):
+        if probes >= MAX_NEAR_PROBES:
+            break
+        for index in (center + offset, center - offset) if offset else (center,):
+            with board_map["lock"]:
+                if not low < index < high or index in list_dates:
+                    continue
+            probes += 1
+            has_date, error = _probe(memory_storage, board, board_map, index)
+            if error is not None:
+                return None, error
+            if has_date:
+                return index, None
+    return None, None
+
+
+def _has_unprobed(board_map: Dict[str, Any], low: int, high: int) -> bool:
+    """開區間 (low, high) 中是否還有尚未探測的編號。"""
+    indices = board_map["indices"]
+    probed = bisect.bisect_left(indices, high) - bisect.bisect_right(indices, low)
+    return probed < high - low - 1
+
+
+def _split(
+    dated_indices: List[int],
+    dated_dates: List[datetime],
+    newest_index: int,
+    threshold: datetime,
+) -> Tuple[int, Optional[datetime], int, Optional[datetime]]:
+    """找出 (早於 threshold 的最大編號, 其日期, 不早於 threshold 的最小編號, 其日期)。"""
+    position = bisect.bisect_left(dated_dates, threshold)
+    below = dated_indices[position - 1] if position else 0
+    below_date = dated_dates[position - 1] if position else None
+    above = (
+        dated_indices[position] if position < len(dated_indices) else newest_index + 1
+    )
+    above_date = dated_dates[position] if position < len(dated_dates) else None
+    return below, below_date, above, above_date
+
+
+def _day_start_timestamp(date: datetime) -> float:
+    return date.replace(tzinfo=_PTT_TIMEZONE).timestamp()
+
+
+def _estimate_index(
+    board_map: Dict[str, Any], low: int, high: int, threshold: datetime
+) -> int:
+    """估計 threshold 這個分界大約在開區間 (low, high) 的哪個編號。
+
+    用發文時間 (秒) 最接近分界的兩個取樣做內插或外插 (割線法)：
+    只用區間兩端的話，一端常常離分界很遠，中間的發文速度變化 (例如深夜比較少人發文) 會讓估計失準。
+    """
+    time_keys = board_map["time_keys"]
+    threshold_key = _day_start_timestamp(threshold)
+    nearest = sorted(
+        (index for index in board_map["indices"] if index in time_keys),
+        key=lambda index: abs(time_keys[index] - threshold_key),
+    )
+    for first in nearest[:1]:
+        for second in nearest[1:]:
+            if time_keys[second] != time_keys[first]:
+                rate = (second - first) / (time_keys[second] - time_keys[first])
+                return first + round((threshold_key - time_keys[first]) * rate)
+    return (low + high) // 2
+
+
+def _next_probe(
+    board_map: Dict[str, Any],
+    low: int,
+    high: int,
+    threshold: datetime,
+    state: Dict[str, Any],
+) -> int:
+    """決定分界 threshold 下一個要探測的編號 (interpolation-sequential search)。
+
+    還沒有兩端時，先探測最舊與最新的文章當作錨點。之後先內插一次，
+    再從內插的位置朝分界以 √區間大小 為起點、每次加倍的距離跨步 (galloping)，
+    跨過分界後新的區間已經很小，再重新內插。
+    """
+    if low < 1:
+        return 1
+    if high > board_map["newest_index"]:
+        return board_map["newest_index"]
+
+    last = state.get("last")
+    step = state.get("step")
+    direction = state.get("direction", 0)
+    if step and last == low and direction >= 0:
+        center, state["direction"], state["step"] = low + step, 1, step * 2
+    elif step and last == high and direction <= 0:
+        center, state["direction"], state["step"] = high - step, -1, step * 2
+    else:
+        center = _estimate_index(board_map, low, high, threshold)
+        state["direction"], state["step"] = 0, max(1, math.isqrt(high - low))
+
+    center = max(low + 1, min(high - 1, center))
+    state["last"] = center
+    return center
+
+
+def _find_post_index_ranges(
+    memory_storage: Dict[str, Any], board: str, start_date: datetime, end_date: datetime
+) -> Dict[str, Any]:
+    """一次搜尋出 start_date ~ end_date 每一天的編號範圍。
+
+    每一天的起點都是一個「日期 < 當天」與「日期 >= 當天」的分界，
+    所有分界共用同一份取樣表，每次只探測一個還沒確定的分界，探測位置由兩側已知的日期內插。
+    """
+    board_map = _get_board_index_map(memory_storage, board)
+
+    newest_index_response = _refresh_newest_index(memory_storage, board, board_map)
+    if not newest_index_response.get("success"):
+        return {
+            "success": False,
+            "message": f"Failed to get newest index for board {board}: {newest_index_response.get('message')}",
+        }
+
+    newest_index = board_map["newest_index"]
+    if newest_index < 1:
+        return {"success": False, "message": f"No posts found for board {board}."}
+
+    day_count = (end_date - start_date).days + 1
+    thresholds = [
+        start_date + timedelta(days=offset) for offset in range(day_count + 1)
+    ]
+    # 每個分界的搜尋狀態，見 _next_probe。
+    search_states: Dict[datetime, Dict[str, Any]] = {}
+
+    while True:
+        with board_map["lock"]:
+            _resolve_dates(board_map)
+            dates = board_map["dates"]
+            dated_indices = [
+                index for index in board_map["indices"] if dates[index] is not None
+            ]
+            dated_dates = [dates[index] for index in dated_indices]
+
+            splits = [
+                _split(dated_indices, dated_dates, newest_index, threshold)
+                for threshold in thresholds
+            ]
+            pending = next(
+                (
+                    (threshold, split)
+                    for threshold, split in zip(thresholds, splits)
+                    if _has_unprobed(board_map, split[0], split[2])
+                ),
+                None,
+            )
+            if pending is None:
+                break
+
+            threshold, (low, _, high, _) = pending
+            center = _next_probe(
+                board_map, low, high, threshold, search_states.setdefault(threshold, {})
+            )
+        _, error = _probe_near(memory_storage, board, board_map, low, high, center)
+        if error is not None:
+            return error
+
+    days = []
+    for offset in range(day_count):
+        start_index = splits[offset][2]
+        end_index = splits[offset + 1][0]
+        has_posts = (
+            start_index <= end_index and start_index <= newest_index and end_index >= 1
+        )
+        days.append(
+            {
+                "date": thresholds[offset].strftime("%Y/%m/%d"),
+                "start_index": start_index if has_posts else None,
+                "end_index": end_index if has_posts else None,
+            }
+        )
+    return {"success": True, "data": days}
+
+
+def _find_post_index_range(
+    memory_storage: Dict[str, Any], board: str, target_date: datetime
+) -> Dict[str, Any]:
+    response = _find_post_index_ranges(memory_storage, board, target_date, target_date)
+    if not response.get("success"):
+        return response
+
+    day = response["data"][0]
+    if day["start_index"] is None:
+        return {
+            "success": False,
+            "message": f"在 {board} 板找不到日期 {target_date} 的任何文章。",
+        }
+    return {
+        "success": True,
+        "start_index": day["start_index"],
+        "end_index": day["end_index"],
+    }
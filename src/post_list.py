@@ -0,0 +1,147 @@
+from typing import Dict, Any, Generator, List, Optional, Tuple
+
+from fastmcp import Context
+
+from post_index import _MISSING_POST_CODES
+from post_store import _get_post
+from projection import _project
+from utils import POST_STATUS_EXISTS, _run_in_ptt_executor
+
+# 單次批次呼叫最多回傳的文章數，避免一次回應過大。
+MAX_POSTS_PER_CALL = 500
+
+
+def _iter_posts(
+    memory_storage: Dict[str, Any],
+    board: str,
+    start_index: int,
+    end_index: int,
+    query: bool,
+) -> Generator[
+    Tuple[int, Optional[Dict[str, Any]], Optional[Dict[str, Any]]], None, None
+]:
+    """依序走訪看板文章，每次產生 (index, post, error)。
+
+    已刪除或不存在 (NO_SUCH_POST) 的文章會產生 (index, None, None)；
+    其他錯誤 (例如斷線) 產生 (index, None, error) 後停止，讓呼叫端可以從 index 繼續。
+    """
+    for index in range(start_index, end_index + 1):
+        response = _get_post(memory_storage, board, None, index, query, None)
+        if not response.get("success"):
+            if response.get("code") not in _MISSING_POST_CODES:
+                yield index, None, response
+                return
+            yield index, None, None
+            continue
+
+        post = response.get("data")
+        if not post or post.get("post_status") != POST_STATUS_EXISTS:
+            yield index, None, None
+            continue
+
+        yield index, post, None
+
+
+def _get_posts(
+    memory_storage: Dict[str, Any],
+    board: str,
+    start_index: int,
+    end_index: int,
+    query: bool,
+    fields: Optional[List[str]],
+    limit: int,
+    cursor: Optional[int],
+) -> Dict[str, Any]:
+    if start_index < 1 or end_index < start_index:
+        return {
+            "success": False,
+            "message": f"Invalid index range: {start_index} ~ {end_index}.",
+        }
+
+    limit = max(1, min(limit, MAX_POSTS_PER_CALL))
+    first_index = start_index if cursor is None else max(start_index, cursor)
+
+    posts: List[Dict[str, Any]] = []
+    skipped = 0
+    for index, post, error in _iter_posts(
+        memory_storage, board, first_index, end_index, query
+    ):
+        if error is not None:
+            # 回傳已取得的部分，並讓客戶端可以從失敗的編號繼續。
+            return {**error, "data": posts, "skipped": skipped, "next_cursor": index}
+        if post is None:
+            skipped += 1
+            continue
+
+        posts.append(_project(post, fields))
+        if len(posts) >= limit:
+            next_cursor = index + 1 if index < end_index else None
+            return {
+                "success": True,
+                "data": posts,
+                "skipped": skipped,
+                "next_cursor": next_cursor,
+            }
+
+    return {"success": True, "data": posts, "skipped": skipped, "next_cursor": None}
+
+
+async def _crawl_posts(
+    memory_storage: Dict[str, Any],
+    ctx: Context,
+    board: str,
+    start_index: int,
+    end_index: int,
+    query: bool,
+    fields: Optional[List[str]],
+    page_size: int,
+    cursor: Optional[int],
+) -> Dict[str, Any]:
+    if start_index < 1 or end_index < start_index:
+        return {
+            "success": False,
+            "message": f"Invalid index range: {start_index} ~ {end_index}.",
+        }
+
+    page_size = max(1, min(page_size, MAX_POSTS_PER_CALL))
+    first_index = start_index if cursor is None else max(start_index, cursor)
+    total = end_index - start_index + 1
+
+    # 產生器一次只前進一篇，每一步都在 PTT 專用執行緒上執行；
+    # 伺服器最多只保留一頁的文章，其餘由客戶端用 next_cursor 接續。
+    iterator = _iter_posts(memory_storage, board, first_index, end_index, query)
+    posts: List[Dict[str, Any]] = []
+    skipped = 0
+    while True:
+        item = await _run_in_ptt_executor(memory_storage, next, iterator, None)
+        if item is None:
+            return {
+                "success": True,
+                "data": posts,
+                "skipped": skipped,
+                "next_cursor": None,
+            }
+
+        index, post, error = item
+        if error is not None:
+            return {**error, "data": posts, "skipped": skipped, "next_cursor": index}
+
+        if post is None:
+            skipped += 1
+            message = f"{board} #{index}: 已刪除"
+        else:
+            posts.append(_project(post, fields))
+            message = f"{board} #{index}: {post.get('title')}"
+        await ctx.report_progress(
+            progress=index - start_index + 1, total=total, message=message
+        )
+
+        if len(posts) >= page_size:
+            iterator.close()
+            next_cursor = index + 1 if index < end_index else None
+            return {
+                "success": True,
+                "data": posts,
+                "skipped": skipped,
+                "next_cursor": next_cursor,
+            }
@@ -0,0 +1,444 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from post_url import _post_timestamp
+from storage import _connect
+from utils import POST_STATUS_EXISTS, _call_ptt_service
+
+# 文章發佈超過這個秒數後，視為內文不會再變動，之後只有推文會增加。
+DEFAULT_EDIT_WINDOW_SECONDS = 86400
+
+# 文章庫最多保存的文章數，超過時刪除最久以前下載的文章 (連同全文檢索索引與編號對應)。
+DEFAULT_MAX_POSTS = 20000
+
+# FTS5 的 unicode61 斷詞器會把連續的中日韓文字當成一個詞，這裡先在每個字前後補空白，
+# 讓每個字各自成為一個詞，查詢時再用片語 ("政 治") 比對連續的字，等同於子字串比對。
+_CJK_PATTERN = re.compile(
+    r"([\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af])"
+)
+
+# search 沒有指定筆數時最多回傳的文章數，以及筆數的上限。
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 200
+
+# search 回傳的欄位；完整文章請再用 get_post 以 AID 取得 (會直接從本地文章庫回傳)。
+SEARCH_RESULT_FIELDS = (
+    "board",
+    "aid",
+    "index",
+    "title",
+    "author",
+    "date",
+    "url",
+    "push_number",
+)
+
+
+def _fts_text(text: Optional[str]) -> str:
+    return _CJK_PATTERN.sub(r" \1 ", text or "")
+
+
+def _fts_phrase(keyword: str) -> str:
+    return '"' + " ".join(_fts_text(keyword).split()).replace('"', '""') + '"'
+
+
+def _author_id(author: Optional[str]) -> str:
+    """PyPtt 的作者欄位是 "CodingMan (碼農)"，只取前面的帳號。"""
+    return (author or "").split(" ")[0]
+
+
+def _fts_row(post: Dict[str, Any]) -> Tuple[str, str, str, str]:
+    comments = "\n".join(
+        comment.get("content") or "" for comment in post.get("comments") or []
+    )
+    return (
+        _fts_text(post.get("title")),
+        _author_id(post.get("author")),
+        _fts_text(post.get("content")),
+        _fts_text(comments),
+    )
+
+
+class PostStore:
+    """以 (board, aid) 為鍵、存放完整文章 (內文、資訊與推文) 的 SQLite 資料庫，重啟後仍然保留。"""
+
+    def __init__(
+        self,
+        db_path: str,
+        edit_window_seconds: float = DEFAULT_EDIT_WINDOW_SECONDS,
+        max_posts: int = DEFAULT_MAX_POSTS,
+    ):
+        self.db_path = db_path
+        self.edit_window_seconds = edit_window_seconds
+        self.max_posts = max_posts
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = _connect(db_path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS posts ("
+                " board TEXT NOT NULL,"
+                " aid TEXT NOT NULL,"
+                " post_json TEXT NOT NULL,"
+                " comment_count INTEGER NOT NULL,"
+                " post_time INTEGER,"
+                " fetched_at REAL NOT NULL,"
+                " PRIMARY KEY (board, aid))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS post_index ("
+                " board TEXT NOT NULL,"
+                " post_index INTEGER NOT NULL,"
+                " aid TEXT NOT NULL,"
+                " PRIMARY KEY (board, post_index))"
+            )
+            # 每個看板最後看到的最新編號，用來發現編號往前移 (見 observe_newest_index)。
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS board_newest ("
+                " board TEXT PRIMARY KEY,"
+                " newest_index INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS posts_post_time ON posts (post_time)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS posts_fetched_at ON posts (fetched_at)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS post_index_aid ON post_index (board, aid)"
+            )
+            self.search_enabled = self._create_search_index()
+            self._evict()
+
+    def _create_search_index(self) -> bool:
+        """建立全文檢索索引 (FTS5)，rowid 對應 posts 的 rowid；舊的資料庫第一次啟動時會補上既有文章。"""
+        exists = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'posts_fts'"
+        ).fetchone()
+        if exists:
+            return True
+        try:
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE posts_fts USING fts5(title, author, content, comments)"
+            )
+        except sqlite3.OperationalError:
+            # 編譯時沒有 FTS5 的 SQLite，只停用搜尋。
+            return False
+
+        for rowid, post_json in self._conn.execute(
+            "SELECT rowid, post_json FROM posts"
+        ).fetchall():
+            self._conn.execute(
+                "INSERT INTO posts_fts (rowid, title, author, content, comments) VALUES (?, ?, ?, ?, ?)",
+                (rowid, *_fts_row(json.loads(post_json))),
+            )
+        return True
+
+    def get(self, board: str, aid: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT post_json FROM posts WHERE board = ? AND aid = ?",
+                (board.lower(), aid),
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def put(self, board: str, post: Dict[str, Any]) -> None:
+        with self._lock, self._conn:
+            if self.search_enabled:
+                self._conn.execute(
+                    "DELETE FROM posts_fts WHERE rowid IN (SELECT rowid FROM posts WHERE board = ? AND aid = ?)",
+                    (board.lower(), post["aid"]),
+                )
+            cursor = self._conn.execute(
+                "INSERT OR REPLACE INTO posts (board, aid, post_json, comment_count, post_time, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    board.lower(),
+                    post["aid"],
+                    json.dumps(post, ensure_ascii=False),
+                    len(post.get("comments") or []),
+                    _post_timestamp(post),
+                    time.time(),
+                ),
+            )
+            if self.search_enabled:
+                self._conn.execute(
+                    "INSERT INTO posts_fts (rowid, title, author, content, comments) VALUES (?, ?, ?, ?, ?)",
+                    (cursor.lastrowid, *_fts_row(post)),
+                )
+            if post.get("index"):
+                self._record_index(board, post["index"], post["aid"])
+            self._evict()
+
+    def record_index(self, board: str, index: int, aid: str) -> None:
+        with self._lock, self._conn:
+            self._record_index(board, index, aid)
+            self._evict()
+
+    def _record_index(self, board: str, index: int, aid: str) -> None:
+        board = board.lower()
+        # 同一篇文章換了編號，或同一個編號換了文章，代表看板已經重新編號，其他對應也不可信。
+        renumbered = self._conn.execute(
+            "SELECT 1 FROM post_index WHERE board = ? AND ((aid = ? AND post_index != ?) OR (post_index = ? AND aid != ?))"
+            " LIMIT 1",
+            (board, aid, index, index, aid),
+        ).fetchone()
+        if renumbered:
+            self._conn.execute("DELETE FROM post_index WHERE board = ?", (board,))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO post_index (board, post_index, aid) VALUES (?, ?, ?)",
+            (board, index, aid),
+        )
+
+    def observe_newest_index(self, board: str, newest_index: int) -> None:
+        """記錄看板的最新編號。
+
+        PTT 清除已刪除的文章後，後面文章的編號都會往前移，最新編號也會變小；
+        這時刪除這個看板所有的 編號 -> AID 對應，之後以編號取文會重新向 PTT 查詢。
+        """
+        board = board.lower()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT newest_index FROM board_newest WHERE board = ?", (board,)
+            ).fetchone()
+            if row is not None and newest_index < row[0]:
+                self._conn.execute("DELETE FROM post_index WHERE board = ?", (board,))
+            else:
+                self._conn.execute(
+                    "DELETE FROM post_index WHERE board = ? AND post_index > ?",
+                    (board, newest_index),
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO board_newest (board, newest_index) VALUES (?, ?)",
+                (board, newest_index),
+            )
+
+    def _evict(self) -> int:
+        """刪除超過 max_posts 的文章，以及它們的全文檢索索引與編號對應。
+
+        只查詢過資訊、沒有存下內文的文章也會留下編號對應，所以編號對應另外最多保留 max_posts 的兩倍，
+        依寫入先後淘汰；淘汰的只是捷徑，之後以編號取文時會重新向 PTT 查詢。
+        """
+        evicted = self._conn.execute(
+            "SELECT rowid, board, aid FROM posts ORDER BY fetched_at DESC LIMIT -1 OFFSET ?",
+            (self.max_posts,),
+        ).fetchall()
+        if evicted:
+            if self.search_enabled:
+                self._conn.executemany(
+                    "DELETE FROM posts_fts WHERE rowid = ?",
+                    [(rowid,) for rowid, _, _ in evicted],
+                )
+            self._conn.executemany(
+                "DELETE FROM posts WHERE rowid = ?",
+                [(rowid,) for rowid, _, _ in evicted],
+            )
+            self._conn.executemany(
+                "DELETE FROM post_index WHERE board = ? AND aid = ?",
+                [(board, aid) for _, board, aid in evicted],
+            )
+            self.evictions += len(evicted)
+        self._conn.execute(
+            "DELETE FROM post_index WHERE rowid IN"
+            " (SELECT rowid FROM post_index ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+            (self.max_posts * 2,),
+        )
+        return len(evicted)
+
+    def compact(self) -> Dict[str, Any]:
+        """刪除超出上限的文章，再把 WAL 寫回主檔並 VACUUM，釋放刪除後留下的空間。"""
+        with self._lock:
+            with self._conn:
+                evicted = self._evict()
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("VACUUM")
+            size = self._conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+        return {
+            "evicted": evicted,
+            "size": size,
+            "file_bytes": os.path.getsize(self.db_path),
+        }
+
+    def resolve_index(self, board: str, index: int) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT aid FROM post_index WHERE board = ? AND post_index = ?",
+                (board.lower(), index),
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def search(
+        self,
+        keywords: Optional[List[str]] = None,
+        any_keyword: bool = False,
+        author: Optional[str] = None,
+        board: Optional[str] = None,
+        start_time: Optional[float] = None,
+        end_time: Optional[float] = None,
+        limit: int = DEFAULT_SEARCH_LIMIT,
+    ) -> List[Dict[str, Any]]:
+        """搜尋本地文章庫，關鍵字比對標題、內文與推文，結果依發文時間由新到舊排列。
+
+        keywords 預設需要全部符合，any_keyword 為 True 時符合任一個即可；
+        author 為作者帳號 (不分大小寫)；start_time、end_time 為發文時間的範圍 (包含)。
+        """
+        conditions = []
+        parameters: List[Any] = []
+
+        match_terms = []
+        phrases = [
+            _fts_phrase(keyword) for keyword in keywords or [] if keyword.strip()
+        ]
+        if phrases:
+            match_terms.append(
+                "{title content comments} : ("
+                + (" OR " if any_keyword else " AND ").join(phrases)
+                + ")"
+            )
+        if author:
+            match_terms.append("author : " + _fts_phrase(_author_id(author)))
+        if match_terms:
+            conditions.append(
+                "posts.rowid IN (SELECT rowid FROM posts_fts WHERE posts_fts MATCH ?)"
+            )
+            parameters.append(" AND ".join(match_terms))
+
+        if board:
+            conditions.append("posts.board = ?")
+            parameters.append(board.lower())
+        if start_time is not None:
+            conditions.append("posts.post_time >= ?")
+            parameters.append(start_time)
+        if end_time is not None:
+            conditions.append("posts.post_time <= ?")
+            parameters.append(end_time)
+
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        parameters.append(limit)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT board, post_json FROM posts{where} ORDER BY post_time DESC LIMIT ?",
+                parameters,
+            ).fetchall()
+
+        results = []
+        for row_board, post_json in rows:
+            post = json.loads(post_json)
+            post.setdefault("board", row_board)
+            results.append({field: post.get(field) for field in SEARCH_RESULT_FIELDS})
+        return results
+
+    def is_immutable(self, post: Dict[str, Any]) -> bool:
+        post_time = _post_timestamp(post)
+        return (
+            post_time is not None and time.time() - post_time > self.edit_window_seconds
+        )
+
+
+def _fetch_and_store_post(
+    memory_storage: Dict[str, Any],
+    post_store: Optional[PostStore],
+    board: str,
+    aid: Optional[str],
+    index: Optional[int],
+    query: bool,
+    search_list: Optional[List[Tuple[str, str]]],
+) -> Dict[str, Any]:
+    response = _call_ptt_service(
+        memory_storage,
+        "get_post",
+        board=board,
+        aid=aid,
+        index=index,
+        query=query,
+        search_list=search_list,
+    )
+    post = response.get("data") if response.get("success") else None
+    if post_store is None or not post or not post.get("aid"):
+        return response
+
+    if (
+        not query
+        and post.get("post_status") == POST_STATUS_EXISTS
+        and post.get("content") is not None
+    ):
+        post_store.put(board, post)
+    elif not search_list and post.get("index"):
+        # 搜尋結果的編號與看板編號不同，只記錄一般的編號。
+        post_store.record_index(board, post["index"], post["aid"])
+    return response
+
+
+def _get_post(
+    memory_storage: Dict[str, Any],
+    board: str,
+    aid: Optional[str],
+    index: Optional[int],
+    query: bool,
+    search_list: Optional[List[Tuple[str, str]]],
+    refresh_comments: bool = False,
+) -> Dict[str, Any]:
+    """取得文章，已經過了編輯期限的文章直接從本地文章庫回傳。"""
+    post_store: Optional[PostStore] = memory_storage.get("post_store")
+    if post_store is None or query or search_list:
+        return _fetch_and_store_post(
+            memory_storage, post_store, board, aid, index, query, search_list
+        )
+
+    cached_aid = aid
+    if cached_aid is None and index:
+        # 看板重新編號時對應會被刪除 (observe_newest_index、_record_index)，留下的對應才可以直接使用。
+        cached_aid = post_store.resolve_index(board, index)
+
+    cached_post = None if cached_aid is None else post_store.get(board, cached_aid)
+    if cached_post is None:
+        return _fetch_and_store_post(
+            memory_storage, post_store, board, aid, index, False, None
+        )
+
+    if post_store.is_immutable(cached_post) and not refresh_comments:
+        return {"success": True, "data": cached_post, "cached": True}
+
+    # 仍在編輯期限內，或是需要更新推文 (PyPtt 無法只下載推文)：改用 AID 重新取得整篇，
+    # 也避免編號位移取到別篇文章。
+    return _fetch_and_store_post(
+        memory_storage, post_store, board, cached_aid, None, False, None
+    )
+
+
+def _get_new_comments(
+    memory_storage: Dict[str, Any], board: str, aid: str, known_comment_count: int
+) -> Dict[str, Any]:
+    """重新取得文章並只回傳第 known_comment_count 則之後的推文。
+
+    PyPtt 無法只下載推文，所以仍然會向 PTT 取得整篇文章，但最新的推文會存回本地文章庫，
+    回應中也只包含新的推文，不需要每次都把整篇文章與所有推文傳給客戶端。
+    """
+    response = _get_post(
+        memory_storage, board, aid, None, False, None, refresh_comments=True
+    )
+    if not response.get("success"):
+        return response
+
+    post = response.get("data") or {}
+    if post.get("post_status") != POST_STATUS_EXISTS:
+        return {
+            "success": False,
+            "message": f"文章 {aid} 已不存在 ({post.get('post_status')})。",
+            "code": "POST_DELETED",
+        }
+
+    comments = post.get("comments") or []
+    # 推文比已知的還少 (例如文章被重新編輯)，只能從頭回傳。
+    reset = known_comment_count > len(comments)
+    return {
+        "success": True,
+        "data": comments if reset else comments[max(0, known_comment_count) :],
+        "comment_count": len(comments),
+        "reset": reset,
+    }
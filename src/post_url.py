@@ -0,0 +1,92 @@
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional, Tuple
+
+# PTT 的時間都是台灣時間。
+_PTT_TIMEZONE = timezone(timedelta(hours=8))
+
+# 文章網址: https://www.ptt.cc/bbs/<看板>/M.<時間戳記>.A.<3 位 16 進位>.html，舊文章可能沒有最後的 16 進位數字。
+_URL_PATTERN = re.compile(
+    r"(?:https?://)?(?:www\.)?ptt\.cc/bbs/([-.\w]+)/M\.(\d+)\.A(?:\.([0-9A-Fa-f]{1,3}))?\.html"
+)
+_URL_TIMESTAMP_PATTERN = re.compile(r"/M\.(\d+)\.A")
+
+# AID 是檔名 M.<時間戳記>.A.<3 位 16 進位> 的 64 進位編碼：時間戳記左移 12 位元再加上最後的 16 進位數字。
+_AID_TABLE = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz-_"
+_AID_VALUES = {char: value for value, char in enumerate(_AID_TABLE)}
+_AID_PATTERN = re.compile(r"^[0-9A-Za-z\-_]{8}$")
+
+# 一次批次解析最多接受的網址或 AID 數。
+MAX_REFS_PER_CALL = 1000
+
+
+def _aid_value(aid: Optional[str]) -> Optional[int]:
+    if not aid or not _AID_PATTERN.match(aid):
+        return None
+    value = 0
+    for char in aid:
+        value = value * 64 + _AID_VALUES[char]
+    return value
+
+
+def _aid_timestamp(aid: Optional[str]) -> Optional[int]:
+    value = _aid_value(aid)
+    return None if value is None else value >> 12
+
+
+def _encode_aid(timestamp: int, suffix: int) -> str:
+    value = (timestamp << 12) | suffix
+    return "".join(_AID_TABLE[(value >> shift) & 63] for shift in range(42, -1, -6))
+
+
+def _post_timestamp(post: Dict[str, Any]) -> Optional[int]:
+    """從文章網址 (M.1234567890.A.BCD) 或 AID 取得發文時間。"""
+    match = _URL_TIMESTAMP_PATTERN.search(post.get("url") or "")
+    return int(match.group(1)) if match else _aid_timestamp(post.get("aid"))
+
+
+def _aid_from_url(url: str) -> Optional[Tuple[str, str]]:
+    """回傳 (看板, AID)，不是文章網址時回傳 None。結果與 PyPtt 的 get_aid_from_url 相同。"""
+    match = _URL_PATTERN.search(url)
+    if match is None:
+        return None
+    board, timestamp, suffix = match.groups()
+    return board, _encode_aid(int(timestamp), int(suffix, 16) if suffix else 0)
+
+
+def _url_from_aid(board: str, aid: str) -> Optional[str]:
+    value = _aid_value(aid.lstrip("#"))
+    if value is None:
+        return None
+    return f"https://www.ptt.cc/bbs/{board}/M.{value >> 12}.A.{value & 0xFFF:03X}.html"
+
+
+def _parse_post_ref(ref: str, board: Optional[str] = None) -> Dict[str, Any]:
+    """解析文章網址或 AID (可以有 # 開頭)，回傳看板、AID、網址與發文時間。
+
+    只有 AID 時需要 board 才能組出網址；無法解析時回傳 INVALID_POST_REF 錯誤。
+    """
+    ref = ref.strip()
+    parsed = _aid_from_url(ref)
+    if parsed is not None:
+        board, aid = parsed
+    else:
+        aid = ref.lstrip("#")
+
+    timestamp = _aid_timestamp(aid)
+    if timestamp is None:
+        return {
+            "success": False,
+            "message": f"不是 PTT 文章網址或 AID: {ref}",
+            "code": "INVALID_POST_REF",
+        }
+    return {
+        "success": True,
+        "board": board,
+        "aid": aid,
+        "url": _url_from_aid(board, aid) if board else None,
+        "timestamp": timestamp,
+        "time": datetime.fromtimestamp(timestamp, _PTT_TIMEZONE).strftime(
+            "%Y/%m/%d %H:%M:%S"
+        ),
+    }
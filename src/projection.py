@@ -0,0 +1,63 @@
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+# compact 模式下內文保留的字數，以及推文只保留最後幾則。
+COMPACT_CONTENT_CHARS = 300
+COMPACT_COMMENT_COUNT = 5
+
+# compact 模式下移除的欄位：full_content 與 origin_mail 是含控制碼的完整原文，和 content 幾乎重複。
+_COMPACT_DROPPED_FIELDS = frozenset(
+    {
+        "full_content",
+        "origin_mail",
+        "has_control_code",
+        "pass_format_check",
+        "ip",
+        "location",
+    }
+)
+
+
+def _project(data: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """只保留 fields 列出的欄位，不存在的欄位為 None；沒有指定 fields 時原樣回傳。"""
+    if not fields:
+        return data
+    return {field: data.get(field) for field in fields}
+
+
+def _compact(data: Dict[str, Any]) -> Dict[str, Any]:
+    """截短內文、以統計取代完整的推文列表，並移除重複的原文欄位。回傳新的字典，不修改 data。"""
+    compacted = {
+        key: value for key, value in data.items() if key not in _COMPACT_DROPPED_FIELDS
+    }
+
+    content = data.get("content")
+    if isinstance(content, str) and len(content) > COMPACT_CONTENT_CHARS:
+        compacted["content"] = content[:COMPACT_CONTENT_CHARS] + "…"
+        compacted["content_length"] = len(content)
+
+    comments = data.get("comments")
+    if isinstance(comments, list):
+        type_counts = Counter(str(comment.get("type")) for comment in comments)
+        compacted["comment_summary"] = {"total": len(comments), **type_counts}
+        compacted["comments"] = comments[-COMPACT_COMMENT_COUNT:]
+    return compacted
+
+
+def _shape_response(
+    response: Dict[str, Any], fields: Optional[List[str]] = None, compact: bool = False
+) -> Dict[str, Any]:
+    """對成功回應的 data 套用 compact 與 fields。
+
+    回應可能來自快取，所以一律建立新的字典，不修改原本的回應。
+    """
+    data = response.get("data")
+    if (
+        not response.get("success")
+        or not isinstance(data, dict)
+        or (not fields and not compact)
+    ):
+        return response
+    if compact:
+        data = _compact(data)
+    return {**response, "data": _project(data, fields)}
@@ -0,0 +1,216 @@
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple
+
+from utils import (
+    SESSION_LOST_CODES,
+    _handle_ptt_exception,
+    _hold_ptt_service,
+    _login_account,
+    _release_ptt_service,
+    _retire_ptt_service,
+)
+
+if TYPE_CHECKING:
+    import PyPtt
+
+# 只讀取、與帳號無關的操作，可以分散到任何一個閒置的 session。
+# 其餘操作 (發文、推文、信箱、我的最愛...) 都固定使用主帳號。
+READ_ONLY_METHODS = frozenset(
+    {"get_post", "get_newest_index", "get_board_info", "get_user"}
+)
+
+
+def _parse_accounts(accounts_str: str) -> List[Tuple[str, str]]:
+    """解析 PTT_ACCOUNTS，格式為 "id1:pw1,id2:pw2"。"""
+    accounts = []
+    for item in accounts_str.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        ptt_id, sep, ptt_pw = item.partition(":")
+        if not sep or not ptt_id or not ptt_pw:
+            raise ValueError("PTT_ACCOUNTS must be in the format 'id1:pw1,id2:pw2'.")
+        accounts.append((ptt_id.strip(), ptt_pw))
+    return accounts
+
+
+class SessionPool:
+    """多帳號的 PyPtt.Service 連線池。
+
+    第一個 session 永遠是主帳號，它的連線就是 memory_storage["ptt_bot"]；
+    其他帳號各自擁有獨立的 PyPtt.Service，只用來分擔 READ_ONLY_METHODS。
+    """
+
+    def __init__(self, memory_storage: Dict[str, Any], accounts: List[Tuple[str, str]]):
+        self._memory_storage = memory_storage
+        self._cv = threading.Condition()
+        self._created_at = time.monotonic()
+        self._sessions: List[Dict[str, Any]] = [
+            self._new_session(
+                memory_storage["ptt_id"], memory_storage["ptt_pw"], primary=True
+            )
+        ]
+        self._sessions.extend(
+            self._new_session(ptt_id, ptt_pw)
+            for ptt_id, ptt_pw in accounts
+            if ptt_id != memory_storage["ptt_id"]
+        )
+
+    @staticmethod
+    def _new_session(ptt_id: str, ptt_pw: str, primary: bool = False) -> Dict[str, Any]:
+        return {
+            "ptt_id": ptt_id,
+            "ptt_pw": ptt_pw,
+            "primary": primary,
+            "service": None,
+            "login_lock": threading.Lock(),
+            "in_flight": 0,
+            "calls": 0,
+            "errors": 0,
+            "busy_seconds": 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get_service(self, session: Dict[str, Any]) -> Optional["PyPtt.Service"]:
+        if session["primary"]:
+            return self._memory_storage.get("ptt_bot")
+        return session["service"]
+
+    def login_secondary(self) -> List[Dict[str, Any]]:
+        """登入主帳號以外尚未登入的帳號，回傳每個帳號的登入結果；已經登入的帳號不會重新登入。"""
+        results = []
+        for session in self._sessions[1:]:
+            with session["login_lock"]:
+                if session["service"] is not None:
+                    response = {"success": True, "message": "登入成功"}
+                else:
+                    ptt_service, response = _login_account(
+                        self._memory_storage, session["ptt_id"], session["ptt_pw"]
+                    )
+                    if ptt_service is not None:
+                        self._replace_service(session, ptt_service)
+            results.append({"ptt_id": session["ptt_id"], **response})
+        return results
+
+    def relogin(
+        self, session: Dict[str, Any], dead_service: "PyPtt.Service"
+    ) -> Optional["PyPtt.Service"]:
+        """重新登入已經失效的次要帳號，回傳已經登記為使用中的新 service；登入失敗時回傳 None。"""
+        with session["login_lock"]:
+            if session["service"] is dead_service:
+                ptt_service, _ = _login_account(
+                    self._memory_storage, session["ptt_id"], session["ptt_pw"]
+                )
+                # 登入失敗時先移出連線池，之後由 keepalive 再嘗試登入。
+                self._replace_service(session, ptt_service)
+            return _hold_ptt_service(self._memory_storage, lambda: session["service"])
+
+    def check_secondary(self) -> None:
+        """由 keepalive 呼叫：檢查閒置的次要帳號是否仍然連線，失效或先前登入失敗的帳號重新登入。"""
+        if self._memory_storage.get("ptt_bot") is None:
+            # 主帳號尚未登入或已經登出，次要帳號也不需要維持連線。
+            return
+
+        for session in self._sessions[1:]:
+            with self._cv:
+                if session["in_flight"]:
+                    continue
+                ptt_service = session["service"]
+
+            if ptt_service is None:
+                with session["login_lock"]:
+                    if session["service"] is None:
+                        new_service, _ = _login_account(
+                            self._memory_storage, session["ptt_id"], session["ptt_pw"]
+                        )
+                        self._replace_service(session, new_service)
+                continue
+
+            ptt_service = _hold_ptt_service(
+                self._memory_storage, lambda: session["service"]
+            )
+            if ptt_service is None:
+                continue
+            new_service = None
+            try:
+                ptt_service.call("get_time")
+            except Exception as e:
+                if _handle_ptt_exception(e, {})["code"] in SESSION_LOST_CODES:
+                    new_service = self.relogin(session, ptt_service)
+            finally:
+                _release_ptt_service(self._memory_storage, ptt_service)
+                if new_service is not None:
+                    _release_ptt_service(self._memory_storage, new_service)
+
+    def logout_secondary(self) -> None:
+        for session in self._sessions[1:]:
+            with session["login_lock"]:
+                self._replace_service(session, None)
+
+    def _replace_service(
+        self, session: Dict[str, Any], ptt_service: Optional["PyPtt.Service"]
+    ) -> None:
+        """換上新的 service (None 代表移出連線池)；舊的 service 等所有使用中的呼叫釋放後才關閉。"""
+        with self._cv:
+            old_service, session["service"] = session["service"], ptt_service
+        if old_service is not None:
+            _retire_ptt_service(self._memory_storage, old_service)
+
+    def acquire(self, method_name: str) -> Optional[Dict[str, Any]]:
+        """取得一個可以執行 method_name 的 session，沒有任何已登入的 session 時回傳 None。
+
+        唯讀操作會等到有閒置的 session 為止，其他操作一律交給主帳號。
+        """
+        read_only = method_name in READ_ONLY_METHODS
+        with self._cv:
+            while True:
+                candidates = [
+                    session
+                    for session in self._sessions
+                    if (read_only or session["primary"])
+                    and self.get_service(session) is not None
+                ]
+                if not candidates:
+                    return None
+
+                idle = [session for session in candidates if session["in_flight"] == 0]
+                if idle:
+                    session = min(idle, key=lambda s: s["calls"])
+                elif not read_only:
+                    # 寫入操作固定在主帳號，PyPtt.Service 會自己排隊。
+                    session = candidates[0]
+                else:
+                    self._cv.wait()
+                    continue
+
+                session["in_flight"] += 1
+                return session
+
+    def release(self, session: Dict[str, Any], elapsed: float, success: bool) -> None:
+        with self._cv:
+            session["in_flight"] -= 1
+            session["calls"] += 1
+            session["busy_seconds"] += elapsed
+            if not success:
+                session["errors"] += 1
+            self._cv.notify_all()
+
+    def status(self) -> List[Dict[str, Any]]:
+        uptime = max(time.monotonic() - self._created_at, 1e-9)
+        with self._cv:
+            return [
+                {
+                    "ptt_id": session["ptt_id"],
+                    "primary": session["primary"],
+                    "logged_in": self.get_service(session) is not None,
+                    "in_flight": session["in_flight"],
+                    "calls": session["calls"],
+                    "errors": session["errors"],
+                    "busy_seconds": round(session["busy_seconds"], 3),
+                    "utilization": round(min(session["busy_seconds"] / uptime, 1.0), 4),
+                }
+                for session in self._sessions
+            ]
@@ -0,0 +1,221 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Hashable, Optional, Tuple, Union
+
+# 可以用 PTT_STORAGE 選擇的儲存後端。
+STORAGE_BACKENDS = ("memory", "sqlite")
+
+# 其他行程正在寫入時，最多等待幾秒才放棄。
+_BUSY_TIMEOUT_SECONDS = 5.0
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    """開啟 SQLite 資料庫並切換成 WAL 模式，讓同一台主機上的多個伺服器行程可以同時讀寫。"""
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(
+        db_path, timeout=_BUSY_TIMEOUT_SECONDS, check_same_thread=False
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL 模式下 NORMAL 只在 checkpoint 時 fsync，斷電最多遺失最近的交易，不會損毀資料庫。
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _encode_key(key: Hashable) -> str:
+    return json.dumps(key, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class MemoryStorage:
+    """存在行程記憶體中的鍵值儲存，依照 TTL 過期，超過 max_entries 時淘汰最久沒有使用的項目。"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Tuple[str, Hashable], Tuple[float, Any]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, namespace: str, key: Hashable, touch: bool = True) -> Optional[Any]:
+        """回傳尚未過期的值；touch 為 False 時不影響 LRU 順序。"""
+        entry_key = (namespace, key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[entry_key]
+                return None
+            if touch:
+                self._entries.move_to_end(entry_key)
+            return entry[1]
+
+    def put(
+        self, namespace: str, key: Hashable, value: Any, ttl_seconds: float
+    ) -> None:
+        entry_key = (namespace, key)
+        with self._lock:
+            self._entries[entry_key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self, namespace: str) -> int:
+        """刪除 namespace 中的所有項目，回傳刪除的筆數。"""
+        with self._lock:
+            entry_keys = [
+                entry_key for entry_key in self._entries if entry_key[0] == namespace
+            ]
+            for entry_key in entry_keys:
+                del self._entries[entry_key]
+            return len(entry_keys)
+
+    def count(self, namespace: str) -> int:
+        with self._lock:
+            return sum(1 for entry_key in self._entries if entry_key[0] == namespace)
+
+    def compact(self) -> Dict[str, Any]:
+        """刪除所有已過期的項目。"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                entry_key
+                for entry_key, entry in self._entries.items()
+                if entry[0] <= now
+            ]
+            for entry_key in expired:
+                del self._entries[entry_key]
+            return {
+                "backend": self.name,
+                "expired": len(expired),
+                "evicted": 0,
+                "size": len(self._entries),
+            }
+
+
+class SQLiteStorage:
+    """存在 SQLite 檔案中的鍵值儲存，介面與 MemoryStorage 相同，重啟後仍然保留，也可以由多個行程共用。
+
+    值以 JSON 儲存，過期時間使用系統時間，讓不同行程看到一致的結果。
+    每次讀取都會更新最後使用時間，超過 max_entries 時刪除最久沒有使用的項目。
+    """
+
+    name = "sqlite"
+
+    def __init__(self, db_path: str, max_entries: int):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = _connect(db_path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " namespace TEXT NOT NULL,"
+                " entry_key TEXT NOT NULL,"
+                " value_json TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " last_used REAL NOT NULL,"
+                " PRIMARY KEY (namespace, entry_key))"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)"
+            )
+
+    def get(self, namespace: str, key: Hashable, touch: bool = True) -> Optional[Any]:
+        """回傳尚未過期的值；touch 為 False 時不影響 LRU 順序。"""
+        entry_key = _encode_key(key)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value_json FROM entries WHERE namespace = ? AND entry_key = ? AND expires_at > ?",
+                (namespace, entry_key, now),
+            ).fetchone()
+            if row is not None and touch:
+                self._conn.execute(
+                    "UPDATE entries SET last_used = ? WHERE namespace = ? AND entry_key = ?",
+                    (now, namespace, entry_key),
+                )
+        return None if row is None else json.loads(row[0])
+
+    def put(
+        self, namespace: str, key: Hashable, value: Any, ttl_seconds: float
+    ) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (namespace, entry_key, value_json, expires_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (
+                    namespace,
+                    _encode_key(key),
+                    json.dumps(value, ensure_ascii=False, default=str),
+                    now + ttl_seconds,
+                    now,
+                ),
+            )
+            self._evict()
+
+    def _evict(self) -> int:
+        cursor = self._conn.execute(
+            "DELETE FROM entries WHERE rowid IN"
+            " (SELECT rowid FROM entries ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self.evictions += cursor.rowcount
+        return cursor.rowcount
+
+    def clear(self, namespace: str) -> int:
+        """刪除 namespace 中的所有項目 (包含其他行程寫入的)，回傳刪除的筆數。"""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM entries WHERE namespace = ?", (namespace,)
+            ).rowcount
+
+    def count(self, namespace: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM entries WHERE namespace = ?", (namespace,)
+            ).fetchone()[0]
+
+    def compact(self) -> Dict[str, Any]:
+        """刪除已過期與超出上限的項目，再把 WAL 寫回主檔並 VACUUM，釋放刪除後留下的空間。"""
+        with self._lock:
+            with self._conn:
+                expired = self._conn.execute(
+                    "DELETE FROM entries WHERE expires_at <= ?", (time.time(),)
+                ).rowcount
+                evicted = self._evict()
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("VACUUM")
+            size = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {
+            "backend": self.name,
+            "expired": expired,
+            "evicted": evicted,
+            "size": size,
+            "file_bytes": os.path.getsize(self.db_path),
+        }
+
+
+Storage = Union[MemoryStorage, SQLiteStorage]
+
+
+def _open_storage(backend: str, data_dir: str, max_entries: int) -> Storage:
+    """依照 PTT_STORAGE 建立儲存後端；sqlite 存放在 data_dir 下的 cache.db。"""
+    backend = backend.lower()
+    if backend == "memory":
+        return MemoryStorage(max_entries)
+    if backend == "sqlite":
+        return SQLiteStorage(os.path.join(data_dir, "cache.db"), max_entries)
+    raise ValueError(f"PTT_STORAGE must be one of {', '.join(STORAGE_BACKENDS)}.")
@@ -0,0 +1,82 @@
+import asyncio
+import time
+from typing import Dict, Any, List, Optional
+
+from utils import SESSION_LOST_CODES, _call_ptt_service_async
+
+# 單次批次呼叫最多查詢的帳號數。
+MAX_USERS_PER_CALL = 100
+
+# 兩次實際向 PTT 查詢之間至少間隔的秒數；快取命中的帳號不受限制。
+USER_FETCH_INTERVAL_SECONDS = 0.2
+
+
+def _get_cached_user(
+    memory_storage: Dict[str, Any], user_id: str
+) -> Optional[Dict[str, Any]]:
+    """直接在事件迴圈上讀取回應快取；命中時不需要送到 PTT 執行緒排隊。"""
+    response_cache = memory_storage.get("response_cache")
+    if response_cache is None:
+        return None
+    cache_key = response_cache.make_key("get_user", {"user_id": user_id})
+    # 先確認有快取再讀取，沒有命中時留給 _call_ptt_service 計入統計，避免重複計算。
+    if cache_key is None or not response_cache.contains(cache_key):
+        return None
+    return response_cache.get(cache_key)
+
+
+async def _get_users(
+    memory_storage: Dict[str, Any],
+    user_ids: List[str],
+    fetch_interval: float = USER_FETCH_INTERVAL_SECONDS,
+) -> Dict[str, Any]:
+    """依序查詢多個帳號，回傳 {帳號: 使用者資料} 與 {帳號: 錯誤}。
+
+    帳號不分大小寫，重複的只查詢一次；查詢結果存放在回應快取 (get_user 的 TTL)，之後的呼叫可以直接使用。
+    快取中的帳號直接回傳；其他帳號各自送到 PTT 執行緒，讓其他工具呼叫可以穿插執行。
+    """
+    unique_ids: Dict[str, str] = {}
+    for user_id in user_ids:
+        user_id = user_id.strip()
+        if user_id:
+            unique_ids.setdefault(user_id.lower(), user_id)
+    if len(unique_ids) > MAX_USERS_PER_CALL:
+        return {
+            "success": False,
+            "message": f"一次最多查詢 {MAX_USERS_PER_CALL} 個帳號",
+            "code": "TOO_MANY_USERS",
+        }
+
+    data: Dict[str, Any] = {}
+    errors: Dict[str, Dict[str, Any]] = {}
+    cached = 0
+    last_fetch = 0.0
+    pending = list(unique_ids.values())
+    for position, user_id in enumerate(pending):
+        response = _get_cached_user(memory_storage, user_id)
+        if response is not None:
+            cached += 1
+        else:
+            wait = last_fetch + fetch_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            last_fetch = time.monotonic()
+            response = await _call_ptt_service_async(
+                memory_storage, "get_user", user_id=user_id
+            )
+
+        if response.get("success"):
+            data[user_id] = response.get("data")
+            continue
+
+        errors[user_id] = {
+            "message": response.get("message"),
+            "code": response.get("code"),
+        }
+        if response.get("code") in SESSION_LOST_CODES:
+            # 連線已經無法使用，剩下的帳號不再查詢，回傳已取得的部分。
+            for remaining_id in pending[position + 1 :]:
+                errors[remaining_id] = errors[user_id]
+            break
+
+    return {"success": True, "data": data, "errors": errors, "cached": cached}
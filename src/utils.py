@@ -1,59 +1,207 @@
-from typing import Dict, Any, Optional
+import asyncio
+import contextvars
+import functools
+import math
+import string
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Any, Hashable, Optional, Callable, Tuple
 
-import PyPtt
+from cache import WRITE_METHODS, _make_key
 
+if TYPE_CHECKING:
+    import PyPtt
 
-def _handle_ptt_exception(e: Exception, kwargs: Dict[str, Any]) -> Dict[str, Any]:
-    EXCEPTION_MAPPING = {
-        PyPtt.RequireLogin: ("尚未登入，請先執行 login", "NOT_LOGGED_IN"),
-        PyPtt.UnregisteredUser: ("未註冊使用者", "UNREGISTERED_USER"),
-        PyPtt.NoSuchBoard: ("找不到看板: {board}", "NO_SUCH_BOARD"),
-        PyPtt.NoSuchPost: (
-            "在看板 {board} 中找不到文章 AID: {aid} 或 Index: {index}",
-            "NO_SUCH_POST",
-        ),
-        PyPtt.NoPermission: ("沒有權限", "NO_PERMISSION"),
-        PyPtt.LoginError: ("登入失敗", "LOGIN_FAILED"),
-        PyPtt.WrongIDorPassword: ("帳號或密碼錯誤", "WRONG_CREDENTIALS"),
-        PyPtt.CantResponse: ("已結案並標記, 不得回應", "CANT_RESPONSE"),
-        PyPtt.NoFastComment: ("推文間隔太短", "NO_FAST_COMMENT"),
-        PyPtt.NoSuchUser: ("找不到使用者: {ptt_id}", "NO_SUCH_USER"),
-        PyPtt.NoSuchMail: ("找不到信件 Index: {index}", "NO_SUCH_MAIL"),
-        PyPtt.MailboxFull: ("信箱已滿", "MAILBOX_FULL"),
-        PyPtt.NoMoney: ("餘額不足", "NO_MONEY"),
-        PyPtt.SetContactMailFirst: ("需要先設定聯絡信箱", "SET_CONTACT_MAIL_FIRST"),
-        PyPtt.WrongPassword: ("密碼錯誤", "WRONG_PASSWORD"),
-        PyPtt.NeedModeratorPermission: (
-            "需要看板管理員權限",
-            "NEED_MODERATOR_PERMISSION",
-        ),
-    }
+# 與 PyPtt.NewIndex.BOARD、PyPtt.PostStatus.EXISTS 相同的值，不需要為了常數載入 PyPtt。
+NEW_INDEX_BOARD = "BOARD"
+POST_STATUS_EXISTS = "EXISTS"
 
-    for exc_type, (message_format, code) in EXCEPTION_MAPPING.items():
-        if isinstance(e, exc_type):
-            message = (
-                message_format.format(**kwargs)
-                if "{" in message_format
-                else message_format
-            )
-            return {"success": False, "message": message, "code": code}
-    return {
-        "success": False,
-        "message": f"操作時發生未知錯誤: {e}",
-        "args": kwargs,
-        "code": "UNKNOWN_ERROR",
+# 只讀取資料、重複執行也不會有副作用的操作，session 中斷時可以重新登入後自動重試一次。
+IDEMPOTENT_METHODS = frozenset(
+    {
+        "get_post",
+        "get_newest_index",
+        "get_board_info",
+        "get_user",
+        "get_time",
+        "get_all_boards",
+        "get_favourite_boards",
+        "get_bottom_post_list",
+        "search_user",
+        "get_mail",
     }
+)
+
+# 代表 session 已經失效 (被踢掉、斷線) 的錯誤代碼。
+SESSION_LOST_CODES = frozenset({"NOT_LOGGED_IN", "CONNECTION_CLOSED", "CONNECT_ERROR"})
+
+# 同一個帳號兩次登入之間至少間隔的秒數；連續失敗時以指數退避，最多等待 LOGIN_MAX_BACKOFF_SECONDS。
+LOGIN_MIN_INTERVAL_SECONDS = 5.0
+LOGIN_MAX_BACKOFF_SECONDS = 300.0
+
+_LOGIN_LOCK = threading.Lock()
+
+# 保護 session_storage_instance["in_flight_calls"]，見 _run_in_ptt_executor_shared。
+_IN_FLIGHT_LOCK = threading.Lock()
+
+# 保護 session_storage_instance 中的 "ptt_service_users" 與 "retired_ptt_services"，見 _hold_ptt_service。
+_SERVICE_LOCK = threading.Lock()
+
+
+# PyPtt 例外名稱 -> (錯誤訊息範本, 錯誤代碼)。
+_EXCEPTION_MESSAGES: Dict[str, Tuple[str, str]] = {
+    "RequireLogin": ("尚未登入，請先執行 login", "NOT_LOGGED_IN"),
+    "UnregisteredUser": ("未註冊使用者", "UNREGISTERED_USER"),
+    "NoSuchBoard": ("找不到看板: {board}", "NO_SUCH_BOARD"),
+    "NoSuchPost": (
+        "在看板 {board} 中找不到文章 AID: {aid} 或 Index: {index}",
+        "NO_SUCH_POST",
+    ),
+    "NoPermission": ("沒有權限", "NO_PERMISSION"),
+    "LoginError": ("登入失敗", "LOGIN_FAILED"),
+    "WrongIDorPassword": ("帳號或密碼錯誤", "WRONG_CREDENTIALS"),
+    "CantResponse": ("已結案並標記, 不得回應", "CANT_RESPONSE"),
+    "NoFastComment": ("推文間隔太短", "NO_FAST_COMMENT"),
+    "NoSuchUser": ("找不到使用者: {ptt_id}", "NO_SUCH_USER"),
+    "NoSuchMail": ("找不到信件 Index: {index}", "NO_SUCH_MAIL"),
+    "MailboxFull": ("信箱已滿", "MAILBOX_FULL"),
+    "NoMoney": ("餘額不足", "NO_MONEY"),
+    "SetContactMailFirst": ("需要先設定聯絡信箱", "SET_CONTACT_MAIL_FIRST"),
+    "WrongPassword": ("密碼錯誤", "WRONG_PASSWORD"),
+    "NeedModeratorPermission": ("需要看板管理員權限", "NEED_MODERATOR_PERMISSION"),
+    "ConnectionClosed": ("與 PTT 的連線已中斷", "CONNECTION_CLOSED"),
+    "ConnectError": ("無法連線到 PTT", "CONNECT_ERROR"),
+    "LoginTooOften": ("登入太頻繁，請稍後再試", "LOGIN_TOO_OFTEN"),
+}
+
+# 不同操作用不同的參數名稱指定帳號，例如 get_user 是 user_id、mail 是 ptt_id。
+_MESSAGE_ARG_ALIASES = {"ptt_id": "user_id"}
+
+# (錯誤代碼, 訊息範本, 範本用到的參數名稱)；不需要參數的範本直接當作訊息。
+_ExceptionEntry = Tuple[str, str, Tuple[str, ...]]
+
+# 例外類別 -> 對應的項目，沿著 MRO 找到的結果也會記在這裡，之後同一種例外只需要查一次字典。
+# 第一次發生例外時才建立，避免為了建表在啟動時載入 PyPtt。
+_EXCEPTION_TABLE: Dict[type, Optional[_ExceptionEntry]] = {}
+
+
+def _build_exception_table() -> None:
+    # PyPtt 很重，延後到第一次真的需要時才載入，加快伺服器啟動。
+    import PyPtt
+
+    for name, (template, code) in _EXCEPTION_MESSAGES.items():
+        fields = tuple(
+            field for _, field, _, _ in string.Formatter().parse(template) if field
+        )
+        _EXCEPTION_TABLE[getattr(PyPtt, name)] = (code, template, fields)
+
+
+def _exception_entry(exc_type: type) -> Optional[_ExceptionEntry]:
+    try:
+        return _EXCEPTION_TABLE[exc_type]
+    except KeyError:
+        pass
+
+    if not _EXCEPTION_TABLE:
+        _build_exception_table()
+    entry = next(
+        (
+            _EXCEPTION_TABLE[base]
+            for base in exc_type.__mro__
+            if _EXCEPTION_TABLE.get(base)
+        ),
+        None,
+    )
+    _EXCEPTION_TABLE[exc_type] = entry
+    return entry
+
+
+def _message_arg(kwargs: Dict[str, Any], field: str) -> Any:
+    if field in kwargs:
+        return kwargs[field]
+    return kwargs.get(_MESSAGE_ARG_ALIASES.get(field, field))
+
+
+def _handle_ptt_exception(e: Exception, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    entry = _exception_entry(type(e))
+    if entry is None:
+        return {
+            "success": False,
+            "message": f"操作時發生未知錯誤: {e}",
+            "args": kwargs,
+            "code": "UNKNOWN_ERROR",
+        }
+
+    code, message, fields = entry
+    if fields:
+        # 缺少的參數顯示為 None，不讓格式化本身拋出例外。
+        message = message.format(
+            **{field: _message_arg(kwargs, field) for field in fields}
+        )
+    return {"success": False, "message": message, "code": code}
 
 
 def _call_ptt_service(
+    session_storage_instance,
+    method_name: str,
+    success_message: Optional[str] = None,
+    empty_data_message: Optional[str] = None,
+    empty_data_code: Optional[str] = None,
+    **kwargs,
+) -> Dict[str, Any]:
+    response_cache = session_storage_instance.get("response_cache")
+    if response_cache is None:
+        return _dispatch_ptt_call(
+            session_storage_instance,
+            method_name,
+            success_message,
+            empty_data_message,
+            empty_data_code,
+            kwargs,
+        )
+
+    cache_key = response_cache.make_key(method_name, kwargs)
+    if cache_key is not None:
+        cached_response = response_cache.get(cache_key)
+        if cached_response is not None:
+            return cached_response
+
+    response = _dispatch_ptt_call(
         session_storage_instance,
-        method_name: str,
-        success_message: Optional[str] = None,
-        empty_data_message: Optional[str] = None,
-        empty_data_code: Optional[str] = None,
-        **kwargs,
+        method_name,
+        success_message,
+        empty_data_message,
+        empty_data_code,
+        kwargs,
+    )
+
+    if cache_key is not None and response["success"]:
+        response_cache.put(cache_key, method_name, response)
+    elif method_name in WRITE_METHODS:
+        # 同一個 session 寫入後，快取中的看板、使用者資料都可能已經過期。
+        response_cache.clear()
+    return response
+
+
+def _dispatch_ptt_call(
+    session_storage_instance,
+    method_name: str,
+    success_message: Optional[str],
+    empty_data_message: Optional[str],
+    empty_data_code: Optional[str],
+    kwargs: Dict[str, Any],
 ) -> Dict[str, Any]:
-    ptt_service = session_storage_instance.get("ptt_bot")
+    session_pool = session_storage_instance.get("session_pool")
+    session, ptt_service = _acquire_ptt_service(session_storage_instance, method_name)
+    if ptt_service is None:
+        login_response = _wait_for_session(session_storage_instance)
+        if not login_response["success"]:
+            return login_response
+        session, ptt_service = _acquire_ptt_service(
+            session_storage_instance, method_name
+        )
+
     if ptt_service is None:
         return {
             "success": False,
@@ -61,18 +209,403 @@ def _call_ptt_service(
             "code": "NOT_LOGGED_IN",
         }
 
+    start_time = time.monotonic()
+    attempts = 1
+    # 這次呼叫登記為使用中的 service，結束時一起釋放；沒有連線池時第一個 service 不需要登記。
+    held_services = [] if session_pool is None else [ptt_service]
     try:
-        result = ptt_service.call(method_name, kwargs)
-        response = {"success": True, "data": result}
+        response = _invoke_ptt_service(
+            ptt_service,
+            method_name,
+            success_message,
+            empty_data_message,
+            empty_data_code,
+            kwargs,
+        )
+        if (
+            not response["success"]
+            and response["code"] in SESSION_LOST_CODES
+            and method_name in IDEMPOTENT_METHODS
+        ):
+            # session 已經失效：重新登入一次後重試，讓客戶端不必自己呼叫 login。
+            if session is None or session["primary"]:
+                ptt_service = _relogin_primary(session_storage_instance, ptt_service)
+            else:
+                ptt_service = session_pool.relogin(session, ptt_service)
+            if ptt_service is not None:
+                held_services.append(ptt_service)
+                attempts += 1
+                response = _invoke_ptt_service(
+                    ptt_service,
+                    method_name,
+                    success_message,
+                    empty_data_message,
+                    empty_data_code,
+                    kwargs,
+                )
+    finally:
+        for held_service in held_services:
+            _release_ptt_service(session_storage_instance, held_service)
 
-        if success_message:
-            response["message"] = success_message
-            del response["data"]
-        elif not result and empty_data_message and empty_data_code:
-            response["success"] = False
-            response["message"] = empty_data_message.format(**kwargs)
-            response["code"] = empty_data_code
+    end_time = time.monotonic()
+    elapsed = end_time - start_time
+    session_storage_instance["last_activity"] = end_time
+    if session is not None:
+        session_pool.release(session, elapsed, response["success"])
 
-        return response
+    metrics = session_storage_instance.get("metrics")
+    if metrics is not None:
+        metrics.record_ptt_call(method_name, elapsed, response.get("code"), attempts)
+
+    if (
+        not response["success"]
+        and response["code"] == "NO_SUCH_BOARD"
+        and kwargs.get("board")
+    ):
+        # PTT 確認看板不存在時，才從本地的看板清單附上相近的名稱。
+        board_catalog = session_storage_instance.get("board_catalog")
+        if board_catalog is not None:
+            response = board_catalog.add_suggestions(kwargs["board"], response)
+
+    if (
+        response["success"]
+        and method_name == "get_newest_index"
+        and kwargs.get("board")
+        and str(kwargs.get("index_type")).upper() == NEW_INDEX_BOARD
+        and not kwargs.get("search_list")
+    ):
+        # 最新編號變小代表看板重新編號，本地文章庫中 編號 -> AID 的對應要作廢。
+        post_store = session_storage_instance.get("post_store")
+        if post_store is not None:
+            post_store.observe_newest_index(kwargs["board"], response.get("data") or 0)
+    return response
+
+
+def _acquire_ptt_service(
+    session_storage_instance, method_name: str
+) -> Tuple[Optional[Dict[str, Any]], Any]:
+    """取得執行 method_name 要用的 session 與 service。
+
+    有連線池時 service 已經登記為使用中，用完要 _release_ptt_service。
+    沒有連線池時只有一條 PTT 執行緒，登入與 keepalive 也在這條執行緒上執行，
+    service 不可能在呼叫途中被替換或關閉，所以直接回傳，成功路徑上不需要任何鎖。
+    """
+    session_pool = session_storage_instance.get("session_pool")
+    if session_pool is None:
+        return None, session_storage_instance.get("ptt_bot")
+
+    session = session_pool.acquire(method_name)
+    ptt_service = (
+        None
+        if session is None
+        else _hold_ptt_service(
+            session_storage_instance,
+            functools.partial(session_pool.get_service, session),
+        )
+    )
+    if session is not None and ptt_service is None:
+        session_pool.release(session, 0.0, False)
+        session = None
+    return session, ptt_service
+
+
+def _hold_ptt_service(session_storage_instance, get_service: Callable[[], Any]) -> Any:
+    """取得目前的 service 並登記為使用中，沒有 service 時回傳 None。
+
+    讀取與登記在同一個鎖內完成；替換 service 的一方都是先換上新的 service 再呼叫 _retire_ptt_service，
+    所以這裡拿到的 service 不會在使用中被關閉。
+    """
+    with _SERVICE_LOCK:
+        ptt_service = get_service()
+        if ptt_service is not None:
+            users = session_storage_instance.setdefault("ptt_service_users", {})
+            users[id(ptt_service)] = users.get(id(ptt_service), 0) + 1
+    return ptt_service
+
+
+def _release_ptt_service(session_storage_instance, ptt_service) -> None:
+    """結束使用 service；它已經被替換掉、而且沒有其他呼叫在使用時，才真正關閉。"""
+    with _SERVICE_LOCK:
+        users = session_storage_instance["ptt_service_users"]
+        key = id(ptt_service)
+        users[key] -= 1
+        if users[key]:
+            return
+        del users[key]
+        retired_service = session_storage_instance.setdefault(
+            "retired_ptt_services", {}
+        ).pop(key, None)
+    if retired_service is not None:
+        _close_ptt_service(retired_service)
+
+
+def _retire_ptt_service(session_storage_instance, ptt_service) -> None:
+    """關閉已經被替換掉的 service；還有呼叫在使用時，等最後一個呼叫釋放後才關閉。
+
+    PyPtt.Service 被 close 之後，還在等待中的 call 會永遠卡住，連帶卡住 PTT 執行緒。
+    """
+    with _SERVICE_LOCK:
+        if session_storage_instance.get("ptt_service_users", {}).get(id(ptt_service)):
+            session_storage_instance.setdefault("retired_ptt_services", {})[
+                id(ptt_service)
+            ] = ptt_service
+            return
+    _close_ptt_service(ptt_service)
+
+
+def _wait_for_session(session_storage_instance) -> Dict[str, Any]:
+    """目前沒有已登入的 session 時呼叫：等待背景預熱的登入完成，或在自動登入模式下直接登入。
+
+    回傳登入結果；成功時呼叫端應該重新取得 session。
+    """
+    warmup = session_storage_instance.get("ptt_warmup")
+    if warmup is not None and not warmup.done():
+        return warmup.result()
+
+    if session_storage_instance.get("auto_login") and not session_storage_instance.get(
+        "logged_out"
+    ):
+        return _login_all(session_storage_instance, only_if_needed=True)
+    return {
+        "success": False,
+        "message": "尚未登入，請先執行 login",
+        "code": "NOT_LOGGED_IN",
+    }
+
+
+def _invoke_ptt_service(
+    ptt_service,
+    method_name: str,
+    success_message: Optional[str],
+    empty_data_message: Optional[str],
+    empty_data_code: Optional[str],
+    kwargs: Dict[str, Any],
+) -> Dict[str, Any]:
+    try:
+        result = ptt_service.call(method_name, kwargs)
     except Exception as e:
         return _handle_ptt_exception(e, kwargs)
+
+    # 直接建立最終的回應，不再事後增刪欄位。
+    if success_message:
+        return {"success": True, "message": success_message}
+    if not result and empty_data_message and empty_data_code:
+        return {
+            "success": False,
+            "message": empty_data_message.format(**kwargs),
+            "code": empty_data_code,
+        }
+    return {"success": True, "data": result}
+
+
+def _login_account(
+    session_storage_instance, ptt_id: str, ptt_pw: str
+) -> Tuple[Optional["PyPtt.Service"], Dict[str, Any]]:
+    """建立新的 PyPtt.Service 並登入，同一個帳號的登入頻率會受到限制，以免觸發 PTT 的防濫用機制。"""
+    login_attempts = session_storage_instance.setdefault("login_attempts", {})
+    attempt = login_attempts.get(ptt_id)
+    now = time.monotonic()
+    if attempt is not None:
+        wait_seconds = min(
+            LOGIN_MIN_INTERVAL_SECONDS * 2 ** attempt["failures"],
+            LOGIN_MAX_BACKOFF_SECONDS,
+        )
+        remaining = attempt["last_attempt"] + wait_seconds - now
+        if remaining > 0:
+            return None, {
+                "success": False,
+                "message": f"登入太頻繁，請在 {math.ceil(remaining)} 秒後再試",
+                "code": "LOGIN_RATE_LIMITED",
+            }
+
+    import PyPtt
+
+    ptt_service = PyPtt.Service({})
+    try:
+        ptt_service.call(
+            "login",
+            {
+                "ptt_id": ptt_id,
+                "ptt_pw": ptt_pw,
+                "kick_other_session": True,
+            },
+        )
+    except Exception as e:
+        ptt_service.close()
+        failures = 0 if attempt is None else attempt["failures"] + 1
+        login_attempts[ptt_id] = {
+            "last_attempt": time.monotonic(),
+            "failures": failures,
+        }
+        return None, _handle_ptt_exception(e, {})
+
+    login_attempts[ptt_id] = {"last_attempt": time.monotonic(), "failures": 0}
+    return ptt_service, {"success": True, "message": "登入成功"}
+
+
+def _close_ptt_service(ptt_service) -> None:
+    try:
+        ptt_service.call("logout")
+    except Exception:
+        pass
+    ptt_service.close()
+
+
+def _login_all(
+    session_storage_instance, only_if_needed: bool = False
+) -> Dict[str, Any]:
+    """登入主帳號，以及多帳號連線池中的其他帳號；已經登入的帳號不會重新登入。
+
+    預熱或自動登入之後再呼叫 login 會直接回傳成功，不會因為登入頻率限制而失敗。
+    only_if_needed 為 True 時 (自動登入)，只要主帳號已經登入就直接回傳，不檢查連線池。
+    """
+    with _LOGIN_LOCK:
+        if session_storage_instance.get("ptt_bot") is None:
+            result = _login_primary_locked(session_storage_instance)
+        elif only_if_needed:
+            return {"success": True, "message": "登入成功"}
+        else:
+            result = {"success": True, "message": "登入成功"}
+
+    if result["success"]:
+        session_storage_instance["logged_out"] = False
+        session_pool = session_storage_instance.get("session_pool")
+        if session_pool is not None:
+            # 主帳號登入成功後，再登入連線池中的其他帳號
+            result["sessions"] = session_pool.login_secondary()
+    return result
+
+
+def _login_primary_locked(session_storage_instance) -> Dict[str, Any]:
+    """登入主帳號，並取代 session_storage_instance 中現有的 session，呼叫前必須持有 _LOGIN_LOCK。"""
+    ptt_service, response = _login_account(
+        session_storage_instance,
+        session_storage_instance["ptt_id"],
+        session_storage_instance["ptt_pw"],
+    )
+    if ptt_service is None:
+        return response
+
+    old_service = session_storage_instance.get("ptt_bot")
+    # 登入成功後，將 bot 實例存起來
+    session_storage_instance["ptt_bot"] = ptt_service
+    if old_service is not None:
+        # 舊的 session 可能還有其他執行緒的呼叫在使用，等它們結束後才登出並關閉。
+        _retire_ptt_service(session_storage_instance, old_service)
+
+    # 換了新的 session，舊的快取 (例如我的最愛) 不一定屬於這個帳號
+    response_cache = session_storage_instance.get("response_cache")
+    if response_cache is not None:
+        response_cache.clear()
+    return response
+
+
+def _relogin_primary(
+    session_storage_instance, dead_service
+) -> Optional["PyPtt.Service"]:
+    """重新登入已經失效的主帳號，回傳已經登記為使用中的新 service；登入失敗時回傳 None。"""
+    with _LOGIN_LOCK:
+        # 其他執行緒可能已經重新登入 (或是使用者已經登出)
+        if session_storage_instance.get("ptt_bot") is dead_service:
+            _login_primary_locked(session_storage_instance)
+        new_service = _hold_ptt_service(
+            session_storage_instance, lambda: session_storage_instance.get("ptt_bot")
+        )
+    if new_service is dead_service:
+        _release_ptt_service(session_storage_instance, new_service)
+        return None
+    return new_service
+
+
+def _get_ptt_executor(session_storage_instance) -> ThreadPoolExecutor:
+    # PyPtt.Service 本身只有一條工作執行緒，所以這裡也只用一個 worker，
+    # 讓所有 PTT 操作在同一條執行緒上依序執行，不會佔用 event loop。
+    # 有多帳號連線池時，每個 session 各配一個 worker，唯讀操作才能平行執行。
+    executor = session_storage_instance.get("ptt_executor")
+    if executor is None:
+        session_pool = session_storage_instance.get("session_pool")
+        max_workers = 1 if session_pool is None else len(session_pool)
+        executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="ptt_session"
+        )
+        session_storage_instance["ptt_executor"] = executor
+    return executor
+
+
+async def _run_in_ptt_executor(
+    session_storage_instance, func: Callable[..., Any], *args, **kwargs
+) -> Any:
+    loop = asyncio.get_running_loop()
+    # 帶著目前的 context 執行，讓 PTT 執行緒上的 PyPtt 呼叫能計入目前的工具呼叫。
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _get_ptt_executor(session_storage_instance),
+        functools.partial(context.run, func, *args, **kwargs),
+    )
+
+
+def _forget_in_flight(
+    in_flight: Dict[Hashable, Future], key: Hashable, future: Future
+) -> None:
+    with _IN_FLIGHT_LOCK:
+        if in_flight.get(key) is future:
+            del in_flight[key]
+
+
+async def _run_in_ptt_executor_shared(
+    session_storage_instance,
+    key: Tuple[Hashable, ...],
+    func: Callable[..., Any],
+    *args,
+    **kwargs,
+) -> Any:
+    """和 _run_in_ptt_executor 相同，但 key 相同的呼叫還在排隊或執行中時，直接等待同一次的結果 (single-flight)。
+
+    只能用在唯讀、結果只取決於參數的操作；key 的第一個元素是操作名稱，用於統計。
+    後來的呼叫端拿到的是結果的淺複本，不會計入 PyPtt 呼叫數。
+    """
+    in_flight = session_storage_instance.setdefault("in_flight_calls", {})
+    with _IN_FLIGHT_LOCK:
+        future = in_flight.get(key)
+        shared = future is not None
+        if future is None:
+            context = contextvars.copy_context()
+            future = _get_ptt_executor(session_storage_instance).submit(
+                functools.partial(context.run, func, *args, **kwargs)
+            )
+            in_flight[key] = future
+    if not shared:
+        # 放在鎖外面：已經完成的 future 會立刻在這個執行緒上呼叫 callback。
+        future.add_done_callback(functools.partial(_forget_in_flight, in_flight, key))
+    else:
+        metrics = session_storage_instance.get("metrics")
+        if metrics is not None:
+            metrics.record_coalesced_call(str(key[0]))
+
+    # 所有呼叫端共用同一個 future：shield 讓一個呼叫端被取消時，不會連帶取消其他人正在等待的呼叫。
+    result = await asyncio.shield(asyncio.wrap_future(future))
+    return dict(result) if shared and isinstance(result, dict) else result
+
+
+async def _call_ptt_service_async(
+    session_storage_instance,
+    method_name: str,
+    **kwargs,
+) -> Dict[str, Any]:
+    if method_name in IDEMPOTENT_METHODS:
+        # 多個客戶端同時查詢相同的資料時，只向 PTT 查詢一次。
+        return await _run_in_ptt_executor_shared(
+            session_storage_instance,
+            _make_key(method_name, kwargs),
+            _call_ptt_service,
+            session_storage_instance,
+            method_name,
+            **kwargs,
+        )
+    return await _run_in_ptt_executor(
+        session_storage_instance,
+        _call_ptt_service,
+        session_storage_instance,
+        method_name,
+        **kwargs,
+    )
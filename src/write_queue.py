@@ -0,0 +1,311 @@
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Deque, Dict, Any, List, Optional, Tuple
+
+from utils import _call_ptt_service, _call_ptt_service_async, _get_ptt_executor
+
+# 各寫入操作兩次執行之間至少間隔的秒數；PTT 對連續推文、發文與寄信都有防洪限制。
+DEFAULT_WRITE_INTERVALS: Dict[str, float] = {
+    "comment": 3.0,
+    "post": 10.0,
+    "reply_post": 10.0,
+    "mail": 3.0,
+}
+
+# 推文間隔太短 (NO_FAST_COMMENT) 時不回傳錯誤，等待後重試：間隔從 NO_FAST_COMMENT_BACKOFF_SECONDS 開始加倍，
+# 最多重試 MAX_WRITE_RETRIES 次。
+NO_FAST_COMMENT_BACKOFF_SECONDS = 5.0
+MAX_BACKOFF_SECONDS = 60.0
+MAX_WRITE_RETRIES = 4
+
+# 佇列中對同一篇文章、同一種類的連續推文會合併成一則，但合併後必須仍然是一行推文。
+# PyPtt 會把過長的推文拆成多行；32 是看板同時記錄 IP 又對齊推文時，一行推文最多的 Big5 位元組數。
+MAX_MERGED_COMMENT_BYTES = 32
+
+# 最多保留幾筆已完成的工作供 get_write_jobs 查詢。
+MAX_FINISHED_JOBS = 200
+
+
+def _parse_interval_config(interval_str: Optional[str]) -> Dict[str, float]:
+    """解析 PTT_WRITE_INTERVAL，格式為 "comment=3,post=30"，0 代表該操作不限制間隔。"""
+    intervals = dict(DEFAULT_WRITE_INTERVALS)
+    if not interval_str:
+        return intervals
+
+    for item in interval_str.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        method_name, sep, seconds = item.partition("=")
+        method_name = method_name.strip()
+        try:
+            intervals[method_name] = float(seconds)
+        except ValueError:
+            sep = ""
+        if not sep or method_name not in DEFAULT_WRITE_INTERVALS:
+            raise ValueError(
+                "PTT_WRITE_INTERVAL must be in the format 'method=seconds,method=seconds' "
+                f"with methods from {', '.join(DEFAULT_WRITE_INTERVALS)}."
+            )
+    return intervals
+
+
+def _comment_bytes(content: str) -> int:
+    return len(content.encode("big5", "replace"))
+
+
+class _WriteJob:
+    def __init__(
+        self,
+        job_id: str,
+        method_name: str,
+        success_message: str,
+        kwargs: Dict[str, Any],
+    ):
+        self.id = job_id
+        self.method_name = method_name
+        self.success_message = success_message
+        self.kwargs = kwargs
+        self.status = "queued"
+        self.attempts = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.merged_with: List[str] = []
+        self.future: "Future[Dict[str, Any]]" = Future()
+
+    def comment_target(self) -> Optional[Tuple[Any, ...]]:
+        """可以合併的推文回傳 (看板, AID, 編號, 推文類型)，其他工作回傳 None。"""
+        if self.method_name != "comment" or "\n" in self.kwargs["content"].strip():
+            return None
+        kwargs = self.kwargs
+        return (
+            kwargs["board"].lower(),
+            kwargs.get("aid"),
+            kwargs.get("index"),
+            kwargs["comment_type"],
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "method": self.method_name,
+            "status": self.status,
+            "attempts": self.attempts,
+            "merged_with": self.merged_with,
+            "result": self.result,
+        }
+
+
+class WriteQueue:
+    """在 PTT 寫入操作前面的佇列：依照各操作的最短間隔依序執行，推文太快時自動等待重試。
+
+    第一次寫入時才會啟動背景執行緒。不同操作各自計算間隔，正在等待的推文不會擋住可以立刻寄出的信。
+    """
+
+    def __init__(
+        self,
+        memory_storage: Dict[str, Any],
+        intervals: Optional[Dict[str, float]] = None,
+    ):
+        self._memory_storage = memory_storage
+        self.intervals = dict(
+            DEFAULT_WRITE_INTERVALS if intervals is None else intervals
+        )
+        self._lock = threading.Lock()
+        self._wake_event = threading.Event()
+        self._job_ids = itertools.count(1)
+        self._pending: List[_WriteJob] = []
+        self._jobs: Dict[str, _WriteJob] = {}
+        self._finished: Deque[str] = deque()
+        # 各操作下一次可以執行的時間 (time.monotonic)。
+        self._next_allowed: Dict[str, float] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(
+        self, method_name: str, success_message: str, kwargs: Dict[str, Any]
+    ) -> _WriteJob:
+        with self._lock:
+            job = _WriteJob(
+                str(next(self._job_ids)), method_name, success_message, kwargs
+            )
+            self._jobs[job.id] = job
+            self._pending.append(job)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="ptt_write_queue", daemon=True
+                )
+                self._thread.start()
+        self._wake_event.set()
+        return job
+
+    def jobs(self, job_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """回傳指定工作的狀態；沒有指定時回傳所有還在佇列中與最近完成的工作。不存在的工作略過。"""
+        with self._lock:
+            if job_ids is None:
+                return [job.to_dict() for job in self._jobs.values()]
+            return [
+                self._jobs[job_id].to_dict()
+                for job_id in job_ids
+                if job_id in self._jobs
+            ]
+
+    def _run(self) -> None:
+        try:
+            self._loop()
+        finally:
+            # 執行緒意外結束時，讓下一個 submit 重新啟動，避免之後的寫入永遠等不到結果。
+            with self._lock:
+                self._thread = None
+
+    def _loop(self) -> None:
+        while True:
+            with self._lock:
+                job, ready_at = self._next_job()
+            if job is None:
+                self._wake_event.wait()
+                self._wake_event.clear()
+                continue
+
+            wait = ready_at - time.monotonic()
+            if wait > 0:
+                # 等待期間有新的工作時重新挑選，也讓新的推文有機會合併進來。
+                if self._wake_event.wait(wait):
+                    self._wake_event.clear()
+                continue
+
+            with self._lock:
+                batch = self._take_batch(job)
+            try:
+                self._execute(batch)
+            except Exception as e:
+                # 寫入失敗不應該讓佇列停止，回報給等待中的呼叫端。
+                self._finish(
+                    batch,
+                    {"success": False, "message": str(e), "code": "UNKNOWN_ERROR"},
+                )
+
+    def _next_job(self) -> Tuple[Optional[_WriteJob], float]:
+        """回傳最早可以執行的工作與可以執行的時間；同一種操作依照送出的順序。"""
+        best: Optional[_WriteJob] = None
+        best_ready_at = 0.0
+        seen = set()
+        for job in self._pending:
+            if job.method_name in seen:
+                continue
+            seen.add(job.method_name)
+            ready_at = self._next_allowed.get(job.method_name, 0.0)
+            if best is None or ready_at < best_ready_at:
+                best, best_ready_at = job, ready_at
+        return best, best_ready_at
+
+    def _take_batch(self, job: _WriteJob) -> List[_WriteJob]:
+        """從佇列取出 job，以及可以和它合併的後續推文 (中間沒有其他推文)。"""
+        batch = [job]
+        target = job.comment_target()
+        if target is not None:
+            length = _comment_bytes(job.kwargs["content"].strip())
+            for other in self._pending[self._pending.index(job) + 1 :]:
+                if other.method_name != "comment":
+                    continue
+                other_length = _comment_bytes(other.kwargs["content"].strip())
+                if (
+                    other.comment_target() != target
+                    or length + 1 + other_length > MAX_MERGED_COMMENT_BYTES
+                ):
+                    break
+                batch.append(other)
+                length += 1 + other_length
+
+        for batch_job in batch:
+            self._pending.remove(batch_job)
+            batch_job.status = "running"
+        return batch
+
+    def _execute(self, batch: List[_WriteJob]) -> None:
+        head = batch[0]
+        kwargs = dict(head.kwargs)
+        if len(batch) > 1:
+            kwargs["content"] = " ".join(job.kwargs["content"].strip() for job in batch)
+
+        response = (
+            _get_ptt_executor(self._memory_storage)
+            .submit(
+                _call_ptt_service,
+                self._memory_storage,
+                head.method_name,
+                success_message=head.success_message,
+                **kwargs,
+            )
+            .result()
+        )
+
+        now = time.monotonic()
+        with self._lock:
+            for job in batch:
+                job.attempts += 1
+            if (
+                response.get("code") == "NO_FAST_COMMENT"
+                and head.attempts <= MAX_WRITE_RETRIES
+            ):
+                backoff = min(
+                    MAX_BACKOFF_SECONDS,
+                    NO_FAST_COMMENT_BACKOFF_SECONDS * 2 ** (head.attempts - 1),
+                )
+                self._next_allowed[head.method_name] = now + backoff
+                # 放回佇列最前面，等待後重試 (期間送出的推文仍然可以合併)。
+                for job in batch:
+                    job.status = "queued"
+                self._pending[:0] = batch
+                return
+            self._next_allowed[head.method_name] = now + self.intervals.get(
+                head.method_name, 0.0
+            )
+        self._finish(batch, response)
+
+    def _finish(self, batch: List[_WriteJob], response: Dict[str, Any]) -> None:
+        job_ids = [job.id for job in batch]
+        with self._lock:
+            for job in batch:
+                if job.result is None:
+                    self._finished.append(job.id)
+                job.status = "done" if response.get("success") else "failed"
+                job.merged_with = [job_id for job_id in job_ids if job_id != job.id]
+                job.result = response
+            while len(self._finished) > MAX_FINISHED_JOBS:
+                self._jobs.pop(self._finished.popleft(), None)
+
+        for job in batch:
+            # 等待中的呼叫端被取消時 future 可能已經結束，結果仍然可以用 get_write_jobs 查詢。
+            if not job.future.done():
+                job.future.set_result(
+                    {**response, "job_id": job.id, "merged_with": job.merged_with}
+                )
+
+
+async def _queue_write(
+    memory_storage: Dict[str, Any],
+    method_name: str,
+    wait: bool,
+    success_message: str,
+    **kwargs,
+) -> Dict[str, Any]:
+    """把寫入操作送進寫入佇列。wait 為 True 時等待執行結果，否則立刻回傳工作 ID。"""
+    write_queue: Optional[WriteQueue] = memory_storage.get("write_queue")
+    if write_queue is None:
+        return await _call_ptt_service_async(
+            memory_storage, method_name, success_message=success_message, **kwargs
+        )
+
+    job = write_queue.submit(method_name, success_message, kwargs)
+    if not wait:
+        return {
+            "success": True,
+            "message": "已排入寫入佇列",
+            "job_id": job.id,
+            "status": job.status,
+        }
+    # shield: 呼叫端被取消時不取消 job.future，工作仍然會執行並記錄結果。
+    return await asyncio.shield(asyncio.wrap_future(job.future))